@@ -5,7 +5,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class DatabaseSettings:
-    """Configuración de la base de datos MySQL"""
+    """Configuración de la base de datos (MySQL o SQLite embebido)"""
+    
+    # Motor de base de datos: "mysql" o "sqlite"
+    DB_ENGINE = os.getenv("DB_ENGINE", "mysql")
+    
+    # Configuración de SQLite (":memory:" = base en memoria del proceso)
+    SQLITE_PATH = os.getenv("SQLITE_PATH", "sales_system.sqlite3")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
     
     # Configuración de MySQL
     MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
@@ -18,9 +25,20 @@ class DatabaseSettings:
     MYSQL_CHARSET = "utf8mb4"
     MYSQL_COLLATION = "utf8mb4_unicode_ci"
     
+    @property
+    def is_sqlite(self) -> bool:
+        return self.DB_ENGINE == "sqlite"
+    
+    @property
+    def is_in_memory(self) -> bool:
+        """La base solo existe dentro de este proceso (SQLite con SQLITE_PATH=":memory:")"""
+        return self.is_sqlite and self.SQLITE_PATH == ":memory:"
+    
     @property
     def database_url(self) -> str:
         """URL de conexión a la base de datos"""
+        if self.is_sqlite:
+            return self.sqlite_url
         return (
             f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}"
             f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
@@ -30,11 +48,20 @@ class DatabaseSettings:
     @property
     def database_url_sync(self) -> str:
         """URL de conexión síncrona para Alembic"""
+        if self.is_sqlite:
+            return self.sqlite_url
         return (
             f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}"
             f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
             f"?charset={self.MYSQL_CHARSET}"
         )
+    
+    @property
+    def sqlite_url(self) -> str:
+        """URL de SQLite: archivo o, con SQLITE_PATH=":memory:", base en memoria"""
+        if self.SQLITE_PATH == ":memory:":
+            return "sqlite://"
+        return f"sqlite:///{self.SQLITE_PATH}"
 
 class Settings:
     """Configuración general de la aplicación"""
@@ -47,6 +74,104 @@ class Settings:
     # Configuración de la base de datos
     database = DatabaseSettings()
     
+    # Backend de almacenamiento: "sql" (MySQL vía SQLAlchemy) o "memory" (en proceso, sin base de datos)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sql")
+    # Snapshot del backend en memoria: se restaura al iniciar y se guarda al apagar (vacío = sin persistencia)
+    MEMORY_SNAPSHOT_PATH = os.getenv("MEMORY_SNAPSHOT_PATH", "")
+    
+    # Asignación de IDs por bloques (hi-lo) para ventas e items de venta
+    ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", 100))
+    
+    # Idempotencia de POST /sales (header Idempotency-Key)
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000))
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", 30))
+    IDEMPOTENCY_POLL_INTERVAL = float(os.getenv("IDEMPOTENCY_POLL_INTERVAL", 0.05))
+    
+    # Modo de escritura de ventas:
+    # - "direct": cada venta en su propia transacción
+    # - "group_commit": ventas concurrentes comparten transacción (ventana corta o lote)
+    # - "write_behind": log local + escritor en segundo plano
+    SALE_WRITE_MODE = os.getenv("SALE_WRITE_MODE", "direct")
+    SALE_JOURNAL_PATH = os.getenv("SALE_JOURNAL_PATH", "sale_journal.db")
+    SALE_JOURNAL_BATCH_SIZE = int(os.getenv("SALE_JOURNAL_BATCH_SIZE", 500))
+    SALE_JOURNAL_FLUSH_INTERVAL = float(os.getenv("SALE_JOURNAL_FLUSH_INTERVAL", 0.2))
+    GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", 2))
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", 50))
+    
+    # Exportaciones columnares (filas por bloque leído con cursor del servidor)
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 50000))
+    
+    # Recorridos completos de tablas en los repositorios (iter_*)
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 1000))
+    
+    # Cargas masivas (filas por INSERT multi-fila / consulta IN)
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+    
+    # Consultas por lote de IDs (GET ?ids= y POST /batch): máximo de IDs por solicitud
+    BATCH_LOOKUP_MAX_IDS = int(os.getenv("BATCH_LOOKUP_MAX_IDS", 1000))
+    
+    # Respuestas de GET /sales/{id} ya serializadas (bytes máximos en memoria por worker, 0 = sin caché)
+    SALE_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("SALE_RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    
+    # Simulación de precios sobre ventas históricas: procesos del pool (0 = uno por CPU),
+    # días por defecto hacia atrás y simulaciones que se conservan para consultar
+    REPRICING_WORKERS = int(os.getenv("REPRICING_WORKERS", 0))
+    REPRICING_DEFAULT_DAYS = int(os.getenv("REPRICING_DEFAULT_DAYS", 365))
+    REPRICING_MAX_JOBS = int(os.getenv("REPRICING_MAX_JOBS", 20))
+    
+    # Búsqueda de productos: índice invertido en memoria (si está desactivado, FULLTEXT/LIKE en la base)
+    PRODUCT_SEARCH_INDEX_ENABLED = os.getenv("PRODUCT_SEARCH_INDEX_ENABLED", "True").lower() == "true"
+    PRODUCT_SEARCH_MAX_EXPANSIONS = int(os.getenv("PRODUCT_SEARCH_MAX_EXPANSIONS", 256))
+    PRODUCT_SEARCH_MAX_CANDIDATES = int(os.getenv("PRODUCT_SEARCH_MAX_CANDIDATES", 5000))
+    
+    # Caché en proceso de métodos de pago y descuentos (segundos antes de recargar)
+    CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", 60))
+    # Catálogo compartido entre los workers del host vía mmap (vacío = caché local por proceso)
+    SHARED_CATALOG_PATH = os.getenv("SHARED_CATALOG_PATH", "")
+    SHARED_CATALOG_SIZE_MB = int(os.getenv("SHARED_CATALOG_SIZE_MB", 64))
+    
+    # Bus de invalidación de cachés entre workers: none | version_table | unix_socket
+    INVALIDATION_TRANSPORT = os.getenv("INVALIDATION_TRANSPORT", "none")
+    INVALIDATION_POLL_INTERVAL = float(os.getenv("INVALIDATION_POLL_INTERVAL", 1))
+    INVALIDATION_SOCKET_DIR = os.getenv("INVALIDATION_SOCKET_DIR", "/tmp/sales_invalidation")
+    
+    # Outbox de eventos de ventas: lote y frecuencia del relay, eventos recientes en memoria,
+    # espera por un hueco de IDs antes de saltarlo y cuánto se siguen revisando los IDs saltados,
+    # días que se conservan (0 = siempre), espera máxima del long-poll y latido del stream SSE
+    OUTBOX_RELAY_BATCH_SIZE = int(os.getenv("OUTBOX_RELAY_BATCH_SIZE", 500))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 0.2))
+    OUTBOX_BUFFER_SIZE = int(os.getenv("OUTBOX_BUFFER_SIZE", 10000))
+    OUTBOX_GAP_TIMEOUT = float(os.getenv("OUTBOX_GAP_TIMEOUT", 5))
+    OUTBOX_LATE_WINDOW = float(os.getenv("OUTBOX_LATE_WINDOW", 300))
+    OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+    OUTBOX_LONG_POLL_SECONDS = float(os.getenv("OUTBOX_LONG_POLL_SECONDS", 25))
+    OUTBOX_SSE_HEARTBEAT = float(os.getenv("OUTBOX_SSE_HEARTBEAT", 15))
+    
+    # Calentamiento al iniciar: /ready responde 503 hasta terminarlo; si falla se
+    # reintenta con espera exponencial (segundos) entre RETRY_DELAY y RETRY_MAX_DELAY
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
+    WARMUP_POOL_CONNECTIONS = int(os.getenv("WARMUP_POOL_CONNECTIONS", 10))
+    WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", 1))
+    WARMUP_RETRY_MAX_DELAY = float(os.getenv("WARMUP_RETRY_MAX_DELAY", 30))
+    
+    # Control de admisión: solicitudes simultáneas por proceso (por defecto, la capacidad del pool)
+    # y espera máxima en cola antes de responder 503; POST /sales tiene prioridad y toda la capacidad
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 30))
+    ADMISSION_READ_SHARE = float(os.getenv("ADMISSION_READ_SHARE", 0.7))
+    ADMISSION_REPORT_SHARE = float(os.getenv("ADMISSION_REPORT_SHARE", 0.2))
+    ADMISSION_QUEUE_BUDGET_MS = float(os.getenv("ADMISSION_QUEUE_BUDGET_MS", 250))
+    ADMISSION_SALE_QUEUE_BUDGET_MS = float(os.getenv("ADMISSION_SALE_QUEUE_BUDGET_MS", 2000))
+    ADMISSION_POOL_WAIT_BUDGET_MS = float(os.getenv("ADMISSION_POOL_WAIT_BUDGET_MS", 100))
+    
+    # Agrupación de GET idénticos concurrentes (una sola ejecución y respuesta compartida)
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "True").lower() == "true"
+    SINGLE_FLIGHT_MAX_BYTES = int(os.getenv("SINGLE_FLIGHT_MAX_BYTES", 8 * 1024 * 1024))
+    
+    # Respuestas MessagePack (Accept: application/msgpack): compresión zstd a partir de este tamaño
+    MSGPACK_ZSTD_MIN_BYTES = int(os.getenv("MSGPACK_ZSTD_MIN_BYTES", 1024))
+    MSGPACK_ZSTD_LEVEL = int(os.getenv("MSGPACK_ZSTD_LEVEL", 3))
+    
     # Configuración de CORS
     CORS_ORIGINS = ["*"]
     CORS_ALLOW_CREDENTIALS = True
@@ -1,19 +1,117 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, StaticPool
 from app.config.settings import settings
 
+# PRAGMAs aplicados a cada conexión SQLite (journal_mode se fija aparte: WAL solo en archivos)
+SQLITE_PRAGMAS = {
+    "synchronous": "NORMAL",  # con WAL solo se sincroniza en los checkpoints
+    "foreign_keys": "ON",
+    "cache_size": -64000,  # 64 MB de caché de páginas por conexión
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456  # 256 MB leídos vía mmap
+}
+
+class PoolWaitMonitor:
+    """
+    Tiempo que esperan los checkouts del pool por una conexión libre
+    
+    Guarda las muestras de los últimos `window` segundos; sin checkouts
+    recientes la espera se considera cero (el pool no está saturado).
+    """
+    
+    def __init__(self, window: float = 2.0, max_samples: int = 4096):
+        self.window = window
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+    
+    def record(self, wait: float) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), wait))
+    
+    def recent_wait(self) -> float:
+        """Espera media (segundos) de los checkouts de la ventana"""
+        horizon = time.monotonic() - self.window
+        with self._lock:
+            while self._samples and self._samples[0][0] < horizon:
+                self._samples.popleft()
+            if not self._samples:
+                return 0.0
+            return sum(wait for _, wait in self._samples) / len(self._samples)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Espera reciente y ocupación del pool del engine"""
+        result: Dict[str, Any] = {"recent_wait_ms": round(self.recent_wait() * 1000, 2)}
+        if isinstance(engine.pool, QueuePool):
+            result["checked_out"] = engine.pool.checkedout()
+            result["capacity"] = engine.pool.size() + engine.pool._max_overflow
+        return result
+
+# Instancia global del monitor de espera del pool
+pool_wait_monitor = PoolWaitMonitor()
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool que registra en `pool_wait_monitor` cuánto tarda cada checkout"""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_monitor.record(time.perf_counter() - started)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Activar WAL y los PRAGMAs de rendimiento en cada conexión nueva"""
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.database.SQLITE_PATH != ":memory:":
+            # WAL: los lectores no bloquean al escritor ni viceversa
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.database.SQLITE_BUSY_TIMEOUT_MS}")
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+def build_engine() -> Engine:
+    """
+    Crear el engine según el motor configurado
+    
+    - MySQL: pool de conexiones con pre-ping y reciclado
+    - SQLite en archivo: pool con los tamaños por defecto, WAL y PRAGMAs en cada conexión
+    
+    Los pools con cola registran la espera de cada checkout (control de admisión).
+    - SQLite en memoria: una única conexión compartida entre hilos (StaticPool)
+    """
+    database = settings.database
+    if not database.is_sqlite:
+        return create_engine(
+            database.database_url,
+            poolclass=MonitoredQueuePool,
+            pool_size=10,
+            max_overflow=20,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            echo=settings.DEBUG
+        )
+    
+    options = {"connect_args": {"check_same_thread": False}, "echo": settings.DEBUG}
+    if database.SQLITE_PATH == ":memory:":
+        options["poolclass"] = StaticPool
+    else:
+        options["poolclass"] = MonitoredQueuePool
+    sqlite_engine = create_engine(database.database_url, **options)
+    event.listen(sqlite_engine, "connect", _set_sqlite_pragmas)
+    return sqlite_engine
+
 # Crear el engine de SQLAlchemy
-engine = create_engine(
-    settings.database.database_url,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=settings.DEBUG
-)
+engine = build_engine()
 
 # Crear la sesión de SQLAlchemy
 SessionLocal = sessionmaker(
@@ -28,7 +126,15 @@ Base = declarative_base()
 def get_db() -> Session:
     """
     Obtener una sesión de base de datos
+    
+    Con STORAGE_BACKEND=memory se entrega el store en memoria, que los
+    repositorios de app.storage usan en lugar de la sesión.
     """
+    if settings.STORAGE_BACKEND == "memory":
+        from app.storage.memory import memory_store
+        yield memory_store
+        return
+    
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,25 @@
+from sqlalchemy import Table
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+def dialect_name(db: Session) -> str:
+    """Nombre del dialecto de la conexión de la sesión ("mysql", "sqlite", ...)"""
+    return db.get_bind().dialect.name
+
+def insert_ignore(db: Session, table: Table) -> Insert:
+    """
+    INSERT que omite las filas cuya llave primaria o única ya existe
+    
+    - SQLite: INSERT ... ON CONFLICT DO NOTHING
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE pk = pk (a diferencia de
+      INSERT IGNORE, no oculta errores de llaves foráneas ni de tipos)
+    - Otros dialectos: INSERT simple (los duplicados lanzan IntegrityError)
+    """
+    name = dialect_name(db)
+    if name == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if name == "mysql":
+        pk = table.primary_key.columns[0]
+        return mysql.insert(table).on_duplicate_key_update({pk.name: pk})
+    return table.insert()
@@ -0,0 +1,68 @@
+"""
+Actualización del esquema de bases creadas con una versión anterior de los modelos
+
+create_all crea las tablas que faltan pero no modifica las que ya existen, así
+que las columnas nuevas de tablas existentes (por ejemplo valid_from/valid_to
+de los descuentos) se agregan aquí. La usan init_db.py (que se puede volver a
+ejecutar sobre una base existente) y el calentamiento, que se niega a declarar
+listo un proceso cuyo esquema está incompleto.
+"""
+from typing import Dict, List
+from sqlalchemy import CheckConstraint, inspect
+from sqlalchemy.engine import Engine
+from app.database.connection import Base
+from app.database import models  # noqa: F401 (registra las tablas en Base.metadata)
+
+def missing_columns(engine: Engine) -> Dict[str, List[str]]:
+    """Columnas de los modelos que no existen en las tablas ya creadas, por tabla"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        absent = [column.name for column in table.columns if column.name not in existing_columns]
+        if absent:
+            missing[table.name] = absent
+    return missing
+
+def check_schema(engine: Engine) -> None:
+    """Fallar con un mensaje claro si a la base le faltan columnas de los modelos"""
+    missing = missing_columns(engine)
+    if missing:
+        detail = ", ".join(f"{table}.{column}" for table, columns in missing.items() for column in columns)
+        raise RuntimeError(f"Faltan columnas en la base de datos ({detail}): ejecute init_db.py para actualizar el esquema")
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """
+    Agregar las columnas que faltan; devuelve las sentencias ejecutadas
+    
+    Solo se agregan columnas que admiten NULL (las filas existentes no tienen
+    valor). En MySQL se agregan también los CHECK del modelo que usan esas
+    columnas; SQLite no permite agregarlos a una tabla existente, y ahí las
+    API validan los mismos rangos.
+    """
+    dialect = engine.dialect
+    statements = []
+    for table_name, column_names in missing_columns(engine).items():
+        table = Base.metadata.tables[table_name]
+        for column_name in column_names:
+            column = table.c[column_name]
+            if not column.nullable:
+                raise RuntimeError(f"No se puede agregar {table_name}.{column_name}: es NOT NULL y las filas existentes no tienen valor")
+            statements.append(
+                f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(dialect=dialect)} NULL"
+            )
+        if dialect.name == "mysql":
+            for constraint in table.constraints:
+                if isinstance(constraint, CheckConstraint) and any(name in str(constraint.sqltext) for name in column_names):
+                    statements.append(
+                        f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint.name} CHECK ({constraint.sqltext})"
+                    )
+    
+    if statements:
+        with engine.begin() as connection:
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+    return statements
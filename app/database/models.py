@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, CheckConstraint, Index, LargeBinary, DDL, event
 from sqlalchemy.types import DECIMAL
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -89,8 +89,16 @@ class Product(Base):
     __table_args__ = (
         CheckConstraint("list_price >= 0", name="check_list_price_positive"),
         Index('idx_product_deleted', 'deleted_at'),
+        Index('idx_product_name', 'name'),
     )
 
+# Índice FULLTEXT para la búsqueda de productos (solo MySQL; en otros motores se usa LIKE)
+event.listen(
+    Product.__table__,
+    "after_create",
+    DDL("ALTER TABLE product ADD FULLTEXT INDEX ft_product_name (name)").execute_if(dialect="mysql")
+)
+
 class PaymentMethod(Base):
     """Modelo para métodos de pago"""
     __tablename__ = "payment_method"
@@ -112,6 +120,9 @@ class ProductTypeDiscount(Base):
     discount_id = Column(Integer, primary_key=True, autoincrement=True)
     product_type_id = Column(Integer, ForeignKey("product_type.product_type_id"), nullable=False)
     discount_percent = Column(DECIMAL(5, 2), nullable=False)
+    # Vigencia [valid_from, valid_to); NULL = sin límite por ese lado
+    valid_from = Column(DateTime)
+    valid_to = Column(DateTime)
     created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
     updated_at = Column(DateTime, onupdate=func.current_timestamp())
     deleted_at = Column(DateTime)
@@ -121,6 +132,7 @@ class ProductTypeDiscount(Base):
     
     __table_args__ = (
         CheckConstraint("discount_percent >= 0 AND discount_percent <= 100", name="check_discount_percent_range"),
+        CheckConstraint("valid_from IS NULL OR valid_to IS NULL OR valid_from < valid_to", name="check_product_type_discount_validity"),
     )
 
 class PaymentMethodDiscount(Base):
@@ -130,6 +142,9 @@ class PaymentMethodDiscount(Base):
     discount_id = Column(Integer, primary_key=True, autoincrement=True)
     payment_method_id = Column(Integer, ForeignKey("payment_method.payment_method_id"), nullable=False)
     discount_percent = Column(DECIMAL(5, 2), nullable=False)
+    # Vigencia [valid_from, valid_to); NULL = sin límite por ese lado
+    valid_from = Column(DateTime)
+    valid_to = Column(DateTime)
     created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
     updated_at = Column(DateTime, onupdate=func.current_timestamp())
     deleted_at = Column(DateTime)
@@ -139,6 +154,7 @@ class PaymentMethodDiscount(Base):
     
     __table_args__ = (
         CheckConstraint("discount_percent >= 0 AND discount_percent <= 100", name="check_discount_percent_range"),
+        CheckConstraint("valid_from IS NULL OR valid_to IS NULL OR valid_from < valid_to", name="check_payment_method_discount_validity"),
     )
 
 class CreditTermsDiscount(Base):
@@ -148,6 +164,9 @@ class CreditTermsDiscount(Base):
     discount_id = Column(Integer, primary_key=True, autoincrement=True)
     credit_terms_id = Column(Integer, ForeignKey("credit_terms.credit_terms_id"), nullable=False)
     discount_percent = Column(DECIMAL(5, 2), nullable=False)
+    # Vigencia [valid_from, valid_to); NULL = sin límite por ese lado
+    valid_from = Column(DateTime)
+    valid_to = Column(DateTime)
     created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
     updated_at = Column(DateTime, onupdate=func.current_timestamp())
     deleted_at = Column(DateTime)
@@ -157,6 +176,7 @@ class CreditTermsDiscount(Base):
     
     __table_args__ = (
         CheckConstraint("discount_percent >= 0 AND discount_percent <= 100", name="check_credit_terms_discount_percent_range"),
+        CheckConstraint("valid_from IS NULL OR valid_to IS NULL OR valid_from < valid_to", name="check_credit_terms_discount_validity"),
         Index('idx_credit_terms_discount_terms', 'credit_terms_id'),
     )
 
@@ -188,7 +208,8 @@ class Sale(Base):
         CheckConstraint("total >= 0", name="check_total_positive"),
         CheckConstraint("total_discounts_amount >= 0", name="check_total_discounts_positive"),
         Index('idx_sale_deleted', 'deleted_at'),
-        Index('idx_sale_customer', 'customer_id'),
+        # Historial por cliente con paginación por keyset (customer_id, sale_datetime, sale_id)
+        Index('idx_sale_customer_datetime', 'customer_id', 'sale_datetime', 'sale_id'),
         Index('idx_sale_datetime', 'sale_datetime'),
     )
 
@@ -223,3 +244,51 @@ class SaleItem(Base):
         Index('idx_sale_item_sale', 'sale_id'),
         Index('idx_sale_item_product', 'product_id'),
     )
+
+
+class OutboxEvent(Base):
+    """Modelo para los eventos de ventas (outbox transaccional, se escriben con la venta)"""
+    __tablename__ = "outbox_event"
+    
+    event_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False)
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index('idx_outbox_event_created', 'created_at'),
+    )
+
+class IdSequence(Base):
+    """Modelo para secuencias de IDs asignadas por bloques (hi-lo)"""
+    __tablename__ = "id_sequence"
+    
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+class IdempotencyKey(Base):
+    """Modelo para llaves de idempotencia de solicitudes (POST /sales)"""
+    __tablename__ = "idempotency_key"
+    
+    idempotency_key_id = Column(Integer, primary_key=True, autoincrement=True)
+    idempotency_key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    # NULL mientras la solicitud original sigue en curso
+    status_code = Column(Integer)
+    response_body = Column(LargeBinary)
+    created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    updated_at = Column(DateTime, onupdate=func.current_timestamp())
+    
+    __table_args__ = (
+        Index('idx_idempotency_key', 'idempotency_key', unique=True),
+    )
+
+class CacheVersion(Base):
+    """Modelo para las versiones de cada tema de invalidación de cachés (bus de invalidación)"""
+    __tablename__ = "cache_version"
+    
+    topic = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -0,0 +1,141 @@
+"""
+Inicialización de la base de datos con datos básicos (catálogos y descuentos por crédito)
+
+La usan el script init_db.py, el arranque de la API y los tests. Sobre una base
+existente agrega también las columnas nuevas de los modelos (upgrade_schema).
+"""
+from sqlalchemy.orm import Session
+from app.database.connection import engine, get_db, create_tables
+from app.database.migrations import upgrade_schema
+from app.repositories.customer_type_repository import CustomerTypeRepository
+from app.repositories.credit_terms_repository import CreditTermsRepository
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.repositories.credit_terms_discount_repository import CreditTermsDiscountRepository
+from app.storage import get_repository, is_memory_backend
+
+def seed_missing(db: Session, repo, field: str, rows: list, created_msg: str, existing_msg: str):
+    """
+    Insertar en una sola carga las filas cuyo `field` aún no existe
+    
+    Si otro proceso siembra al mismo tiempo, los choques con las llaves únicas
+    se omiten en la propia sentencia (ON CONFLICT / ON DUPLICATE KEY).
+    """
+    existing = repo.get_ids_by(db, field, [row[field] for row in rows])
+    missing = [row for row in rows if row[field] not in existing]
+    if missing:
+        repo.bulk_create(db, missing, ignore_conflicts=True)
+    for row in rows:
+        message = existing_msg if row[field] in existing else created_msg
+        print(message.format(**row))
+
+def init_database():
+    """Inicializar la base de datos con datos básicos"""
+    print("🚀 Inicializando base de datos...")
+    
+    # Crear tablas y agregar las columnas nuevas a las existentes (el backend en memoria no las necesita)
+    if not is_memory_backend():
+        create_tables()
+        print("✅ Tablas creadas")
+        for statement in upgrade_schema(engine):
+            print(f"✅ Esquema actualizado: {statement}")
+    
+    # Obtener sesión de base de datos
+    db = next(get_db())
+    
+    try:
+        # 1. Crear tipos de cliente
+        customer_type_repo = get_repository(CustomerTypeRepository)
+        customer_types = [
+            {"name": "VIP"},
+            {"name": "Regular"}
+        ]
+        
+        seed_missing(
+            db, customer_type_repo, "name", customer_types,
+            "✅ Tipo de cliente creado: {name}",
+            "ℹ️  Tipo de cliente ya existe: {name}"
+        )
+        
+        # 2. Crear términos de crédito
+        credit_terms_repo = get_repository(CreditTermsRepository)
+        credit_terms = [
+            {"days": 30},
+            {"days": 90},
+            {"days": 120}
+        ]
+        
+        seed_missing(
+            db, credit_terms_repo, "days", credit_terms,
+            "✅ Términos de crédito creados: {days} días",
+            "ℹ️  Términos de crédito ya existen: {days} días"
+        )
+        
+        # 3. Crear tipos de producto
+        product_type_repo = get_repository(ProductTypeRepository)
+        product_types = [
+            {"name": "Electronics"},
+            {"name": "Clothing"},
+            {"name": "Books"}
+        ]
+        
+        seed_missing(
+            db, product_type_repo, "name", product_types,
+            "✅ Tipo de producto creado: {name}",
+            "ℹ️  Tipo de producto ya existe: {name}"
+        )
+        
+        # 4. Crear métodos de pago
+        payment_method_repo = get_repository(PaymentMethodRepository)
+        payment_methods = [
+            {"name": "Cash"},
+            {"name": "Credit Card"},
+            {"name": "Store Credit"}
+        ]
+        
+        seed_missing(
+            db, payment_method_repo, "name", payment_methods,
+            "✅ Método de pago creado: {name}",
+            "ℹ️  Método de pago ya existe: {name}"
+        )
+        
+        # 5. Crear descuentos por términos de crédito (nuevo)
+        credit_terms_discount_repo = get_repository(CreditTermsDiscountRepository)
+        
+        # Obtener los términos de crédito creados
+        credit_terms_30 = credit_terms_repo.get_by_days(db, 30)
+        credit_terms_90 = credit_terms_repo.get_by_days(db, 90)
+        credit_terms_120 = credit_terms_repo.get_by_days(db, 120)
+        
+        # Crear descuentos según las reglas de negocio: 30d=0%, 90d=2%, 120d=4%
+        credit_terms_discounts = [
+            {"credit_terms_id": credit_terms_30.credit_terms_id, "discount_percent": 0.0},
+            {"credit_terms_id": credit_terms_90.credit_terms_id, "discount_percent": 2.0},
+            {"credit_terms_id": credit_terms_120.credit_terms_id, "discount_percent": 4.0}
+        ]
+        
+        seed_missing(
+            db, credit_terms_discount_repo, "credit_terms_id", credit_terms_discounts,
+            "✅ Descuento por términos de crédito creado: {discount_percent}%",
+            "ℹ️  Descuento por términos de crédito ya existe: {discount_percent}%"
+        )
+        
+        print("\n🎉 Base de datos inicializada correctamente!")
+        print("\n📋 Datos creados:")
+        print("   - Tipos de cliente: VIP, Regular")
+        print("   - Términos de crédito: 30, 90, 120 días")
+        print("   - Tipos de producto: Electronics, Clothing, Books")
+        print("   - Métodos de pago: Cash, Credit Card, Store Credit")
+        print("   - Descuentos por crédito: 30d=0%, 90d=2%, 120d=4%")
+        print("\n📊 Reglas de negocio implementadas:")
+        print("   - Descuentos secuenciales: Base → ProductType → PaymentMethod → CreditTerms")
+        print("   - Solo Store Credit aplica descuento por términos de crédito")
+        print("   - Redondeo a 2 decimales en cada línea")
+        print("   - Tax 16% sobre subtotal después de descuentos")
+        
+    except Exception as e:
+        print(f"❌ Error al inicializar la base de datos: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import Any, Optional, List, Dict
+from datetime import date, datetime
 from decimal import Decimal
 
 # Customer Models
@@ -34,14 +34,25 @@ class Product(ProductBase):
     list_price: Decimal
 
 # Discount Models
-class ProductDiscountCreate(BaseModel):
+class DiscountValidity(BaseModel):
+    """Vigencia [valid_from, valid_to) de un descuento; None = sin límite por ese lado"""
+    valid_from: Optional[datetime] = None
+    valid_to: Optional[datetime] = None
+    
+    @model_validator(mode="after")
+    def check_validity(self):
+        if self.valid_from is not None and self.valid_to is not None and self.valid_from >= self.valid_to:
+            raise ValueError("valid_to debe ser posterior a valid_from")
+        return self
+
+class ProductDiscountCreate(DiscountValidity):
     product_type: str = Field(..., min_length=1, max_length=50)
     discount_percent: Decimal = Field(..., ge=0, le=100)
 
 class ProductDiscount(ProductDiscountCreate):
     pass
 
-class PaymentDiscountCreate(BaseModel):
+class PaymentDiscountCreate(DiscountValidity):
     payment_method: str = Field(..., min_length=1, max_length=50)
     discount_percent: Decimal = Field(..., ge=0, le=100)
 
@@ -62,7 +73,7 @@ class SaleItemBreakdown(BaseModel):
     product_id: int
     quantity: int
     list_price: Decimal
-    discounts: dict = Field(..., description="Diccionario con descuentos aplicados")
+    discounts: Dict[str, Decimal] = Field(..., description="Diccionario con descuentos aplicados")
     line_subtotal_after_discounts: Decimal
 
 class SaleBreakdown(BaseModel):
@@ -89,8 +100,115 @@ class SaleList(BaseModel):
     total_discounts_amount: Decimal
     sale_datetime: datetime
 
+# Customer Sales History Models
+class CustomerSalesSummary(BaseModel):
+    sales_count: int
+    lifetime_total: Decimal
+    last_purchase: Optional[datetime] = None
+
+class CustomerSalesPage(BaseModel):
+    customer_id: int
+    summary: Optional[CustomerSalesSummary] = Field(None, description="Solo se incluye en la primera página")
+    sales: List[SaleList]
+    next_cursor: Optional[str] = None
+
+# Product Sales Stats Models
+class ProductSalesStatsBase(BaseModel):
+    units_sold: int
+    sales_count: int = Field(..., description="Número de líneas de venta")
+    revenue: Decimal
+    discounts_amount: Decimal
+    last_sale: Optional[datetime] = None
+
+class ProductSalesStats(ProductSalesStatsBase):
+    product_id: int
+    name: str
+    product_type: str
+
+class ProductTypeSalesStats(ProductSalesStatsBase):
+    product_type: str
+    products_sold: int
+
+# Bulk Import Models
+class BulkImportError(BaseModel):
+    row: int = Field(..., description="Número de fila en el archivo (sin contar el encabezado CSV)")
+    error: str
+
+class BulkImportResult(BaseModel):
+    received: int
+    created: int
+    updated: int
+    failed: int
+    errors: List[BulkImportError]
+
+# Batch Lookup Models
+class BatchIdsRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, description="IDs a consultar (los repetidos se consultan una vez)")
+
+class BatchLookupBase(BaseModel):
+    missing: List[int] = Field(..., description="IDs pedidos que no existen o están eliminados")
+
+class CustomerBatch(BatchLookupBase):
+    items: List[Customer]
+
+class ProductBatch(BatchLookupBase):
+    items: List[Product]
+
+class SaleBatch(BatchLookupBase):
+    items: List[SaleList]
+
+# Repricing Models
+class RepricingRequest(BaseModel):
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    # Porcentajes propuestos por nombre de tipo de producto, de método de pago y por días de crédito
+    product_type_discounts: Dict[str, Decimal] = {}
+    payment_method_discounts: Dict[str, Decimal] = {}
+    credit_terms_discounts: Dict[int, Decimal] = {}
+
+class RepricingTotals(BaseModel):
+    lines: int
+    stored_total: Decimal
+    repriced_total: Decimal
+    delta: Decimal
+
+class RepricingDay(RepricingTotals):
+    day: date
+
+class RepricingProductType(RepricingTotals):
+    product_type: str
+
+class RepricingReport(RepricingTotals):
+    start_date: datetime
+    end_date: datetime
+    partitions: int
+    workers: int
+    elapsed_ms: float
+    by_day: List[RepricingDay]
+    by_product_type: List[RepricingProductType]
+
+class RepricingJob(BaseModel):
+    job_id: str
+    status: str
+    partitions_total: int
+    partitions_done: int
+    error: Optional[str] = None
+    report: Optional[RepricingReport] = None
+
+# Event Models
+class Event(BaseModel):
+    event_id: int
+    event_type: str
+    aggregate_id: int
+    created_at: datetime
+    payload: Dict[str, Any]
+
+class EventPage(BaseModel):
+    events: List[Event]
+    next_cursor: int
+
 # Configuración global para todos los modelos
-for model in [CustomerBase, ProductBase, ProductDiscountCreate, PaymentDiscountCreate, SaleItem, SaleCreate, SaleItemBreakdown, SaleBreakdown, Sale, SaleList]:
+for model in [CustomerBase, ProductBase, ProductDiscountCreate, PaymentDiscountCreate, SaleItem, SaleCreate, SaleItemBreakdown, SaleBreakdown, Sale, SaleList, CustomerSalesSummary, CustomerSalesPage, ProductSalesStatsBase, ProductSalesStats, ProductTypeSalesStats, BulkImportError, BulkImportResult, BatchIdsRequest, BatchLookupBase, CustomerBatch, ProductBatch, SaleBatch, RepricingRequest, RepricingTotals, RepricingDay, RepricingProductType, RepricingReport, RepricingJob, Event, EventPage]:
     model.model_config = ConfigDict(
         json_encoders={Decimal: str},
         arbitrary_types_allowed=True
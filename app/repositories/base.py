@@ -1,7 +1,9 @@
-from typing import Generic, TypeVar, Type, Optional, List, Any, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from typing import Generic, TypeVar, Type, Optional, List, Any, Dict, Iterator, Sequence
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, select, update
+from app.config.settings import settings
 from app.database.connection import Base
+from app.database.dialects import insert_ignore
 
 ModelType = TypeVar("ModelType", bound=Base)
 
@@ -29,6 +31,68 @@ class BaseRepository(Generic[ModelType]):
             getattr(self.model, 'deleted_at').is_(None)
         ).offset(skip).limit(limit).all()
     
+    def iter_all(
+        self,
+        db: Session,
+        batch_size: Optional[int] = None,
+        as_rows: bool = False
+    ) -> Iterator[Any]:
+        """Recorrer todos los registros (sin soft-deleted) uno por uno con un cursor del servidor"""
+        for batch in self.iter_batches(db, batch_size=batch_size, as_rows=as_rows):
+            yield from batch
+    
+    def iter_batches(
+        self,
+        db: Session,
+        batch_size: Optional[int] = None,
+        as_rows: bool = False,
+        **filters: Any
+    ) -> Iterator[List[Any]]:
+        """
+        Recorrer los registros (sin soft-deleted) en lotes de `batch_size`
+        
+        Los filtros se pasan como columna=valor. Con `as_rows=True` se
+        devuelven filas Core (tuplas con nombre) en lugar de objetos ORM.
+        """
+        conditions = [getattr(self.model, 'deleted_at').is_(None)]
+        for field, value in filters.items():
+            conditions.append(getattr(self.model, field) == value)
+        
+        entity = self.model.__table__.columns if as_rows else [self.model]
+        statement = select(*entity).where(and_(*conditions)).order_by(
+            getattr(self.model, self._get_id_field())
+        )
+        return self._iter_partitions(db, statement, batch_size, scalars=not as_rows)
+    
+    def _iter_partitions(
+        self,
+        db: Session,
+        statement,
+        batch_size: Optional[int] = None,
+        scalars: bool = False
+    ) -> Iterator[List[Any]]:
+        """
+        Ejecutar una consulta con cursor del servidor y entregar el resultado por lotes
+        
+        Con pymysql `stream_results` usa un SSCursor (sin buffer), así que en
+        memoria solo vive el lote actual. Mientras el iterador esté abierto la
+        conexión de la sesión queda ocupada: no se deben lanzar otras consultas
+        con la misma sesión hasta consumirlo o cerrarlo.
+        """
+        batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        result = db.execute(statement.execution_options(
+            stream_results=True,
+            max_row_buffer=batch_size,
+            yield_per=batch_size
+        ))
+        if scalars:
+            result = result.scalars()
+        try:
+            for batch in result.partitions(batch_size):
+                yield batch
+        finally:
+            result.close()
+    
     def create(self, db: Session, obj_in: Dict[str, Any]) -> ModelType:
         """Crear un nuevo registro"""
         db_obj = self.model(**obj_in)
@@ -37,6 +101,84 @@ class BaseRepository(Generic[ModelType]):
         db.refresh(db_obj)
         return db_obj
     
+    def bulk_create(
+        self,
+        db: Session,
+        rows: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        ignore_conflicts: bool = False
+    ) -> int:
+        """
+        Insertar muchos registros por bloques con executemany (INSERT multi-fila
+        en pymysql, sentencia preparada reutilizada en SQLite), sin construir
+        objetos ORM, y confirmar al final
+        
+        Con `ignore_conflicts` las filas que chocan con una llave primaria o única
+        existente se omiten en la misma sentencia (ver `insert_ignore`).
+        """
+        chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+        table = self.model.__table__
+        statement = insert_ignore(db, table) if ignore_conflicts else table.insert()
+        for start in range(0, len(rows), chunk_size):
+            db.execute(statement, rows[start:start + chunk_size])
+        db.commit()
+        return len(rows)
+    
+    def bulk_update(self, db: Session, rows: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> int:
+        """Actualizar muchos registros por bloques; cada fila debe traer su ID"""
+        chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            db.execute(update(self.model), rows[start:start + chunk_size])
+        db.commit()
+        return len(rows)
+    
+    def get_ids_by(self, db: Session, field: str, values: List[Any], chunk_size: Optional[int] = None) -> Dict[Any, int]:
+        """Mapear valores de un campo a su ID (el menor si el valor se repite) con consultas IN por bloques"""
+        chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+        column = getattr(self.model, field)
+        id_column = getattr(self.model, self._get_id_field())
+        unique_values = list(dict.fromkeys(values))
+        ids: Dict[Any, int] = {}
+        for start in range(0, len(unique_values), chunk_size):
+            rows = db.query(column, id_column).filter(
+                and_(
+                    getattr(self.model, 'deleted_at').is_(None),
+                    column.in_(unique_values[start:start + chunk_size])
+                )
+            ).order_by(id_column).all()
+            for value, id in rows:
+                ids.setdefault(value, id)
+        return ids
+    
+    def get_by_ids(
+        self,
+        db: Session,
+        ids: List[Any],
+        load: Sequence[str] = (),
+        chunk_size: Optional[int] = None
+    ) -> Dict[Any, ModelType]:
+        """
+        Obtener varios registros (sin soft-deleted) por ID con una consulta IN
+        
+        Devuelve {ID: registro} solo con los que existen; los IDs repetidos se
+        consultan una vez. `load` son relaciones muchos-a-uno que se traen en la
+        misma consulta (JOIN) para no cargarlas una por una. Las listas más
+        largas que `chunk_size` se parten en varias consultas.
+        """
+        chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+        id_column = getattr(self.model, self._get_id_field())
+        options = [joinedload(getattr(self.model, relationship)) for relationship in load]
+        unique_ids = list(dict.fromkeys(ids))
+        rows: Dict[Any, ModelType] = {}
+        for start in range(0, len(unique_ids), chunk_size):
+            statement = select(self.model).options(*options).where(
+                getattr(self.model, 'deleted_at').is_(None),
+                id_column.in_(unique_ids[start:start + chunk_size])
+            )
+            for row in db.execute(statement).scalars():
+                rows[getattr(row, id_column.key)] = row
+        return rows
+    
     def update(self, db: Session, db_obj: ModelType, obj_in: Dict[str, Any]) -> ModelType:
         """Actualizar un registro existente"""
         for field, value in obj_in.items():
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Iterator, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.database.models import Customer, CustomerType, CreditTerms
@@ -28,6 +28,17 @@ class CustomerRepository(BaseRepository[Customer]):
             )
         ).all()
     
+    def iter_by_type(
+        self,
+        db: Session,
+        customer_type_id: int,
+        batch_size: Optional[int] = None,
+        as_rows: bool = False
+    ) -> Iterator[Any]:
+        """Recorrer los clientes de un tipo sin cargarlos todos en memoria"""
+        for batch in self.iter_batches(db, batch_size=batch_size, as_rows=as_rows, customer_type_id=customer_type_id):
+            yield from batch
+    
     def get_with_relations(self, db: Session, customer_id: int) -> Optional[Customer]:
         """Obtener cliente con sus relaciones (tipo y términos de crédito)"""
         return db.query(Customer).filter(
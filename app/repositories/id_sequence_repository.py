@@ -0,0 +1,34 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from app.database.dialects import insert_ignore
+from app.database.models import IdSequence
+
+class IdSequenceRepository:
+    """Repositorio para las secuencias de IDs asignadas por bloques"""
+    
+    def reserve_block(self, db: Session, id_column, size: int) -> int:
+        """
+        Reservar un bloque de `size` IDs consecutivos para la columna indicada
+        y devolver el primero del bloque.
+        
+        El UPDATE que avanza la secuencia se ejecuta antes de leerla: toma el
+        bloqueo de fila en MySQL y el de escritura en SQLite (donde SELECT ...
+        FOR UPDATE no existe), así dos procesos nunca reciben el mismo rango. Si
+        la secuencia aún no existe se inicializa a partir del máximo ID actual
+        de la tabla; una inicialización concurrente se omite sin error.
+        """
+        name = id_column.property.columns[0].table.name
+        advance = update(IdSequence).where(
+            IdSequence.name == name
+        ).values(next_value=IdSequence.next_value + size)
+        
+        if db.execute(advance).rowcount == 0:
+            max_id = db.query(func.max(id_column)).scalar() or 0
+            db.execute(insert_ignore(db, IdSequence.__table__), {"name": name, "next_value": max_id + 1})
+            db.execute(advance)
+        
+        next_value = db.execute(
+            select(IdSequence.next_value).where(IdSequence.name == name)
+        ).scalar_one()
+        db.commit()
+        return next_value - size
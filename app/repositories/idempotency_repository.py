@@ -0,0 +1,44 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.database.models import IdempotencyKey
+
+class IdempotencyRepository:
+    """Repositorio para las llaves de idempotencia"""
+    
+    def get_by_key(self, db: Session, key: str) -> Optional[IdempotencyKey]:
+        """Obtener el registro de una llave de idempotencia"""
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.idempotency_key == key
+        ).first()
+    
+    def claim(self, db: Session, key: str, request_hash: str) -> bool:
+        """
+        Reservar una llave para la solicitud en curso
+        
+        Devuelve False si otra solicitud (de este u otro proceso) ya la reservó;
+        el índice único sobre la llave es el que resuelve la carrera.
+        """
+        db.add(IdempotencyKey(idempotency_key=key, request_hash=request_hash))
+        try:
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+    
+    def complete(self, db: Session, key: str, status_code: int, response_body: bytes) -> None:
+        """Guardar la respuesta final de una llave reservada"""
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.idempotency_key == key
+        ).update({"status_code": status_code, "response_body": response_body})
+        db.commit()
+    
+    def release(self, db: Session, key: str) -> None:
+        """Liberar una llave cuya solicitud falló para que se pueda reintentar"""
+        db.rollback()
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.idempotency_key == key,
+            IdempotencyKey.status_code.is_(None)
+        ).delete()
+        db.commit()
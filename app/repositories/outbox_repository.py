@@ -0,0 +1,108 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from app.database.models import OutboxEvent
+
+# Tipos de evento
+EVENT_SALE_CREATED = "sale.created"
+EVENT_SALE_DELETED = "sale.deleted"
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable en un evento: {type(value).__name__}")
+
+def sale_created_rows(sale_rows: List[Dict[str, Any]], item_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filas de outbox `sale.created` (venta con sus items) para las ventas que se van a insertar"""
+    items_by_sale: Dict[int, List[Dict[str, Any]]] = {}
+    for item in item_rows:
+        items_by_sale.setdefault(item["sale_id"], []).append({
+            "product_id": item["product_id"],
+            "quantity": item["quantity"],
+            "list_price": item["list_price"],
+            "line_subtotal_after_discounts": item["line_subtotal_after_discounts"]
+        })
+    rows = []
+    for sale in sale_rows:
+        payload = {
+            "sale_id": sale["sale_id"],
+            "customer_id": sale["customer_id"],
+            "payment_method_id": sale["payment_method_id"],
+            "subtotal": sale["subtotal"],
+            "tax": sale["tax"],
+            "total": sale["total"],
+            "total_discounts_amount": sale["total_discounts_amount"],
+            "sale_datetime": sale.get("sale_datetime"),
+            "items": items_by_sale.get(sale["sale_id"], [])
+        }
+        rows.append(event_row(EVENT_SALE_CREATED, sale["sale_id"], payload))
+    return rows
+
+def event_row(event_type: str, aggregate_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Fila de outbox con el payload serializado a JSON (montos como texto)"""
+    return {
+        "event_type": event_type,
+        "aggregate_id": aggregate_id,
+        "payload": json.dumps(payload, default=_json_default, separators=(",", ":"))
+    }
+
+class OutboxRepository:
+    """
+    Repositorio para los eventos del outbox
+    
+    Los eventos se agregan dentro de la transacción de quien escribe (sin
+    commit propio) y se leen en orden de `event_id`.
+    """
+    
+    def append(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        """Agregar eventos a la transacción en curso (los confirma el commit de quien llama)"""
+        if rows:
+            db.execute(OutboxEvent.__table__.insert(), rows)
+    
+    def get_after(self, db: Session, after: int, limit: int, until: Optional[int] = None) -> List[Any]:
+        """Eventos con event_id en (after, until] en orden de ID, como filas Core"""
+        statement = select(*OutboxEvent.__table__.columns).where(OutboxEvent.event_id > after)
+        if until is not None:
+            statement = statement.where(OutboxEvent.event_id <= until)
+        return db.execute(statement.order_by(OutboxEvent.event_id).limit(limit)).all()
+    
+    def reappend(self, db: Session, event_ids: List[int]) -> List[int]:
+        """
+        Mover al final (con un ID nuevo) los eventos de `event_ids` que existan
+        
+        Es para eventos cuya transacción hizo commit después de que el relay
+        diera su ID por descartado: con el ID nuevo también los reciben los
+        cursores que ya pasaron el original. Cada evento se borra y se copia en
+        la misma transacción; si varios workers lo intentan a la vez, el borrado
+        solo afecta una fila en uno de ellos, así que se mueve una sola vez.
+        Devuelve los IDs originales que se movieron.
+        """
+        columns = OutboxEvent.__table__.columns
+        rows = db.execute(select(*columns).where(OutboxEvent.event_id.in_(event_ids)).order_by(OutboxEvent.event_id)).all()
+        moved = []
+        for row in rows:
+            if db.execute(delete(OutboxEvent).where(OutboxEvent.event_id == row.event_id)).rowcount:
+                db.execute(OutboxEvent.__table__.insert(), {
+                    "event_type": row.event_type,
+                    "aggregate_id": row.aggregate_id,
+                    "payload": row.payload,
+                    "created_at": row.created_at
+                })
+                moved.append(row.event_id)
+        db.commit()
+        return moved
+    
+    def get_last_id(self, db: Session) -> int:
+        """ID del último evento (0 si no hay)"""
+        return db.execute(select(func.coalesce(func.max(OutboxEvent.event_id), 0))).scalar()
+    
+    def purge_before(self, db: Session, created_before: datetime) -> int:
+        """Borrar los eventos anteriores a una fecha y devolver cuántos se borraron"""
+        result = db.execute(delete(OutboxEvent).where(OutboxEvent.created_at < created_before))
+        db.commit()
+        return result.rowcount
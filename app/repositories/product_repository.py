@@ -1,9 +1,16 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import re
+from decimal import Decimal
+from typing import Any, Iterator, List, Optional
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.dialects.mysql import match
+from app.database.dialects import dialect_name
 from app.database.models import Product, ProductType
 from app.repositories.base import BaseRepository
 
+# Palabras de una búsqueda (sin operadores de FULLTEXT ni comodines de LIKE)
+SEARCH_TOKEN = re.compile(r"[^\W_]+")
+
 class ProductRepository(BaseRepository[Product]):
     """Repositorio para operaciones con productos"""
     
@@ -28,6 +35,17 @@ class ProductRepository(BaseRepository[Product]):
             )
         ).all()
     
+    def iter_by_type(
+        self,
+        db: Session,
+        product_type_id: int,
+        batch_size: Optional[int] = None,
+        as_rows: bool = False
+    ) -> Iterator[Any]:
+        """Recorrer los productos de un tipo sin cargarlos todos en memoria"""
+        for batch in self.iter_batches(db, batch_size=batch_size, as_rows=as_rows, product_type_id=product_type_id):
+            yield from batch
+    
     def get_with_relations(self, db: Session, product_id: int) -> Optional[Product]:
         """Obtener producto con sus relaciones (tipo)"""
         return db.query(Product).filter(
@@ -36,6 +54,51 @@ class ProductRepository(BaseRepository[Product]):
                 Product.product_id == product_id
             )
         ).first()
+    
+    def search(
+        self,
+        db: Session,
+        q: str,
+        product_type_id: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        limit: int = 10
+    ) -> List[Product]:
+        """
+        Buscar productos cuyo nombre contiene todas las palabras de `q` como prefijo
+        
+        En MySQL usa el índice FULLTEXT (modo booleano, `+palabra*`) y ordena por
+        relevancia; en otros motores filtra con LIKE (`palabra%` o `% palabra%`,
+        inicio de una palabra del nombre, como el índice en memoria) y pone
+        primero los nombres que empiezan con la primera palabra. Desempata el
+        nombre más corto.
+        """
+        tokens = SEARCH_TOKEN.findall(q.lower())
+        if not tokens:
+            return []
+        
+        conditions = [Product.deleted_at.is_(None)]
+        if product_type_id is not None:
+            conditions.append(Product.product_type_id == product_type_id)
+        if min_price is not None:
+            conditions.append(Product.list_price >= min_price)
+        if max_price is not None:
+            conditions.append(Product.list_price <= max_price)
+        
+        if dialect_name(db) == "mysql":
+            relevance = match(Product.name, against=" ".join(f"+{token}*" for token in tokens)).in_boolean_mode()
+            conditions.append(relevance)
+            order = [relevance.desc()]
+        else:
+            conditions.extend(
+                or_(Product.name.ilike(f"{token}%"), Product.name.ilike(f"% {token}%"))
+                for token in tokens
+            )
+            order = [case((Product.name.ilike(f"{tokens[0]}%"), 0), else_=1)]
+        
+        return db.query(Product).options(joinedload(Product.product_type_ref)).filter(
+            and_(*conditions)
+        ).order_by(*order, func.length(Product.name), Product.product_id).limit(limit).all()
 
 class ProductTypeRepository(BaseRepository[ProductType]):
     """Repositorio para tipos de producto"""
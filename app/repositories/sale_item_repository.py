@@ -1,7 +1,9 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Iterator
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.database.models import SaleItem
+from sqlalchemy import and_, func, cast, select
+from sqlalchemy.types import DECIMAL
+from app.database.models import Customer, SaleItem, Sale, Product, ProductType
 from app.repositories.base import BaseRepository
 
 class SaleItemRepository(BaseRepository[SaleItem]):
@@ -27,3 +29,190 @@ class SaleItemRepository(BaseRepository[SaleItem]):
                 SaleItem.product_id == product_id
             )
         ).all()
+    
+    def iter_with_sales(
+        self,
+        db: Session,
+        columns: List[Any],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[List[Any]]:
+        """Recorrer items unidos a su venta como filas Core, por lotes y con cursor del servidor"""
+        conditions = [Sale.deleted_at.is_(None), SaleItem.deleted_at.is_(None)]
+        if start_date is not None:
+            conditions.append(Sale.sale_datetime >= start_date)
+        if end_date is not None:
+            conditions.append(Sale.sale_datetime <= end_date)
+        
+        statement = select(*columns).select_from(Sale).join(
+            SaleItem, SaleItem.sale_id == Sale.sale_id
+        ).where(and_(*conditions))
+        return self._iter_partitions(db, statement, batch_size)
+    
+    def iter_repricing_rows(
+        self,
+        db: Session,
+        start: datetime,
+        end: datetime,
+        batch_size: Optional[int] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Recorrer los items vendidos en [start, end) con lo necesario para recalcularlos
+        
+        Cada fila es (sale_datetime, payment_method_id, credit_terms_id,
+        product_type_id, list_price, quantity, line_subtotal_after_discounts).
+        """
+        statement = select(
+            Sale.sale_datetime,
+            Sale.payment_method_id,
+            Customer.credit_terms_id,
+            Product.product_type_id,
+            SaleItem.list_price,
+            SaleItem.quantity,
+            SaleItem.line_subtotal_after_discounts
+        ).select_from(Sale).join(
+            SaleItem, SaleItem.sale_id == Sale.sale_id
+        ).join(
+            Customer, Customer.customer_id == Sale.customer_id
+        ).join(
+            Product, Product.product_id == SaleItem.product_id
+        ).where(and_(
+            Sale.deleted_at.is_(None),
+            SaleItem.deleted_at.is_(None),
+            Sale.sale_datetime >= start,
+            Sale.sale_datetime < end
+        ))
+        return self._iter_partitions(db, statement, batch_size)
+    
+    def get_product_stats(
+        self,
+        db: Session,
+        product_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Obtener unidades vendidas, ingresos y descuentos de un producto (agregado en SQL)"""
+        units_sold, sales_count, revenue, discounts_amount, last_sale = self._stats_query(
+            db, start_date, end_date
+        ).filter(
+            SaleItem.product_id == product_id
+        ).one()
+        return {
+            "units_sold": units_sold,
+            "sales_count": sales_count,
+            "revenue": revenue,
+            "discounts_amount": discounts_amount,
+            "last_sale": last_sale
+        }
+    
+    def get_top_products(
+        self,
+        db: Session,
+        limit: int = 10,
+        order_by: str = "revenue",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        product_type_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Obtener los productos más vendidos por ingresos o por unidades"""
+        query = self._stats_query(db, start_date, end_date).add_columns(
+            SaleItem.product_id,
+            Product.name,
+            ProductType.name.label("product_type")
+        ).join(
+            Product, Product.product_id == SaleItem.product_id
+        ).join(
+            ProductType, ProductType.product_type_id == Product.product_type_id
+        )
+        if product_type_id is not None:
+            query = query.filter(Product.product_type_id == product_type_id)
+        
+        sort_column = func.sum(SaleItem.quantity) if order_by == "units" else func.sum(SaleItem.line_subtotal_after_discounts)
+        rows = query.group_by(
+            SaleItem.product_id, Product.name, ProductType.name
+        ).order_by(
+            sort_column.desc(), SaleItem.product_id
+        ).limit(limit).all()
+        
+        return [
+            {
+                "product_id": row.product_id,
+                "name": row.name,
+                "product_type": row.product_type,
+                "units_sold": row.units_sold,
+                "sales_count": row.sales_count,
+                "revenue": row.revenue,
+                "discounts_amount": row.discounts_amount,
+                "last_sale": row.last_sale
+            }
+            for row in rows
+        ]
+    
+    def get_product_type_rollup(
+        self,
+        db: Session,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Obtener ventas agrupadas por tipo de producto"""
+        rows = self._stats_query(db, start_date, end_date).add_columns(
+            ProductType.name.label("product_type"),
+            func.count(func.distinct(SaleItem.product_id)).label("products_sold")
+        ).join(
+            Product, Product.product_id == SaleItem.product_id
+        ).join(
+            ProductType, ProductType.product_type_id == Product.product_type_id
+        ).group_by(
+            ProductType.product_type_id, ProductType.name
+        ).order_by(
+            func.sum(SaleItem.line_subtotal_after_discounts).desc()
+        ).all()
+        
+        return [
+            {
+                "product_type": row.product_type,
+                "products_sold": row.products_sold,
+                "units_sold": row.units_sold,
+                "sales_count": row.sales_count,
+                "revenue": row.revenue,
+                "discounts_amount": row.discounts_amount,
+                "last_sale": row.last_sale
+            }
+            for row in rows
+        ]
+    
+    def _stats_query(self, db: Session, start_date: Optional[datetime], end_date: Optional[datetime]):
+        """Consulta base de agregados de items (sin soft-deleted), filtrable por fecha de venta"""
+        query = db.query(
+            func.coalesce(func.sum(SaleItem.quantity), 0).label("units_sold"),
+            func.count(SaleItem.sale_item_id).label("sales_count"),
+            cast(
+                func.coalesce(func.sum(SaleItem.line_subtotal_after_discounts), 0),
+                DECIMAL(14, 2)
+            ).label("revenue"),
+            cast(
+                func.coalesce(
+                    func.sum(
+                        SaleItem.product_type_discount
+                        + SaleItem.payment_method_discount
+                        + SaleItem.credit_terms_discount
+                    ),
+                    0
+                ),
+                DECIMAL(14, 2)
+            ).label("discounts_amount"),
+            func.max(Sale.sale_datetime).label("last_sale")
+        ).select_from(SaleItem).join(
+            Sale, Sale.sale_id == SaleItem.sale_id
+        ).filter(
+            and_(
+                SaleItem.deleted_at.is_(None),
+                Sale.deleted_at.is_(None)
+            )
+        )
+        if start_date is not None:
+            query = query.filter(Sale.sale_datetime >= start_date)
+        if end_date is not None:
+            query = query.filter(Sale.sale_datetime <= end_date)
+        return query
@@ -1,14 +1,21 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.database.models import Sale, SaleItem
+from sqlalchemy import and_, or_, func, select
+from app.database.models import Sale, SaleItem, PaymentMethod
 from app.repositories.base import BaseRepository
+from app.repositories.outbox_repository import (
+    EVENT_SALE_DELETED, OutboxRepository, event_row, sale_created_rows
+)
+# SaleItemRepository vive en sale_item_repository; se reexporta por compatibilidad
+from app.repositories.sale_item_repository import SaleItemRepository
 
 class SaleRepository(BaseRepository[Sale]):
     """Repositorio para operaciones con ventas"""
     
     def __init__(self):
         super().__init__(Sale)
+        self.outbox_repo = OutboxRepository()
     
     def get_by_customer(self, db: Session, customer_id: int) -> List[Sale]:
         """Obtener ventas por cliente"""
@@ -19,6 +26,62 @@ class SaleRepository(BaseRepository[Sale]):
             )
         ).all()
     
+    def get_page_by_customer(
+        self,
+        db: Session,
+        customer_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None
+    ) -> List[Tuple[Sale, str]]:
+        """
+        Obtener una página del historial de un cliente, de la venta más reciente
+        a la más antigua, junto con el nombre del método de pago
+        
+        Paginación por keyset sobre idx_sale_customer_datetime: `before` es la
+        pareja (sale_datetime, sale_id) de la última venta de la página anterior.
+        """
+        query = db.query(Sale, PaymentMethod.name).join(
+            PaymentMethod, PaymentMethod.payment_method_id == Sale.payment_method_id
+        ).filter(
+            and_(
+                Sale.deleted_at.is_(None),
+                Sale.customer_id == customer_id
+            )
+        )
+        if before is not None:
+            before_datetime, before_sale_id = before
+            query = query.filter(
+                or_(
+                    Sale.sale_datetime < before_datetime,
+                    and_(
+                        Sale.sale_datetime == before_datetime,
+                        Sale.sale_id < before_sale_id
+                    )
+                )
+            )
+        return query.order_by(
+            Sale.sale_datetime.desc(),
+            Sale.sale_id.desc()
+        ).limit(limit).all()
+    
+    def get_customer_summary(self, db: Session, customer_id: int) -> Dict[str, Any]:
+        """Obtener número de ventas, total acumulado y última compra de un cliente (agregado en SQL)"""
+        sales_count, lifetime_total, last_purchase = db.query(
+            func.count(Sale.sale_id),
+            func.coalesce(func.sum(Sale.total), 0),
+            func.max(Sale.sale_datetime)
+        ).filter(
+            and_(
+                Sale.deleted_at.is_(None),
+                Sale.customer_id == customer_id
+            )
+        ).one()
+        return {
+            "sales_count": sales_count,
+            "lifetime_total": lifetime_total,
+            "last_purchase": last_purchase
+        }
+    
     def get_by_date_range(self, db: Session, start_date, end_date) -> List[Sale]:
         """Obtener ventas por rango de fechas"""
         return db.query(Sale).filter(
@@ -38,6 +101,73 @@ class SaleRepository(BaseRepository[Sale]):
             )
         ).first()
     
+    def get_breakdown_rows(self, db: Session, sale_id: int) -> List[Any]:
+        """
+        Venta (sin soft-deleted) con el nombre de su método de pago y sus items
+        en una sola consulta: una fila por item, en el orden en que se guardaron
+        
+        Cada fila tiene los montos de la venta (sale_id, customer_id,
+        tax_rate_percent, subtotal, tax, total, total_discounts_amount),
+        payment_method y los del item. Lista vacía si la venta no existe.
+        """
+        statement = select(
+            Sale.sale_id,
+            Sale.customer_id,
+            Sale.tax_rate_percent,
+            Sale.subtotal,
+            Sale.tax,
+            Sale.total,
+            Sale.total_discounts_amount,
+            PaymentMethod.name.label("payment_method"),
+            SaleItem.product_id,
+            SaleItem.quantity,
+            SaleItem.list_price,
+            SaleItem.product_type_discount,
+            SaleItem.payment_method_discount,
+            SaleItem.credit_terms_discount,
+            SaleItem.line_subtotal_after_discounts
+        ).select_from(Sale).join(
+            PaymentMethod, PaymentMethod.payment_method_id == Sale.payment_method_id
+        ).outerjoin(
+            SaleItem, and_(SaleItem.sale_id == Sale.sale_id, SaleItem.deleted_at.is_(None))
+        ).where(
+            Sale.deleted_at.is_(None),
+            Sale.sale_id == sale_id
+        ).order_by(SaleItem.sale_item_id)
+        return db.execute(statement).all()
+    
+    def insert_sales(self, db: Session, sale_rows: List[Dict[str, Any]], item_rows: List[Dict[str, Any]]) -> None:
+        """
+        Insertar ventas y sus items con IDs ya asignados
+
+        Se emite un INSERT multi-fila por tabla y un único commit, sin flush ni
+        refresh intermedios. El evento `sale.created` de cada venta se escribe
+        en el outbox dentro de la misma transacción.
+        """
+        if sale_rows:
+            db.execute(Sale.__table__.insert(), sale_rows)
+        if item_rows:
+            db.execute(SaleItem.__table__.insert(), item_rows)
+        self.outbox_repo.append(db, sale_created_rows(sale_rows, item_rows))
+        db.commit()
+    
+    def soft_delete(self, db: Session, id: Any) -> bool:
+        """Soft delete de una venta, con su evento `sale.deleted` en la misma transacción"""
+        db_obj = self.get(db, id)
+        if not db_obj:
+            return False
+        db_obj.deleted_at = datetime.now()
+        self.outbox_repo.append(db, [event_row(EVENT_SALE_DELETED, id, {"sale_id": id})])
+        db.commit()
+        return True
+    
+    def get_existing_ids(self, db: Session, sale_ids: List[int]) -> List[int]:
+        """Obtener cuáles de los IDs indicados ya existen en la tabla de ventas"""
+        if not sale_ids:
+            return []
+        rows = db.query(Sale.sale_id).filter(Sale.sale_id.in_(sale_ids)).all()
+        return [row.sale_id for row in rows]
+    
     def get_total_sales(self, db: Session) -> float:
         """Obtener total de ventas"""
         result = db.query(Sale).filter(
@@ -46,27 +176,3 @@ class SaleRepository(BaseRepository[Sale]):
             db.func.sum(Sale.total)
         ).scalar()
         return float(result) if result else 0.0
-
-class SaleItemRepository(BaseRepository[SaleItem]):
-    """Repositorio para items de venta"""
-    
-    def __init__(self):
-        super().__init__(SaleItem)
-    
-    def get_by_sale(self, db: Session, sale_id: int) -> List[SaleItem]:
-        """Obtener items por venta"""
-        return db.query(SaleItem).filter(
-            and_(
-                SaleItem.deleted_at.is_(None),
-                SaleItem.sale_id == sale_id
-            )
-        ).all()
-    
-    def get_by_product(self, db: Session, product_id: int) -> List[SaleItem]:
-        """Obtener items por producto"""
-        return db.query(SaleItem).filter(
-            and_(
-                SaleItem.deleted_at.is_(None),
-                SaleItem.product_id == product_id
-            )
-        ).all()
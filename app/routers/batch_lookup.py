@@ -0,0 +1,42 @@
+from typing import Any, Callable, Dict, List
+from fastapi import HTTPException, status
+from app.config.settings import settings
+
+def parse_ids(raw: str) -> List[int]:
+    """IDs de un parámetro `ids=1,2,3` (400 si alguno no es entero)"""
+    try:
+        return [int(value) for value in raw.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El parámetro ids debe ser una lista de enteros separados por coma"
+        )
+
+def lookup(
+    ids: List[int],
+    fetch: Callable[[List[int]], Dict[int, Any]],
+    convert: Callable[[Any], Any]
+) -> Dict[str, List[Any]]:
+    """
+    Resolver una consulta por lote: `fetch` trae {ID: registro} en una sola
+    consulta y `convert` arma el modelo de respuesta
+    
+    Los encontrados se devuelven en el orden pedido (sin repetidos) y los demás
+    en `missing`.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if not unique_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Se requiere al menos un ID"
+        )
+    if len(unique_ids) > settings.BATCH_LOOKUP_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {settings.BATCH_LOOKUP_MAX_IDS} IDs por consulta"
+        )
+    rows = fetch(unique_ids)
+    return {
+        "items": [convert(rows[id]) for id in unique_ids if id in rows],
+        "missing": [id for id in unique_ids if id not in rows]
+    }
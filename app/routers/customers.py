@@ -1,15 +1,23 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import base64
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from typing import List, Optional, Tuple, Union
 from sqlalchemy.orm import Session
-from app.models import Customer, CustomerCreate
+from app.models import BatchIdsRequest, BulkImportResult, Customer, CustomerBatch, CustomerCreate, CustomerSalesPage, CustomerSalesSummary, SaleList
 from app.database.connection import get_db
 from app.repositories.customer_repository import CustomerRepository
 from app.repositories.customer_type_repository import CustomerTypeRepository
 from app.repositories.credit_terms_repository import CreditTermsRepository
+from app.repositories.sale_repository import SaleRepository
+from app.services.catalog_import_service import catalog_import_service, UnsupportedImportFormat
+from app.storage import get_repository
+from app.routers.negotiation import NegotiatedRoute
+from app.routers.batch_lookup import lookup, parse_ids
 
 router = APIRouter(
     prefix="/customers",
-    tags=["customers"]
+    tags=["customers"],
+    route_class=NegotiatedRoute
 )
 
 @router.post("/", response_model=Customer, status_code=status.HTTP_201_CREATED)
@@ -21,10 +29,10 @@ async def create_customer(
     Crear un nuevo cliente
     """
     try:
-        customer_repo = CustomerRepository()
+        customer_repo = get_repository(CustomerRepository)
         
         # Verificar que el tipo de cliente existe
-        customer_type_repo = CustomerTypeRepository()
+        customer_type_repo = get_repository(CustomerTypeRepository)
         customer_type = customer_type_repo.get_by_name(db, customer.customer_type)
         if not customer_type:
             raise HTTPException(
@@ -33,7 +41,7 @@ async def create_customer(
             )
         
         # Verificar que los términos de crédito existen
-        credit_terms_repo = CreditTermsRepository()
+        credit_terms_repo = get_repository(CreditTermsRepository)
         credit_terms = credit_terms_repo.get_by_days(db, customer.credit_terms_days)
         if not credit_terms:
             raise HTTPException(
@@ -66,30 +74,168 @@ async def create_customer(
             detail=f"Error al crear el cliente: {str(e)}"
         )
 
-@router.get("/", response_model=List[Customer])
-async def get_customers(db: Session = Depends(get_db)):
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_customers(
+    request: Request,
+    upsert: bool = Query(False, description="Actualizar los registros cuyo nombre ya existe"),
+    db: Session = Depends(get_db)
+):
+    """
+    Carga masiva de clientes desde CSV (text/csv) o NDJSON (application/x-ndjson)
+    
+    Las filas inválidas no detienen la carga: se devuelven en `errors` con su número de fila.
+    """
+    try:
+        content = await request.body()
+        return catalog_import_service.import_customers(db, content, request.headers.get("content-type", ""), upsert)
+        
+    except UnsupportedImportFormat as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la carga masiva de clientes: {str(e)}"
+        )
+
+@router.get("/", response_model=Union[List[Customer], CustomerBatch])
+async def get_customers(
+    ids: Optional[str] = Query(None, description="IDs separados por coma: devuelve solo esos clientes y los que no existen"),
+    db: Session = Depends(get_db)
+):
     """
-    Obtener todos los clientes (oculta los soft-deleted)
+    Obtener todos los clientes (oculta los soft-deleted), o con `ids` solo los pedidos (una consulta IN)
     """
     try:
-        customer_repo = CustomerRepository()
+        if ids is not None:
+            return _get_customer_batch(db, parse_ids(ids))
+        
+        customer_repo = get_repository(CustomerRepository)
         db_customers = customer_repo.get_all(db)
         
         # Convertir a formato de respuesta de la API
-        customers = []
-        for db_customer in db_customers:
-            customer = Customer(
-                customer_id=db_customer.customer_id,
-                name=db_customer.name,
-                customer_type=db_customer.customer_type_ref.name,
-                credit_terms_days=db_customer.credit_terms_ref.days
+        return [_to_customer(db_customer) for db_customer in db_customers]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener los clientes: {str(e)}"
+        )
+
+@router.post("/batch", response_model=CustomerBatch)
+async def get_customers_batch(batch: BatchIdsRequest, db: Session = Depends(get_db)):
+    """
+    Obtener varios clientes por ID (variante POST de `GET /customers?ids=` para listas largas)
+    """
+    try:
+        return _get_customer_batch(db, batch.ids)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener los clientes: {str(e)}"
+        )
+
+def _get_customer_batch(db: Session, ids: List[int]) -> CustomerBatch:
+    customer_repo = get_repository(CustomerRepository)
+    return CustomerBatch(**lookup(
+        ids,
+        lambda unique_ids: customer_repo.get_by_ids(db, unique_ids, load=("customer_type_ref", "credit_terms_ref")),
+        _to_customer
+    ))
+
+def _to_customer(db_customer) -> Customer:
+    """Convertir el modelo de base de datos al formato de respuesta de la API"""
+    return Customer(
+        customer_id=db_customer.customer_id,
+        name=db_customer.name,
+        customer_type=db_customer.customer_type_ref.name,
+        credit_terms_days=db_customer.credit_terms_ref.days
+    )
+
+
+@router.get("/{customer_id}/sales", response_model=CustomerSalesPage)
+async def get_customer_sales(
+    customer_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor de la página anterior"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtener el historial de ventas de un cliente (más recientes primero)
+    
+    Paginación por cursor sobre (sale_datetime, sale_id). La primera página
+    incluye el resumen del cliente calculado con agregados SQL.
+    """
+    before = _decode_sales_cursor(cursor) if cursor else None
+    try:
+        customer_repo = get_repository(CustomerRepository)
+        if not customer_repo.exists(db, customer_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cliente no encontrado"
             )
-            customers.append(customer)
         
-        return customers
+        sale_repo = get_repository(SaleRepository)
+        rows = sale_repo.get_page_by_customer(db, customer_id, limit, before)
         
+        sales = [
+            SaleList(
+                sale_id=db_sale.sale_id,
+                customer_id=db_sale.customer_id,
+                payment_method=payment_method_name,
+                subtotal=db_sale.subtotal,
+                tax=db_sale.tax,
+                total=db_sale.total,
+                total_discounts_amount=db_sale.total_discounts_amount,
+                sale_datetime=db_sale.sale_datetime
+            )
+            for db_sale, payment_method_name in rows
+        ]
+        
+        next_cursor = None
+        if len(sales) == limit:
+            last = sales[-1]
+            next_cursor = _encode_sales_cursor(last.sale_datetime, last.sale_id)
+        
+        summary = None
+        if before is None:
+            summary = CustomerSalesSummary(**sale_repo.get_customer_summary(db, customer_id))
+        
+        return CustomerSalesPage(
+            customer_id=customer_id,
+            summary=summary,
+            sales=sales,
+            next_cursor=next_cursor
+        )
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener los clientes: {str(e)}"
+            detail=f"Error al obtener las ventas del cliente: {str(e)}"
+        )
+
+def _encode_sales_cursor(sale_datetime: datetime, sale_id: int) -> str:
+    """Cursor opaco con la posición (sale_datetime, sale_id) de la última venta"""
+    raw = f"{sale_datetime.isoformat()}|{sale_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def _decode_sales_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Leer un cursor generado por _encode_sales_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        sale_datetime, sale_id = raw.split("|")
+        return datetime.fromisoformat(sale_datetime), int(sale_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
         )
@@ -5,10 +5,14 @@ from app.database.connection import get_db
 from app.repositories.discount_repository import ProductTypeDiscountRepository, PaymentMethodDiscountRepository
 from app.repositories.product_type_repository import ProductTypeRepository
 from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.services.invalidation_bus import ACTION_CREATED, TOPIC_DISCOUNTS, invalidation_bus
+from app.storage import get_repository
+from app.routers.negotiation import NegotiatedRoute
 
 router = APIRouter(
     prefix="/discounts",
-    tags=["discounts"]
+    tags=["discounts"],
+    route_class=NegotiatedRoute
 )
 
 @router.post("/product", response_model=ProductDiscount, status_code=status.HTTP_201_CREATED)
@@ -18,10 +22,14 @@ async def create_product_discount(
 ):
     """
     Crear un descuento para un tipo de producto específico
+    
+    `valid_from` y `valid_to` (opcionales) limitan su vigencia a
+    [valid_from, valid_to); mientras está vigente reemplaza a los que
+    empezaron antes.
     """
     try:
         # Verificar que el tipo de producto existe
-        product_type_repo = ProductTypeRepository()
+        product_type_repo = get_repository(ProductTypeRepository)
         product_type = product_type_repo.get_by_name(db, discount.product_type)
         if not product_type:
             raise HTTPException(
@@ -30,18 +38,23 @@ async def create_product_discount(
             )
         
         # Crear el descuento
-        discount_repo = ProductTypeDiscountRepository()
+        discount_repo = get_repository(ProductTypeDiscountRepository)
         discount_data = {
             "product_type_id": product_type.product_type_id,
-            "discount_percent": discount.discount_percent
+            "discount_percent": discount.discount_percent,
+            "valid_from": discount.valid_from,
+            "valid_to": discount.valid_to
         }
         
         db_discount = discount_repo.create(db, discount_data)
+        invalidation_bus.publish(TOPIC_DISCOUNTS, ACTION_CREATED, db_discount.discount_id)
         
         # Retornar en el formato esperado por la API
         return ProductDiscount(
             product_type=product_type.name,
-            discount_percent=db_discount.discount_percent
+            discount_percent=db_discount.discount_percent,
+            valid_from=db_discount.valid_from,
+            valid_to=db_discount.valid_to
         )
         
     except HTTPException:
@@ -59,10 +72,14 @@ async def create_payment_discount(
 ):
     """
     Crear un descuento por método de pago
+    
+    `valid_from` y `valid_to` (opcionales) limitan su vigencia a
+    [valid_from, valid_to); mientras está vigente reemplaza a los que
+    empezaron antes.
     """
     try:
         # Verificar que el método de pago existe
-        payment_method_repo = PaymentMethodRepository()
+        payment_method_repo = get_repository(PaymentMethodRepository)
         payment_method = payment_method_repo.get_by_name(db, discount.payment_method)
         if not payment_method:
             raise HTTPException(
@@ -71,18 +88,23 @@ async def create_payment_discount(
             )
         
         # Crear el descuento
-        discount_repo = PaymentMethodDiscountRepository()
+        discount_repo = get_repository(PaymentMethodDiscountRepository)
         discount_data = {
             "payment_method_id": payment_method.payment_method_id,
-            "discount_percent": discount.discount_percent
+            "discount_percent": discount.discount_percent,
+            "valid_from": discount.valid_from,
+            "valid_to": discount.valid_to
         }
         
         db_discount = discount_repo.create(db, discount_data)
+        invalidation_bus.publish(TOPIC_DISCOUNTS, ACTION_CREATED, db_discount.discount_id)
         
         # Retornar en el formato esperado por la API
         return PaymentDiscount(
             payment_method=payment_method.name,
-            discount_percent=db_discount.discount_percent
+            discount_percent=db_discount.discount_percent,
+            valid_from=db_discount.valid_from,
+            valid_to=db_discount.valid_to
         )
         
     except HTTPException:
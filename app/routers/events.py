@@ -0,0 +1,76 @@
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, HTTPException, status, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.models import EventPage
+from app.config.settings import settings
+from app.services.outbox_relay import outbox_relay
+from app.routers.negotiation import NegotiatedRoute
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"],
+    route_class=NegotiatedRoute
+)
+
+@router.get("/", response_model=EventPage)
+async def get_events(
+    after: int = Query(0, ge=0, description="Cursor: ID del último evento recibido (0 = desde el más antiguo que se conserva)"),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: Optional[float] = Query(None, ge=0, description="Segundos a esperar si no hay eventos (por defecto OUTBOX_LONG_POLL_SECONDS)")
+):
+    """
+    Leer los eventos de ventas posteriores a `after` (long-poll)
+    
+    Si no hay eventos nuevos la respuesta espera hasta `wait` segundos a que
+    llegue alguno. `next_cursor` es el `after` de la siguiente lectura; los
+    eventos salen en orden y ninguno se repite. Un evento cuya transacción
+    hizo commit después de que el relay saltó su ID se entrega más tarde con
+    un ID nuevo al final; pasado OUTBOX_LATE_WINDOW se da por perdido y se
+    cuenta en `lost_ids` de /metrics.
+    """
+    try:
+        wait = settings.OUTBOX_LONG_POLL_SECONDS if wait is None else min(wait, settings.OUTBOX_LONG_POLL_SECONDS)
+        records, next_cursor = outbox_relay.read(after, limit)
+        if not records and wait > 0 and await outbox_relay.wait(after, wait):
+            records, next_cursor = outbox_relay.read(after, limit)
+        # Los eventos ya vienen serializados: se arma el cuerpo sin volver a codificarlos
+        body = '{"events":[' + ",".join(record.data for record in records) + f'],"next_cursor":{next_cursor}}}'
+        return Response(content=body.encode("utf-8"), media_type="application/json")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener los eventos: {str(e)}"
+        )
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    after: int = Query(0, ge=0, description="Cursor inicial (lo reemplaza el header Last-Event-ID al reconectar)"),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream de eventos de ventas (Server-Sent Events)
+    
+    Cada evento lleva su ID como `id`, así el cliente reconecta con
+    `Last-Event-ID` y sigue donde quedó. Sin eventos se envía un comentario
+    cada `OUTBOX_SSE_HEARTBEAT` segundos para mantener viva la conexión.
+    """
+    cursor = last_event_id if last_event_id is not None else after
+    return StreamingResponse(
+        sse_events(cursor, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def sse_events(cursor: int, is_disconnected) -> AsyncIterator[str]:
+    """Eventos en formato SSE desde `cursor` hasta que el cliente se desconecta"""
+    yield "retry: 3000\n\n"
+    while not await is_disconnected():
+        records, cursor = outbox_relay.read(cursor, settings.OUTBOX_RELAY_BATCH_SIZE)
+        for record in records:
+            yield f"id: {record.event_id}\nevent: {record.event_type}\ndata: {record.data}\n\n"
+        if not records and not await outbox_relay.wait(cursor, settings.OUTBOX_SSE_HEARTBEAT):
+            yield ": keepalive\n\n"
@@ -0,0 +1,49 @@
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.services.export_service import SalesExportService
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["exports"]
+)
+
+@router.get("/sales.parquet")
+def export_sales_parquet(
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None)
+):
+    """
+    Exportar ventas con sus items en formato Parquet (streaming, memoria acotada)
+    """
+    export_service = _get_export_service()
+    return StreamingResponse(
+        export_service.stream_parquet(start_date, end_date),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": 'attachment; filename="sales.parquet"'}
+    )
+
+@router.get("/sales.arrow")
+def export_sales_arrow(
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None)
+):
+    """
+    Exportar ventas con sus items como stream Arrow IPC (streaming, memoria acotada)
+    """
+    export_service = _get_export_service()
+    return StreamingResponse(
+        export_service.stream_arrow(start_date, end_date),
+        media_type="application/vnd.apache.arrow.stream",
+        headers={"Content-Disposition": 'attachment; filename="sales.arrow"'}
+    )
+
+def _get_export_service() -> SalesExportService:
+    """Servicio de exportación, o 501 si pyarrow no está instalado"""
+    if not SalesExportService.is_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Las exportaciones columnares requieren pyarrow (pip install pyarrow)"
+        )
+    return SalesExportService()
@@ -0,0 +1,93 @@
+import json
+from typing import Callable, Optional
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from starlette.responses import StreamingResponse
+from app.config.settings import settings
+from app.services import msgpack_codec
+
+class NegotiatedRoute(APIRoute):
+    """
+    Ruta con negociación de contenido JSON / MessagePack
+    
+    - Respuestas: con `Accept: application/msgpack` el cuerpo JSON que genera
+      FastAPI se valida otra vez contra el `response_model` de la ruta, así los
+      montos vuelven a ser Decimal (extensión 1 de MessagePack) y no texto. Por
+      encima de `MSGPACK_ZSTD_MIN_BYTES` se comprime con zstd si el cliente lo
+      admite (`Accept-Encoding: zstd`).
+    - Cuerpos: con `Content-Type: application/msgpack` el cuerpo se convierte a
+      JSON antes de validarlo, así el endpoint no cambia.
+    
+    Sin msgpack instalado se responde siempre JSON y los cuerpos MessagePack
+    reciben 415.
+    """
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        adapter = TypeAdapter(self.response_model) if self.response_model is not None else None
+        
+        async def negotiated_handler(request: Request) -> Response:
+            if msgpack_codec.is_msgpack(request.headers.get("content-type")):
+                request = await _msgpack_request_as_json(request)
+            response = await handler(request)
+            if isinstance(response, StreamingResponse) or response.media_type != "application/json":
+                return response
+            response.headers["Vary"] = "Accept"
+            if not msgpack_codec.is_available() or not msgpack_codec.accepts_msgpack(request.headers.get("accept")):
+                return response
+            return _to_msgpack(response, adapter, request.headers.get("accept-encoding"))
+        
+        return negotiated_handler
+
+async def _msgpack_request_as_json(request: Request) -> Request:
+    """Nueva solicitud con el cuerpo MessagePack convertido a JSON"""
+    if not msgpack_codec.is_available():
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Los cuerpos MessagePack requieren msgpack (pip install msgpack)"
+        )
+    try:
+        data = msgpack_codec.unpackb(await request.body())
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cuerpo MessagePack inválido"
+        )
+    # Los Decimal viajan como texto, igual que en JSON
+    body = json.dumps(data, default=str).encode("utf-8")
+    headers = [
+        (name, value) for name, value in request.scope["headers"]
+        if name not in (b"content-type", b"content-length")
+    ]
+    headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+    json_request = Request(dict(request.scope, headers=headers), request.receive)
+    json_request._body = body
+    return json_request
+
+def _to_msgpack(response: Response, adapter: Optional[TypeAdapter], accept_encoding: Optional[str]) -> Response:
+    """Recodificar una respuesta JSON como MessagePack (comprimida con zstd si corresponde)"""
+    content = json.loads(response.body) if response.body else None
+    if adapter is not None and 200 <= response.status_code < 300:
+        content = adapter.dump_python(adapter.validate_python(content), mode="python")
+    body = msgpack_codec.packb(content)
+    
+    headers = {
+        name: value for name, value in response.headers.items()
+        if name not in ("content-length", "content-type")
+    }
+    headers["Vary"] = "Accept, Accept-Encoding"
+    if (
+        len(body) >= settings.MSGPACK_ZSTD_MIN_BYTES
+        and msgpack_codec.zstd_available()
+        and msgpack_codec.accepts_zstd(accept_encoding)
+    ):
+        body = msgpack_codec.compress(body, settings.MSGPACK_ZSTD_LEVEL)
+        headers["Content-Encoding"] = "zstd"
+    return Response(
+        content=body,
+        status_code=response.status_code,
+        headers=headers,
+        media_type="application/msgpack",
+        background=response.background
+    )
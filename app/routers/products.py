@@ -1,14 +1,24 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from datetime import datetime
+from decimal import Decimal
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from typing import List, Optional, Union
 from sqlalchemy.orm import Session
-from app.models import Product, ProductCreate
+from app.models import BatchIdsRequest, BulkImportResult, Product, ProductBatch, ProductCreate, ProductSalesStats, ProductTypeSalesStats
 from app.database.connection import get_db
 from app.repositories.product_repository import ProductRepository
 from app.repositories.product_type_repository import ProductTypeRepository
+from app.repositories.sale_item_repository import SaleItemRepository
+from app.services.catalog_import_service import catalog_import_service, UnsupportedImportFormat
+from app.services.product_search import search_products
+from app.services.invalidation_bus import ACTION_CREATED, ACTION_UPDATED, TOPIC_PRODUCTS, invalidation_bus
+from app.storage import get_repository
+from app.routers.negotiation import NegotiatedRoute
+from app.routers.batch_lookup import lookup, parse_ids
 
 router = APIRouter(
     prefix="/products",
-    tags=["products"]
+    tags=["products"],
+    route_class=NegotiatedRoute
 )
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
@@ -20,10 +30,10 @@ async def create_product(
     Crear un nuevo producto
     """
     try:
-        product_repo = ProductRepository()
+        product_repo = get_repository(ProductRepository)
         
         # Verificar que el tipo de producto existe
-        product_type_repo = ProductTypeRepository()
+        product_type_repo = get_repository(ProductTypeRepository)
         product_type = product_type_repo.get_by_name(db, product.product_type)
         if not product_type:
             raise HTTPException(
@@ -39,6 +49,7 @@ async def create_product(
         }
         
         db_product = product_repo.create(db, product_data)
+        invalidation_bus.publish(TOPIC_PRODUCTS, ACTION_CREATED, db_product.product_id)
         
         # Retornar en el formato esperado por la API
         return Product(
@@ -56,30 +67,224 @@ async def create_product(
             detail=f"Error al crear el producto: {str(e)}"
         )
 
-@router.get("/", response_model=List[Product])
-async def get_products(db: Session = Depends(get_db)):
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_products(
+    request: Request,
+    upsert: bool = Query(False, description="Actualizar los registros cuyo nombre ya existe"),
+    db: Session = Depends(get_db)
+):
     """
-    Obtener todos los productos
+    Carga masiva de productos desde CSV (text/csv) o NDJSON (application/x-ndjson)
+    
+    Las filas inválidas no detienen la carga: se devuelven en `errors` con su número de fila.
     """
     try:
-        product_repo = ProductRepository()
+        content = await request.body()
+        result = catalog_import_service.import_products(db, content, request.headers.get("content-type", ""), upsert)
+        if result["updated"]:
+            invalidation_bus.publish(TOPIC_PRODUCTS, ACTION_UPDATED)
+        elif result["created"]:
+            invalidation_bus.publish(TOPIC_PRODUCTS, ACTION_CREATED)
+        return result
+        
+    except UnsupportedImportFormat as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la carga masiva de productos: {str(e)}"
+        )
+
+@router.get("/", response_model=Union[List[Product], ProductBatch])
+async def get_products(
+    ids: Optional[str] = Query(None, description="IDs separados por coma: devuelve solo esos productos y los que no existen"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtener todos los productos, o con `ids` solo los pedidos (una consulta IN)
+    """
+    try:
+        if ids is not None:
+            return _get_product_batch(db, parse_ids(ids))
+        
+        product_repo = get_repository(ProductRepository)
         db_products = product_repo.get_all(db)
         
         # Convertir a formato de respuesta de la API
-        products = []
-        for db_product in db_products:
-            product = Product(
-                product_id=db_product.product_id,
-                name=db_product.name,
-                product_type=db_product.product_type_ref.name,
-                list_price=db_product.list_price
+        return [_to_product(db_product) for db_product in db_products]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener los productos: {str(e)}"
+        )
+
+
+@router.post("/batch", response_model=ProductBatch)
+async def get_products_batch(batch: BatchIdsRequest, db: Session = Depends(get_db)):
+    """
+    Obtener varios productos por ID (variante POST de `GET /products?ids=` para listas largas)
+    """
+    try:
+        return _get_product_batch(db, batch.ids)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener los productos: {str(e)}"
+        )
+
+def _get_product_batch(db: Session, ids: List[int]) -> ProductBatch:
+    product_repo = get_repository(ProductRepository)
+    return ProductBatch(**lookup(
+        ids,
+        lambda unique_ids: product_repo.get_by_ids(db, unique_ids, load=("product_type_ref",)),
+        _to_product
+    ))
+
+def _to_product(db_product) -> Product:
+    """Convertir el modelo de base de datos al formato de respuesta de la API"""
+    return Product(
+        product_id=db_product.product_id,
+        name=db_product.name,
+        product_type=db_product.product_type_ref.name,
+        list_price=db_product.list_price
+    )
+
+
+@router.get("/search", response_model=List[Product])
+async def search_products_endpoint(
+    q: str = Query(..., min_length=1, max_length=100, description="Palabras o prefijos del nombre"),
+    product_type: Optional[str] = Query(None, min_length=1, max_length=50),
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar productos por nombre (typeahead)
+    
+    Cada palabra de `q` debe ser prefijo de alguna palabra del nombre. Los
+    resultados se ordenan por coincidencias exactas, luego los que empiezan
+    con la primera palabra y luego por nombre más corto.
+    """
+    try:
+        results = search_products(db, q, product_type, min_price, max_price, limit)
+        return [
+            Product(
+                product_id=result.product_id,
+                name=result.name,
+                product_type=result.product_type,
+                list_price=result.list_price
             )
-            products.append(product)
+            for result in results
+        ]
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar productos: {str(e)}"
+        )
+
+@router.get("/top", response_model=List[ProductSalesStats])
+async def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    by: str = Query("revenue", pattern="^(revenue|units)$"),
+    product_type: Optional[str] = Query(None, min_length=1, max_length=50),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtener los productos más vendidos por ingresos o por unidades
+    """
+    try:
+        product_type_id = None
+        if product_type is not None:
+            product_type_repo = get_repository(ProductTypeRepository)
+            db_product_type = product_type_repo.get_by_name(db, product_type)
+            if not db_product_type:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Tipo de producto '{product_type}' no válido"
+                )
+            product_type_id = db_product_type.product_type_id
         
-        return products
+        sale_item_repo = get_repository(SaleItemRepository)
+        rows = sale_item_repo.get_top_products(
+            db, limit=limit, order_by=by, start_date=start_date,
+            end_date=end_date, product_type_id=product_type_id
+        )
+        return [ProductSalesStats(**row) for row in rows]
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener los productos: {str(e)}"
+            detail=f"Error al obtener los productos más vendidos: {str(e)}"
+        )
+
+@router.get("/types/stats", response_model=List[ProductTypeSalesStats])
+async def get_product_type_stats(
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtener ventas agrupadas por tipo de producto
+    """
+    try:
+        sale_item_repo = get_repository(SaleItemRepository)
+        rows = sale_item_repo.get_product_type_rollup(db, start_date=start_date, end_date=end_date)
+        return [ProductTypeSalesStats(**row) for row in rows]
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener las ventas por tipo de producto: {str(e)}"
+        )
+
+@router.get("/{product_id}/stats", response_model=ProductSalesStats)
+async def get_product_stats(
+    product_id: int,
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtener unidades vendidas e ingresos de un producto
+    """
+    try:
+        product_repo = get_repository(ProductRepository)
+        db_product = product_repo.get_with_relations(db, product_id)
+        if not db_product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Producto no encontrado"
+            )
+        
+        sale_item_repo = get_repository(SaleItemRepository)
+        stats = sale_item_repo.get_product_stats(db, product_id, start_date=start_date, end_date=end_date)
+        
+        return ProductSalesStats(
+            product_id=db_product.product_id,
+            name=db_product.name,
+            product_type=db_product.product_type_ref.name,
+            **stats
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener las estadísticas del producto: {str(e)}"
         )
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict
+from fastapi import APIRouter, HTTPException, status, Depends
+from sqlalchemy.orm import Session
+from app.models import RepricingJob, RepricingRequest
+from app.config.settings import settings
+from app.database.connection import get_db
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.repositories.credit_terms_repository import CreditTermsRepository
+from app.services.repricing_service import RepricingScenario, repricing_service
+from app.storage import get_repository
+from app.routers.negotiation import NegotiatedRoute
+
+router = APIRouter(
+    prefix="/repricing",
+    tags=["repricing"],
+    route_class=NegotiatedRoute
+)
+
+@router.post("/", response_model=RepricingJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_repricing_job(
+    request: RepricingRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Lanzar una simulación: recalcular las ventas del período con los
+    descuentos propuestos y compararlas con lo que se cobró
+    
+    Los descuentos se indican por nombre de tipo de producto, nombre de
+    método de pago y días de crédito; cada uno reemplaza a los vigentes de
+    esa llave durante todo el período. Sin fechas se toman los últimos
+    `REPRICING_DEFAULT_DAYS` días. La simulación corre en segundo plano y se
+    consulta con GET /repricing/{job_id}.
+    """
+    try:
+        end = request.end_date or datetime.now()
+        start = request.start_date or end - timedelta(days=settings.REPRICING_DEFAULT_DAYS)
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_date debe ser posterior a start_date"
+            )
+        
+        product_type_repo = get_repository(ProductTypeRepository)
+        payment_method_repo = get_repository(PaymentMethodRepository)
+        credit_terms_repo = get_repository(CreditTermsRepository)
+        scenario = RepricingScenario(
+            start=start,
+            end=end,
+            product_type_discounts=_resolve(
+                request.product_type_discounts,
+                lambda name: product_type_repo.get_by_name(db, name),
+                "product_type_id",
+                "Tipo de producto"
+            ),
+            payment_method_discounts=_resolve(
+                request.payment_method_discounts,
+                lambda name: payment_method_repo.get_by_name(db, name),
+                "payment_method_id",
+                "Método de pago"
+            ),
+            credit_terms_discounts=_resolve(
+                request.credit_terms_discounts,
+                lambda days: credit_terms_repo.get_by_days(db, days),
+                "credit_terms_id",
+                "Términos de crédito de días"
+            )
+        )
+        return _job_response(repricing_service.submit(scenario))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al lanzar la simulación de precios: {str(e)}"
+        )
+
+@router.get("/{job_id}", response_model=RepricingJob)
+async def get_repricing_job(job_id: str):
+    """Estado de una simulación y, al terminar, su reporte por día y por tipo de producto"""
+    job = repricing_service.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Simulación no encontrada"
+        )
+    return _job_response(job)
+
+def _resolve(proposed: Dict, lookup, id_field: str, label: str) -> Dict[int, Decimal]:
+    """{nombre: %} -> {ID: %} (400 si el nombre no existe o el porcentaje está fuera de 0-100)"""
+    resolved = {}
+    for key, percent in proposed.items():
+        if percent < 0 or percent > 100:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El descuento de '{key}' debe estar entre 0 y 100"
+            )
+        row = lookup(key)
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{label} '{key}' no encontrado"
+            )
+        resolved[getattr(row, id_field)] = percent
+    return resolved
+
+def _job_response(job) -> RepricingJob:
+    return RepricingJob(
+        job_id=job.job_id,
+        status=job.status,
+        partitions_total=job.partitions_total,
+        partitions_done=job.partitions_done,
+        error=job.error,
+        report=job.report
+    )
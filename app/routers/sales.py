@@ -1,54 +1,145 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Optional, Tuple, Union
 from sqlalchemy.orm import Session
-from app.models import Sale, SaleCreate, SaleList
+from app.models import BatchIdsRequest, Sale, SaleBatch, SaleCreate, SaleList
 from app.database.connection import get_db
+from app.config.settings import settings
 from app.services.sale_service import SaleService
+from app.services.sale_journal import sale_journal
+from app.services.sale_coalescer import sale_coalescer
+from app.services.sale_response_cache import sale_response_cache
+from app.services.invalidation_bus import ACTION_DELETED, TOPIC_SALES, invalidation_bus
+from app.services.outbox_relay import outbox_relay
+from app.services.idempotency_service import idempotency_service, IdempotencyKeyMismatch, IdempotencyKeyInProgress
 from app.repositories.sale_repository import SaleRepository
+from app.storage import get_repository, is_memory_backend, open_session
+from app.routers.negotiation import NegotiatedRoute
+from app.routers.batch_lookup import lookup, parse_ids
 
 router = APIRouter(
     prefix="/sales",
-    tags=["sales"]
+    tags=["sales"],
+    route_class=NegotiatedRoute
 )
 
 @router.post("/", response_model=Sale, status_code=status.HTTP_201_CREATED)
 async def create_sale(
     sale: SaleCreate, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
     """
     Crear una nueva venta (endpoint core)
+    
+    Con el header `Idempotency-Key` los reintentos devuelven la respuesta
+    original sin volver a calcular ni insertar la venta.
     """
+    if idempotency_key is None:
+        result = await _create_sale(sale, db)
+        if settings.SALE_WRITE_MODE == "write_behind":
+            return JSONResponse(content=jsonable_encoder(result), status_code=status.HTTP_202_ACCEPTED)
+        return result
+    
+    request_hash = idempotency_service.fingerprint("POST", "/sales/", sale.model_dump(mode="json"))
+    try:
+        stored = await idempotency_service.execute(
+            db, idempotency_key, request_hash, lambda: _render_sale(sale, db)
+        )
+    except IdempotencyKeyMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except IdempotencyKeyInProgress as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    headers = {"Idempotent-Replayed": "true"} if stored.replayed else None
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
+async def _render_sale(sale: SaleCreate, db: Session) -> Tuple[int, bytes]:
+    """Crear la venta y devolver (status_code, cuerpo JSON) para guardarlo como respuesta idempotente"""
+    try:
+        response = JSONResponse(
+            content=jsonable_encoder(await _create_sale(sale, db)),
+            status_code=_created_status()
+        )
+    except HTTPException as e:
+        response = JSONResponse(content={"detail": e.detail}, status_code=e.status_code)
+    return response.status_code, response.body
+
+def _created_status() -> int:
+    """201 si la venta ya está en la base de datos, 202 si quedó en el log de escritura diferida"""
+    if settings.SALE_WRITE_MODE == "write_behind":
+        return status.HTTP_202_ACCEPTED
+    return status.HTTP_201_CREATED
+
+def _sale_data(sale: SaleCreate, db: Session) -> dict:
+    """Convertir el modelo Pydantic al diccionario que recibe SaleService"""
+    sale_data = {
+        "customer_id": sale.customer_id,
+        "payment_method_id": None,  # Necesitamos obtener el ID del método de pago
+        "items": [{"product_id": item.product_id, "quantity": item.quantity} for item in sale.items]
+    }
+    
+    # Obtener el ID del método de pago por nombre
+    from app.repositories.payment_method_repository import PaymentMethodRepository
+    payment_method_repo = get_repository(PaymentMethodRepository)
+    payment_method = payment_method_repo.get_by_name(db, sale.payment_method)
+    if not payment_method:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Método de pago '{sale.payment_method}' no encontrado"
+        )
+    
+    sale_data["payment_method_id"] = payment_method.payment_method_id
+    return sale_data
+
+async def _create_sale(sale: SaleCreate, db: Session) -> Sale:
+    """Validar, calcular y guardar una venta"""
     try:
         sale_service = SaleService()
         
-        # Convertir el modelo Pydantic a diccionario para el servicio
-        sale_data = {
-            "customer_id": sale.customer_id,
-            "payment_method_id": None,  # Necesitamos obtener el ID del método de pago
-            "items": [{"product_id": item.product_id, "quantity": item.quantity} for item in sale.items]
-        }
+        # Group commit: calcular con una sesión propia y cerrarla antes de esperar el
+        # commit compartido; la sesión del request queda intacta para quien la siga usando
+        if settings.SALE_WRITE_MODE == "group_commit":
+            read_db = open_session()
+            try:
+                priced_sale = sale_service.price_sale(read_db, _sale_data(sale, read_db))
+            finally:
+                if not is_memory_backend():
+                    read_db.close()
+            await sale_coalescer.write(priced_sale)
+            outbox_relay.notify()
+            return _cache_sale(Sale(**sale_service.build_breakdown(priced_sale)))
         
-        # Obtener el ID del método de pago por nombre
-        from app.repositories.payment_method_repository import PaymentMethodRepository
-        payment_method_repo = PaymentMethodRepository()
-        payment_method = payment_method_repo.get_by_name(db, sale.payment_method)
-        if not payment_method:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Método de pago '{sale.payment_method}' no encontrado"
-            )
+        sale_data = _sale_data(sale, db)
         
-        sale_data["payment_method_id"] = payment_method.payment_method_id
+        # Escritura diferida: guardar en el log local y responder con el ID asignado
+        if settings.SALE_WRITE_MODE == "write_behind":
+            priced_sale = sale_service.price_sale(db, sale_data)
+            sale_journal.append(priced_sale)
+            return Sale(**sale_service.build_breakdown(priced_sale))
         
         # Crear la venta usando el servicio
         db_sale = sale_service.create_sale(db, sale_data)
+        outbox_relay.notify()
         
         # Obtener el breakdown completo
         sale_with_breakdown = sale_service.get_sale_with_breakdown(db, db_sale.sale_id)
         
-        return Sale(**sale_with_breakdown)
-        
+        return _cache_sale(Sale(**sale_with_breakdown))
+    
     except HTTPException:
         raise
     except ValueError as e:
@@ -62,34 +153,155 @@ async def create_sale(
             detail=f"Error al crear la venta: {str(e)}"
         )
 
-@router.get("/", response_model=List[SaleList])
-async def get_sales(db: Session = Depends(get_db)):
+@router.get("/", response_model=Union[List[SaleList], SaleBatch])
+async def get_sales(
+    ids: Optional[str] = Query(None, description="IDs separados por coma: devuelve solo esas ventas y las que no existen"),
+    db: Session = Depends(get_db)
+):
     """
-    Obtener todas las ventas (oculta las soft-deleted)
+    Obtener todas las ventas (oculta las soft-deleted), o con `ids` solo las pedidas (una consulta IN)
     """
     try:
-        sale_repo = SaleRepository()
+        if ids is not None:
+            return _get_sale_batch(db, parse_ids(ids))
+        
+        sale_repo = get_repository(SaleRepository)
         db_sales = sale_repo.get_all(db)
         
         # Convertir a formato de respuesta de la API
-        sales = []
-        for db_sale in db_sales:
-            sale = SaleList(
-                sale_id=db_sale.sale_id,
-                customer_id=db_sale.customer_id,
-                payment_method=db_sale.payment_method.name,
-                subtotal=db_sale.subtotal,
-                tax=db_sale.tax,
-                total=db_sale.total,
-                total_discounts_amount=db_sale.total_discounts_amount,
-                sale_datetime=db_sale.sale_datetime
-            )
-            sales.append(sale)
-        
-        return sales
-        
+        return [_to_sale_list(db_sale) for db_sale in db_sales]
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener las ventas: {str(e)}"
+        )
+
+@router.post("/batch", response_model=SaleBatch)
+async def get_sales_batch(batch: BatchIdsRequest, db: Session = Depends(get_db)):
+    """
+    Obtener varias ventas por ID (variante POST de `GET /sales?ids=` para listas largas)
+    """
+    try:
+        return _get_sale_batch(db, batch.ids)
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener las ventas: {str(e)}"
         )
+
+@router.get("/{sale_id}", response_model=Sale)
+async def get_sale(sale_id: int, db: Session = Depends(get_db)):
+    """
+    Obtener una venta con su breakdown
+    
+    Se sirve desde la caché de respuestas ya serializadas; si no está, se
+    carga con una sola consulta y se guarda para las siguientes lecturas.
+    """
+    try:
+        body = sale_response_cache.get(sale_id)
+        if body is None:
+            generation = sale_response_cache.generation
+            try:
+                sale = Sale(**SaleService().get_sale_with_breakdown(db, sale_id))
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=str(e)
+                )
+            body = sale_response_cache.render(sale)
+            sale_response_cache.put(sale_id, body, generation)
+        return Response(content=body, media_type="application/json")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener la venta: {str(e)}"
+        )
+
+@router.delete("/{sale_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_sale(sale_id: int, db: Session = Depends(get_db)):
+    """
+    Eliminar una venta (soft delete)
+    
+    Deja de aparecer en los listados, reportes y en GET /sales/{id}; su
+    respuesta se descarta de la caché de todos los workers.
+    """
+    try:
+        sale_repo = get_repository(SaleRepository)
+        if not sale_repo.soft_delete(db, sale_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Venta no encontrada"
+            )
+        invalidation_bus.publish(TOPIC_SALES, ACTION_DELETED, sale_id)
+        outbox_relay.notify()
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al eliminar la venta: {str(e)}"
+        )
+
+@router.get("/{sale_id}/repricing", response_model=Sale)
+async def reprice_sale(
+    sale_id: int,
+    at: Optional[datetime] = Query(None, description="Fecha de los descuentos a aplicar (por defecto, la de la venta)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Recalcular una venta con los descuentos vigentes en otra fecha
+    
+    No modifica la venta: devuelve cómo habría quedado con los descuentos
+    vigentes en `at`, con los mismos precios de lista, cantidades e impuesto.
+    """
+    try:
+        return Sale(**SaleService().reprice_sale(db, sale_id, at))
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al recalcular la venta: {str(e)}"
+        )
+
+def _cache_sale(sale: Sale) -> Sale:
+    """Guardar la respuesta serializada de una venta recién creada para GET /sales/{id}"""
+    if sale_response_cache.enabled:
+        sale_response_cache.put(sale.sale_id, sale_response_cache.render(sale))
+    return sale
+
+def _get_sale_batch(db: Session, ids: List[int]) -> SaleBatch:
+    sale_repo = get_repository(SaleRepository)
+    return SaleBatch(**lookup(
+        ids,
+        lambda unique_ids: sale_repo.get_by_ids(db, unique_ids, load=("payment_method",)),
+        _to_sale_list
+    ))
+
+def _to_sale_list(db_sale) -> SaleList:
+    """Convertir el modelo de base de datos al formato de respuesta de la API"""
+    return SaleList(
+        sale_id=db_sale.sale_id,
+        customer_id=db_sale.customer_id,
+        payment_method=db_sale.payment_method.name,
+        subtotal=db_sale.subtotal,
+        tax=db_sale.tax,
+        total=db_sale.total,
+        total_discounts_amount=db_sale.total_discounts_amount,
+        sale_datetime=db_sale.sale_datetime
+    )
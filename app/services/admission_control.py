@@ -0,0 +1,235 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+from typing import Any, Callable, Dict, List, Tuple
+from app.config.settings import settings
+from app.database.connection import pool_wait_monitor
+
+logger = logging.getLogger(__name__)
+
+# Clases de ruta, de mayor a menor prioridad
+ROUTE_SALE_WRITE = "sale_write"
+ROUTE_WRITE = "write"
+ROUTE_READ = "read"
+ROUTE_REPORT = "report"
+
+PRIORITIES = {ROUTE_SALE_WRITE: 0, ROUTE_WRITE: 1, ROUTE_READ: 2, ROUTE_REPORT: 3}
+
+# Rutas que nunca se rechazan (sondas, métricas y documentación)
+EXEMPT_PATHS = {"/", "/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"}
+# El feed de eventos espera sin ocupar conexiones (long-poll y SSE): no cuenta como carga
+EXEMPT_PREFIXES = ("/events",)
+
+def classify(method: str, path: str) -> str:
+    """Clase de ruta de una solicitud"""
+    if method == "POST" and path.rstrip("/") == "/sales":
+        return ROUTE_SALE_WRITE
+    if path.startswith(("/exports", "/repricing")) or path.endswith("/stats") or path.rstrip("/") == "/products/top":
+        return ROUTE_REPORT
+    # Las consultas por lote usan POST solo para enviar listas largas de IDs
+    if method in ("GET", "HEAD") or path.endswith("/batch"):
+        return ROUTE_READ
+    return ROUTE_WRITE
+
+class AdmissionController:
+    """
+    Control de admisión por clase de ruta
+    
+    Cada clase tiene un máximo de solicitudes en curso: las ventas pueden usar
+    toda la capacidad del proceso, las demás escrituras y las lecturas una
+    fracción y los reportes otra menor, así que siempre queda capacidad para
+    POST /sales. Si no hay lugar la solicitud espera en una cola por
+    prioridad; al liberarse un lugar se admite primero la de mayor prioridad.
+    Se rechaza (503) al agotar el presupuesto de espera de su clase, o de
+    inmediato si no es una venta y los checkouts del pool ya esperan más que
+    `pool_wait_budget`: la base de datos está saturada y encolar solo
+    acumularía latencia.
+    
+    Los contadores y la cola pertenecen al event loop del proceso.
+    """
+    
+    def __init__(
+        self,
+        max_in_flight: int,
+        read_share: float,
+        report_share: float,
+        queue_budget: float,
+        sale_queue_budget: float,
+        pool_wait_budget: float,
+        pool_wait: Callable[[], float] = pool_wait_monitor.recent_wait
+    ):
+        self.max_in_flight = max_in_flight
+        shared_limit = max(1, int(max_in_flight * read_share))
+        self.limits = {
+            ROUTE_SALE_WRITE: max_in_flight,
+            ROUTE_WRITE: shared_limit,
+            ROUTE_READ: shared_limit,
+            ROUTE_REPORT: max(1, int(max_in_flight * report_share))
+        }
+        self.budgets = {
+            ROUTE_SALE_WRITE: sale_queue_budget,
+            ROUTE_WRITE: queue_budget,
+            ROUTE_READ: queue_budget,
+            ROUTE_REPORT: queue_budget
+        }
+        self.pool_wait_budget = pool_wait_budget
+        self.pool_wait = pool_wait
+        self._in_flight = dict.fromkeys(PRIORITIES, 0)
+        self._admitted = dict.fromkeys(PRIORITIES, 0)
+        self._rejected = dict.fromkeys(PRIORITIES, 0)
+        self._total_in_flight = 0
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+    
+    async def acquire(self, route_class: str) -> bool:
+        """Esperar un lugar para la clase; False si la solicitud debe rechazarse"""
+        if route_class != ROUTE_SALE_WRITE and self.pool_wait() > self.pool_wait_budget:
+            self._rejected[route_class] += 1
+            return False
+        
+        priority = PRIORITIES[route_class]
+        if self._has_room(route_class) and not self._has_waiters_before(priority):
+            self._admit(route_class)
+            return True
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), route_class, future))
+        try:
+            await asyncio.wait_for(future, self.budgets[route_class])
+            return True
+        except asyncio.TimeoutError:
+            self._rejected[route_class] += 1
+            return False
+        except asyncio.CancelledError:
+            # El cliente se fue: si ya se le había asignado lugar, se devuelve
+            if future.done() and not future.cancelled():
+                self.release(route_class)
+            raise
+    
+    def release(self, route_class: str) -> None:
+        """Liberar el lugar de una solicitud terminada y admitir a las que esperan"""
+        self._in_flight[route_class] -= 1
+        self._total_in_flight -= 1
+        self._wake()
+    
+    def retry_after(self) -> int:
+        """Segundos sugeridos al cliente antes de reintentar"""
+        return max(1, math.ceil(self.pool_wait() + max(self.budgets.values())))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Solicitudes en curso, en cola, admitidas y rechazadas por clase"""
+        queued = dict.fromkeys(PRIORITIES, 0)
+        for _, _, route_class, future in self._waiters:
+            if not future.done():
+                queued[route_class] += 1
+        return {
+            "in_flight": self._total_in_flight,
+            "max_in_flight": self.max_in_flight,
+            "pool_wait_budget_ms": round(self.pool_wait_budget * 1000, 2),
+            "classes": {
+                route_class: {
+                    "in_flight": self._in_flight[route_class],
+                    "limit": self.limits[route_class],
+                    "queued": queued[route_class],
+                    "admitted": self._admitted[route_class],
+                    "rejected": self._rejected[route_class]
+                }
+                for route_class in PRIORITIES
+            }
+        }
+    
+    def _has_room(self, route_class: str) -> bool:
+        return (
+            self._total_in_flight < self.max_in_flight
+            and self._in_flight[route_class] < self.limits[route_class]
+        )
+    
+    def _has_waiters_before(self, priority: int) -> bool:
+        """Hay solicitudes de igual o mayor prioridad esperando (no se adelanta a ellas)"""
+        return any(
+            waiter_priority <= priority and not future.done()
+            for waiter_priority, _, _, future in self._waiters
+        )
+    
+    def _admit(self, route_class: str) -> None:
+        self._in_flight[route_class] += 1
+        self._total_in_flight += 1
+        self._admitted[route_class] += 1
+    
+    def _wake(self) -> None:
+        """Admitir en orden de prioridad a las que esperan y ya tienen lugar"""
+        pending = []
+        while self._waiters and self._total_in_flight < self.max_in_flight:
+            waiter = heapq.heappop(self._waiters)
+            _, _, route_class, future = waiter
+            if future.done():
+                continue
+            if self._has_room(route_class):
+                self._admit(route_class)
+                future.set_result(True)
+            else:
+                # Su clase está llena; una de menor prioridad puede usar el lugar
+                pending.append(waiter)
+        for waiter in pending:
+            heapq.heappush(self._waiters, waiter)
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI que pasa cada solicitud por el control de admisión
+    
+    El lugar se ocupa hasta que termina de enviarse la respuesta (incluidas
+    las exportaciones en streaming, que mantienen la conexión a la base de
+    datos). Las solicitudes rechazadas reciben 503 con `Retry-After`.
+    """
+    
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+    
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if (
+            scope["type"] != "http"
+            or not settings.ADMISSION_ENABLED
+            or scope["path"] in EXEMPT_PATHS
+            or scope["path"].startswith(EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        route_class = classify(scope["method"], scope["path"])
+        if not await controller.acquire(route_class):
+            logger.warning("Solicitud rechazada por saturación: %s %s", scope["method"], scope["path"])
+            await self._reject(send, controller.retry_after())
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(route_class)
+    
+    @staticmethod
+    async def _reject(send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Servicio saturado, reintente más tarde"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+# Instancia global del control de admisión
+admission_controller = AdmissionController(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    read_share=settings.ADMISSION_READ_SHARE,
+    report_share=settings.ADMISSION_REPORT_SHARE,
+    queue_budget=settings.ADMISSION_QUEUE_BUDGET_MS / 1000,
+    sale_queue_budget=settings.ADMISSION_SALE_QUEUE_BUDGET_MS / 1000,
+    pool_wait_budget=settings.ADMISSION_POOL_WAIT_BUDGET_MS / 1000
+)
@@ -0,0 +1,199 @@
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.repositories.product_repository import ProductRepository
+from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.repositories.discount_repository import ProductTypeDiscountRepository, PaymentMethodDiscountRepository
+from app.repositories.credit_terms_discount_repository import CreditTermsDiscountRepository
+from app.services.discount_schedule import DiscountSchedule
+from app.services.invalidation_bus import (
+    ACTION_CREATED, TOPIC_DISCOUNTS, TOPIC_PRODUCTS, InvalidationEvent, invalidation_bus
+)
+from app.services.shared_catalog import (
+    CatalogPayload, DiscountRule, PaymentMethodRef, ProductRef, SharedCatalogSegment, SharedCatalogView
+)
+from app.storage import get_repository, is_memory_backend
+
+class CatalogSnapshot(NamedTuple):
+    """Datos de referencia y reglas de descuento con sus vigencias, inmutables una vez cargados"""
+    payment_methods: Dict[int, PaymentMethodRef]
+    product_type_discounts: List[DiscountRule]
+    payment_method_discounts: List[DiscountRule]
+    credit_terms_discounts: List[DiscountRule]
+    loaded_at: float
+    # La caché local no guarda productos: se leen de la base de datos
+    products: Dict[int, ProductRef] = {}
+    # Índice de vigencias de esta versión (se asigna al cargarla)
+    discount_schedule: Optional[DiscountSchedule] = None
+    
+    def is_current(self) -> bool:
+        """Una versión local nunca se sobrescribe (misma interfaz que SharedCatalogView)"""
+        return True
+
+class CatalogCache:
+    """
+    Caché de métodos de pago y descuentos para el cálculo de ventas
+    
+    Local (por defecto): se carga completa (una consulta por tabla) y se
+    reemplaza de una vez, así que los lectores siempre ven una versión
+    consistente sin tomar locks. Las escrituras de descuentos la invalidan a
+    través del bus de invalidación; si el bus no tiene transporte entre
+    procesos, `ttl` acota cuánto puede tardar en verse un cambio hecho por otro.
+    
+    Compartida (`shared_path`): todos los workers del host leen sin copia un
+    mismo segmento mmap que además guarda precio y tipo de cada producto. El
+    primer worker que lo encuentra vacío, invalidado o expirado lo publica; los
+    demás usan mientras tanto la versión local. Una invalidación en cualquier
+    worker deja de servirse en todos a la vez.
+    
+    Cada versión lleva su DiscountSchedule (vigencias de los descuentos y sus
+    matrices compiladas), armado una sola vez (en la carga local o la primera
+    vez que se lee una generación compartida) y reemplazado junto con ella
+    cuando una escritura de descuentos la invalida. Como guarda todas las
+    vigencias, una promoción programada empieza y termina a su hora sin
+    recargar nada.
+    """
+    
+    def __init__(self, ttl: float, shared_path: str = "", shared_size: int = 0):
+        self.ttl = ttl
+        self.shared_path = shared_path
+        self.shared_size = shared_size
+        self.product_repo = get_repository(ProductRepository)
+        self.payment_method_repo = get_repository(PaymentMethodRepository)
+        self.product_type_discount_repo = get_repository(ProductTypeDiscountRepository)
+        self.payment_method_discount_repo = get_repository(PaymentMethodDiscountRepository)
+        self.credit_terms_discount_repo = get_repository(CreditTermsDiscountRepository)
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._segment: Optional[SharedCatalogSegment] = None
+        self._shared_schedule: Optional[Tuple[int, DiscountSchedule]] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def shared(self) -> bool:
+        """El segmento compartido está configurado (no aplica al backend en memoria)"""
+        return bool(self.shared_path) and not is_memory_backend()
+    
+    def get(self, db: Session) -> Union[CatalogSnapshot, SharedCatalogView]:
+        """Obtener la versión vigente, recargándola si no existe o ya expiró"""
+        if self.shared:
+            segment = self.segment()
+            view = segment.view(max_age=self.ttl)
+            if view is None and segment.publish(lambda: self._read_payload(db, include_products=True), block=False):
+                view = segment.view(max_age=self.ttl)
+            if view is not None:
+                return self._with_schedule(view)
+        
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl:
+                    snapshot = self.load(db)
+        return snapshot
+    
+    def load(self, db: Session) -> CatalogSnapshot:
+        """
+        Leer los catálogos de la base de datos y publicarlos como versión local vigente
+        
+        Si se invalida mientras se lee, la versión leída se devuelve pero no se
+        publica, para no fijar datos anteriores a la escritura.
+        """
+        generation = self._generation
+        payload = self._read_payload(db, include_products=False)
+        snapshot = CatalogSnapshot(
+            payment_methods={
+                payment_method_id: PaymentMethodRef(payment_method_id, name)
+                for payment_method_id, name in payload.payment_methods
+            },
+            product_type_discounts=payload.product_type_discounts,
+            payment_method_discounts=payload.payment_method_discounts,
+            credit_terms_discounts=payload.credit_terms_discounts,
+            loaded_at=time.monotonic()
+        )
+        snapshot = snapshot._replace(discount_schedule=DiscountSchedule(snapshot))
+        if generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+    
+    def invalidate(self, shared: bool = True) -> None:
+        """Descartar la versión vigente (y la compartida); la siguiente lectura la recarga"""
+        self._generation += 1
+        self._snapshot = None
+        if shared and self.shared:
+            self.segment().invalidate()
+    
+    def handle_invalidation(self, event: InvalidationEvent) -> None:
+        """
+        Suscriptor del bus de invalidación
+        
+        Los productos nuevos no invalidan: si no están en el segmento se leen de
+        la base de datos. El segmento compartido lo invalida solo el proceso que
+        hizo la escritura; los demás descartan su versión local.
+        """
+        if event.topic == TOPIC_PRODUCTS and event.action == ACTION_CREATED:
+            return
+        self.invalidate(shared=event.is_local)
+    
+    def segment(self) -> SharedCatalogSegment:
+        """Abrir (o crear) el segmento compartido la primera vez que se usa"""
+        if self._segment is None:
+            with self._lock:
+                if self._segment is None:
+                    self._segment = SharedCatalogSegment(self.shared_path, self.shared_size)
+        return self._segment
+    
+    def _with_schedule(self, view: SharedCatalogView) -> SharedCatalogView:
+        """Asignar a la vista el índice de vigencias de su generación, armándolo la primera vez"""
+        compiled = self._shared_schedule
+        if compiled is not None and compiled[0] == view.generation:
+            view.discount_schedule = compiled[1]
+            return view
+        view.discount_schedule = DiscountSchedule(view)
+        # Solo se guarda si el slot no se sobrescribió mientras se leía
+        if view.is_current():
+            self._shared_schedule = (view.generation, view.discount_schedule)
+        return view
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+    
+    def _read_payload(self, db: Session, include_products: bool) -> CatalogPayload:
+        products = []
+        if include_products:
+            products = [
+                (row.product_id, row.product_type_id, row.list_price)
+                for row in self.product_repo.iter_all(db, as_rows=True)
+            ]
+        return CatalogPayload(
+            products=products,
+            product_type_discounts=self._rules(db, self.product_type_discount_repo, "product_type_id"),
+            payment_method_discounts=self._rules(db, self.payment_method_discount_repo, "payment_method_id"),
+            credit_terms_discounts=self._rules(db, self.credit_terms_discount_repo, "credit_terms_id"),
+            payment_methods=[
+                (row.payment_method_id, row.name)
+                for row in self.payment_method_repo.iter_all(db, as_rows=True)
+            ]
+        )
+    
+    @staticmethod
+    def _rules(db: Session, repo, key_field: str) -> List[DiscountRule]:
+        """Reglas con sus vigencias ordenadas por llave e ID (DiscountTimeline resuelve cuál gana)"""
+        rows = sorted(repo.iter_all(db, as_rows=True), key=lambda row: (getattr(row, key_field), row.discount_id))
+        return [
+            DiscountRule(getattr(row, key_field), Decimal(row.discount_percent), row.valid_from, row.valid_to)
+            for row in rows
+        ]
+
+# Instancia global de la caché de catálogos
+catalog_cache = CatalogCache(
+    ttl=settings.CATALOG_CACHE_TTL,
+    shared_path=settings.SHARED_CATALOG_PATH,
+    shared_size=settings.SHARED_CATALOG_SIZE_MB * 1024 * 1024
+)
+invalidation_bus.subscribe(TOPIC_DISCOUNTS, catalog_cache.handle_invalidation)
+invalidation_bus.subscribe(TOPIC_PRODUCTS, catalog_cache.handle_invalidation)
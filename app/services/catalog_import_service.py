@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+from app.models import CustomerCreate, ProductCreate
+from app.repositories.base import BaseRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.customer_type_repository import CustomerTypeRepository
+from app.repositories.credit_terms_repository import CreditTermsRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.storage import get_repository
+
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"}
+
+class UnsupportedImportFormat(ValueError):
+    """La carga no es CSV ni NDJSON en UTF-8"""
+
+class CatalogImportService:
+    """
+    Carga masiva de productos y clientes desde CSV o NDJSON
+    
+    Los catálogos de referencia (tipos y términos de crédito) se leen una sola
+    vez por carga, las filas válidas se insertan por bloques con executemany y
+    las inválidas se reportan con su número de fila sin detener la carga.
+    Con `upsert` las filas cuyo nombre ya existe actualizan ese registro; si un
+    nombre se repite dentro del archivo gana la última fila.
+    """
+    
+    def __init__(self):
+        self.product_repo = get_repository(ProductRepository)
+        self.product_type_repo = get_repository(ProductTypeRepository)
+        self.customer_repo = get_repository(CustomerRepository)
+        self.customer_type_repo = get_repository(CustomerTypeRepository)
+        self.credit_terms_repo = get_repository(CreditTermsRepository)
+    
+    def import_products(self, db: Session, content: bytes, content_type: str, upsert: bool = False) -> Dict[str, Any]:
+        """Cargar productos; devuelve el reporte de la carga"""
+        product_types = {
+            product_type.name: product_type.product_type_id
+            for product_type in self.product_type_repo.get_all(db, limit=None)
+        }
+        
+        def to_row(product: ProductCreate) -> Dict[str, Any]:
+            if product.product_type not in product_types:
+                raise ValueError(f"Tipo de producto '{product.product_type}' no válido")
+            return {
+                "name": product.name,
+                "product_type_id": product_types[product.product_type],
+                "list_price": product.list_price
+            }
+        
+        return self._import(db, self.product_repo, ProductCreate, to_row, content, content_type, upsert)
+    
+    def import_customers(self, db: Session, content: bytes, content_type: str, upsert: bool = False) -> Dict[str, Any]:
+        """Cargar clientes; devuelve el reporte de la carga"""
+        customer_types = {
+            customer_type.name: customer_type.customer_type_id
+            for customer_type in self.customer_type_repo.get_all(db, limit=None)
+        }
+        credit_terms = {
+            terms.days: terms.credit_terms_id
+            for terms in self.credit_terms_repo.get_all(db, limit=None)
+        }
+        
+        def to_row(customer: CustomerCreate) -> Dict[str, Any]:
+            if customer.customer_type not in customer_types:
+                raise ValueError(f"Tipo de cliente '{customer.customer_type}' no válido")
+            if customer.credit_terms_days not in credit_terms:
+                raise ValueError(f"Términos de crédito de {customer.credit_terms_days} días no válidos")
+            return {
+                "name": customer.name,
+                "customer_type_id": customer_types[customer.customer_type],
+                "credit_terms_id": credit_terms[customer.credit_terms_days]
+            }
+        
+        return self._import(db, self.customer_repo, CustomerCreate, to_row, content, content_type, upsert)
+    
+    def _import(
+        self,
+        db: Session,
+        repo: BaseRepository,
+        schema: Type[BaseModel],
+        to_row: Callable[[Any], Dict[str, Any]],
+        content: bytes,
+        content_type: str,
+        upsert: bool
+    ) -> Dict[str, Any]:
+        received = 0
+        rows: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        for row_number, record, error in self._parse(content, content_type):
+            received += 1
+            if error is None:
+                try:
+                    rows.append(to_row(schema.model_validate(record)))
+                    continue
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in detail['loc']) or 'fila'}: {detail['msg']}"
+                        for detail in e.errors()
+                    )
+                except ValueError as e:
+                    error = str(e)
+            errors.append({"row": row_number, "error": error})
+        
+        to_update: List[Dict[str, Any]] = []
+        if upsert and rows:
+            by_name = {row["name"]: row for row in rows}
+            existing = repo.get_ids_by(db, "name", list(by_name))
+            id_field = repo._get_id_field()
+            rows = []
+            for name, row in by_name.items():
+                if name in existing:
+                    to_update.append({id_field: existing[name], **row})
+                else:
+                    rows.append(row)
+        
+        if to_update:
+            repo.bulk_update(db, to_update)
+        if rows:
+            repo.bulk_create(db, rows)
+        
+        return {
+            "received": received,
+            "created": len(rows),
+            "updated": len(to_update),
+            "failed": len(errors),
+            "errors": errors
+        }
+    
+    @staticmethod
+    def _parse(content: bytes, content_type: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        """Recorrer las filas del archivo como (número de fila, registro, error)"""
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise UnsupportedImportFormat("El archivo debe estar codificado en UTF-8")
+        
+        if media_type in CSV_CONTENT_TYPES:
+            reader = csv.DictReader(io.StringIO(text))
+            for row_number, record in enumerate(reader, start=1):
+                if None in record:
+                    yield row_number, None, "columnas de más en la fila"
+                else:
+                    yield row_number, record, None
+        elif media_type in NDJSON_CONTENT_TYPES:
+            for row_number, line in enumerate(text.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield row_number, None, f"JSON inválido: {e.msg}"
+                    continue
+                if not isinstance(record, dict):
+                    yield row_number, None, "se esperaba un objeto JSON"
+                else:
+                    yield row_number, record, None
+        else:
+            raise UnsupportedImportFormat(
+                f"Formato '{media_type}' no soportado; use text/csv o application/x-ndjson"
+            )
+
+# Instancia global del servicio de carga masiva
+catalog_import_service = CatalogImportService()
@@ -0,0 +1,272 @@
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.database.models import Customer, Product, Sale, SaleItem
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.customer_type_repository import CustomerTypeRepository
+from app.repositories.credit_terms_repository import CreditTermsRepository
+from app.repositories.credit_terms_discount_repository import CreditTermsDiscountRepository
+from app.repositories.discount_repository import ProductTypeDiscountRepository, PaymentMethodDiscountRepository
+from app.repositories.id_sequence_repository import IdSequenceRepository
+from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.services.catalog_cache import CatalogSnapshot
+from app.services.discount_schedule import DiscountSchedule
+from app.services.pricing import TAX_RATE_PERCENT, DiscountRates, calculate_tax, price_line_rates
+from app.services.shared_catalog import DiscountRule, PaymentMethodRef
+
+# Distribuciones de las ventas generadas (valor, peso)
+LINE_COUNT_WEIGHTS = [(1, 35), (2, 25), (3, 15), (4, 10), (5, 6), (6, 4), (7, 2), (8, 1.5), (9, 1), (10, 0.5)]
+QUANTITY_WEIGHTS = [(1, 70), (2, 18), (3, 7), (4, 3), (5, 2)]
+PAYMENT_METHOD_WEIGHTS = {"Cash": 30, "Credit Card": 55, "Store Credit": 15}
+VIP_RATIO = 0.1
+
+ProgressCallback = Callable[[str, int, int], None]
+
+class SyntheticDataGenerator:
+    """
+    Generador de datos sintéticos a escala de producción
+    
+    Crea clientes, productos y ventas con distribuciones realistas (líneas por
+    venta, cantidades, métodos de pago) y calcula cada venta con las mismas
+    reglas de precios que SaleService (los descuentos vigentes en su fecha).
+    Las filas se cargan por bloques con la vía más rápida disponible: LOAD DATA
+    LOCAL INFILE en MySQL e INSERT por lotes (executemany) en los demás motores.
+    """
+    
+    def __init__(
+        self,
+        engine: Engine,
+        seed: Optional[int] = None,
+        chunk_size: int = 50000,
+        method: str = "auto",
+        days: int = 365,
+        progress: Optional[ProgressCallback] = None
+    ):
+        if method == "auto":
+            method = "load_data" if engine.dialect.name == "mysql" else "insert"
+        if method == "load_data" and engine.dialect.name != "mysql":
+            raise ValueError("LOAD DATA LOCAL INFILE solo está disponible en MySQL")
+        
+        self.engine = engine
+        self.random = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.method = method
+        self.days = days
+        self.progress = progress or (lambda table, done, total: None)
+        self.sequence_repo = IdSequenceRepository()
+    
+    def generate(self, customers: int = 0, products: int = 0, sales: int = 0) -> Dict[str, int]:
+        """Generar y cargar los volúmenes indicados; devuelve las filas insertadas por tabla"""
+        db = Session(bind=self.engine)
+        try:
+            reference = self._load_reference_data(db)
+            counts = {
+                "customer": self._generate_customers(db, reference, customers),
+                "product": self._generate_products(db, reference, products),
+                "sale": 0,
+                "sale_item": 0
+            }
+            if sales:
+                counts["sale"], counts["sale_item"] = self._generate_sales(db, reference, sales)
+            return counts
+        finally:
+            db.close()
+    
+    def _load_reference_data(self, db: Session) -> Dict[str, Any]:
+        """Leer catálogos y descuentos una sola vez"""
+        reference = {
+            "customer_types": {t.name: t.customer_type_id for t in CustomerTypeRepository().get_all(db, limit=None)},
+            "credit_terms": [t.credit_terms_id for t in CreditTermsRepository().get_all(db, limit=None)],
+            "product_types": [t.product_type_id for t in ProductTypeRepository().get_all(db, limit=None)],
+            "payment_methods": {m.payment_method_id: m.name for m in PaymentMethodRepository().get_all(db, limit=None)}
+        }
+        missing = [name for name in ("customer_types", "credit_terms", "product_types", "payment_methods") if not reference[name]]
+        if missing:
+            raise ValueError(f"Faltan catálogos ({', '.join(missing)}): ejecute init_db.py primero")
+        
+        # Mismo índice de vigencias que usan SaleService y el recálculo de ventas
+        catalog = CatalogSnapshot(
+            payment_methods={
+                payment_method_id: PaymentMethodRef(payment_method_id, name)
+                for payment_method_id, name in reference["payment_methods"].items()
+            },
+            product_type_discounts=self._rules(db, ProductTypeDiscountRepository(), "product_type_id"),
+            payment_method_discounts=self._rules(db, PaymentMethodDiscountRepository(), "payment_method_id"),
+            credit_terms_discounts=self._rules(db, CreditTermsDiscountRepository(), "credit_terms_id"),
+            loaded_at=0.0
+        )
+        reference["discount_schedule"] = DiscountSchedule(catalog)
+        return reference
+    
+    @staticmethod
+    def _rules(db: Session, repo, key_field: str) -> List[DiscountRule]:
+        """Reglas con sus vigencias, ordenadas por llave e ID como en la caché de catálogos"""
+        rows = sorted(repo.get_all(db, limit=None), key=lambda row: (getattr(row, key_field), row.discount_id))
+        return [
+            DiscountRule(getattr(row, key_field), Decimal(row.discount_percent), row.valid_from, row.valid_to)
+            for row in rows
+        ]
+    
+    def _generate_customers(self, db: Session, reference: Dict[str, Any], count: int) -> int:
+        customer_types = reference["customer_types"]
+        vip_type = customer_types.get("VIP")
+        other_types = [type_id for name, type_id in customer_types.items() if name != "VIP"] or [vip_type]
+        start = (db.query(func.max(Customer.customer_id)).scalar() or 0) + 1
+        
+        def build(customer_id: int) -> Tuple:
+            is_vip = vip_type is not None and self.random.random() < VIP_RATIO
+            customer_type_id = vip_type if is_vip else self.random.choice(other_types)
+            return (customer_id, f"Cliente {customer_id}", customer_type_id, self.random.choice(reference["credit_terms"]))
+        
+        columns = ["customer_id", "name", "customer_type_id", "credit_terms_id"]
+        return self._generate_table(Customer.__table__, columns, start, count, build)
+    
+    def _generate_products(self, db: Session, reference: Dict[str, Any], count: int) -> int:
+        start = (db.query(func.max(Product.product_id)).scalar() or 0) + 1
+        
+        def build(product_id: int) -> Tuple:
+            # Precios con cola larga: la mayoría baratos, algunos muy caros
+            list_price = Decimal(str(max(0.5, round(self.random.lognormvariate(4, 1.2), 2))))
+            return (product_id, f"Producto {product_id}", self.random.choice(reference["product_types"]), list_price)
+        
+        columns = ["product_id", "name", "product_type_id", "list_price"]
+        return self._generate_table(Product.__table__, columns, start, count, build)
+    
+    def _generate_table(self, table, columns: List[str], start: int, count: int, build: Callable[[int], Tuple]) -> int:
+        for offset in range(0, count, self.chunk_size):
+            ids = range(start + offset, start + min(offset + self.chunk_size, count))
+            self._load(table, columns, [build(id) for id in ids])
+            self.progress(table.name, offset + len(ids), count)
+        return count
+    
+    def _generate_sales(self, db: Session, reference: Dict[str, Any], count: int) -> Tuple[int, int]:
+        # Clientes y productos existentes (incluye los recién generados), leídos con cursor del servidor
+        customers = [
+            (row.customer_id, row.credit_terms_id)
+            for row in CustomerRepository().iter_all(db, as_rows=True)
+        ]
+        products = [
+            (row.product_id, row.list_price, row.product_type_id)
+            for row in ProductRepository().iter_all(db, as_rows=True)
+        ]
+        db.rollback()
+        if not customers or not products:
+            raise ValueError("Se necesitan clientes y productos para generar ventas")
+        
+        payment_methods = reference["payment_methods"]
+        payment_method_ids = list(payment_methods)
+        payment_method_weights = [PAYMENT_METHOD_WEIGHTS.get(payment_methods[id], 10) for id in payment_method_ids]
+        line_counts, line_count_weights = zip(*LINE_COUNT_WEIGHTS)
+        quantities, quantity_weights = zip(*QUANTITY_WEIGHTS)
+        
+        schedule: DiscountSchedule = reference["discount_schedule"]
+        
+        @lru_cache(maxsize=1 << 20)
+        def price(product_index: int, quantity: int, rates: DiscountRates) -> Dict[str, Any]:
+            return price_line_rates(products[product_index][1], quantity, rates)
+        
+        sale_columns = [
+            "sale_id", "customer_id", "payment_method_id", "sale_datetime", "tax_rate_percent",
+            "subtotal", "tax", "total", "total_discounts_amount"
+        ]
+        item_columns = [
+            "sale_item_id", "sale_id", "product_id", "quantity", "list_price", "product_type_discount",
+            "payment_method_discount", "credit_terms_discount", "line_subtotal_after_discounts"
+        ]
+        now = datetime.now()
+        window = self.days * 86400
+        total_items = 0
+        
+        for offset in range(0, count, self.chunk_size):
+            size = min(self.chunk_size, count - offset)
+            sale_line_counts = [
+                min(lines, len(products))
+                for lines in self.random.choices(line_counts, line_count_weights, k=size)
+            ]
+            # Rangos de IDs reservados en id_sequence, compatibles con el asignador de la API
+            sale_id = self.sequence_repo.reserve_block(db, Sale.sale_id, size)
+            sale_item_id = self.sequence_repo.reserve_block(db, SaleItem.sale_item_id, sum(sale_line_counts))
+            
+            sale_rows = []
+            item_rows = []
+            for lines in sale_line_counts:
+                customer_id, credit_terms_id = self.random.choice(customers)
+                payment_method_id = self.random.choices(payment_method_ids, payment_method_weights)[0]
+                # Cada venta se calcula con los descuentos vigentes en su fecha
+                sale_datetime = (now - timedelta(seconds=self.random.randrange(window))).replace(microsecond=0)
+                matrix = schedule.matrix_at(sale_datetime)
+                subtotal = Decimal('0')
+                total_discounts = Decimal('0')
+                for product_index in self.random.sample(range(len(products)), lines):
+                    quantity = self.random.choices(quantities, quantity_weights)[0]
+                    product_id, list_price, product_type_id = products[product_index]
+                    line = price(product_index, quantity, matrix.rates(product_type_id, payment_method_id, credit_terms_id))
+                    discounts = line["discounts"]
+                    item_rows.append((
+                        sale_item_id, sale_id, product_id, quantity, list_price,
+                        discounts["product_type_discount"], discounts["payment_method_discount"],
+                        discounts["credit_terms_discount"], line["line_total"]
+                    ))
+                    sale_item_id += 1
+                    subtotal += line["line_total"]
+                    total_discounts += discounts["total_discount"]
+                
+                tax = calculate_tax(subtotal)
+                sale_rows.append((
+                    sale_id, customer_id, payment_method_id, sale_datetime,
+                    TAX_RATE_PERCENT, subtotal, tax, subtotal + tax, total_discounts
+                ))
+                sale_id += 1
+            
+            self._load(Sale.__table__, sale_columns, sale_rows)
+            self._load(SaleItem.__table__, item_columns, item_rows)
+            total_items += len(item_rows)
+            self.progress("sale", offset + size, count)
+        
+        return count, total_items
+    
+    def _load(self, table, columns: List[str], rows: Sequence[Tuple]) -> None:
+        """Cargar un bloque de filas con la vía configurada, en su propia transacción"""
+        if not rows:
+            return
+        with self.engine.begin() as connection:
+            if self.method == "load_data":
+                self._load_data_infile(connection, table.name, columns, rows)
+            else:
+                connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+    
+    @staticmethod
+    def _load_data_infile(connection, table_name: str, columns: List[str], rows: Sequence[Tuple]) -> None:
+        """
+        Escribir el bloque como TSV temporal y cargarlo con LOAD DATA LOCAL INFILE
+        
+        Requiere `local_infile=1` en el servidor y en la conexión (connect_args).
+        Las llaves foráneas ya se validaron al generar, así que se desactivan las
+        revisiones durante la carga.
+        """
+        handle, path = tempfile.mkstemp(suffix=".tsv")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8", newline="") as tsv:
+                for row in rows:
+                    tsv.write("\t".join(str(value) for value in row))
+                    tsv.write("\n")
+            connection.exec_driver_sql("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+            try:
+                connection.exec_driver_sql(
+                    f"LOAD DATA LOCAL INFILE '{path.replace(os.sep, '/')}' INTO TABLE `{table_name}` "
+                    f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
+                    f"({', '.join(f'`{column}`' for column in columns)})"
+                )
+            finally:
+                connection.exec_driver_sql("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+        finally:
+            os.remove(path)
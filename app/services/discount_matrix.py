@@ -0,0 +1,64 @@
+from decimal import Decimal
+from typing import Dict, List
+from app.services.pricing import DiscountRates, discount_rates
+from app.services.shared_catalog import PaymentMethodRef
+
+# Método de pago con el que aplica el descuento por términos de crédito
+STORE_CREDIT = "Store Credit"
+
+class DiscountMatrix:
+    """
+    Reglas de descuento compiladas para todas las combinaciones
+    (tipo de producto × método de pago × términos de crédito)
+    
+    Cada celda guarda el DiscountRates de la combinación (porcentajes, factores
+    y banderas), con la regla de Store Credit ya resuelta. La tabla es una lista
+    plana indexada por los IDs (el índice 0 de cada eje es "sin descuento", y
+    ahí caen también los IDs mayores al último con descuento), así que calcular
+    una línea es un solo acceso a la tabla. Los catálogos tienen pocas filas y
+    IDs consecutivos, así que la tabla es chica.
+    
+    Es inmutable y se lee sin locks; DiscountSchedule compila una por cada tramo
+    de tiempo en que los porcentajes no cambian.
+    """
+    
+    def __init__(
+        self,
+        product_type_discounts: Dict[int, Decimal],
+        payment_method_discounts: Dict[int, Decimal],
+        credit_terms_discounts: Dict[int, Decimal],
+        payment_methods: Dict[int, PaymentMethodRef]
+    ):
+        self.product_types = max(product_type_discounts, default=0) + 1
+        self.credit_terms = max(credit_terms_discounts, default=0) + 1
+        self.payment_methods = max(payment_methods, default=0) + 1
+        
+        zero = Decimal('0')
+        table: List[DiscountRates] = []
+        for payment_method_id in range(self.payment_methods):
+            payment_method = payment_methods.get(payment_method_id)
+            applies_credit_terms = payment_method is not None and payment_method.name == STORE_CREDIT
+            payment_method_discount = payment_method_discounts.get(payment_method_id, zero)
+            for credit_terms_id in range(self.credit_terms):
+                credit_terms_discount = credit_terms_discounts.get(credit_terms_id, zero)
+                for product_type_id in range(self.product_types):
+                    table.append(discount_rates(
+                        product_type_discounts.get(product_type_id, zero),
+                        payment_method_discount,
+                        credit_terms_discount,
+                        applies_credit_terms
+                    ))
+        self._table = table
+    
+    def __len__(self) -> int:
+        return len(self._table)
+    
+    def rates(self, product_type_id: int, payment_method_id: int, credit_terms_id: int) -> DiscountRates:
+        """Descuentos de la combinación (IDs sin descuento configurado cuentan como 0)"""
+        if product_type_id >= self.product_types:
+            product_type_id = 0
+        if credit_terms_id >= self.credit_terms:
+            credit_terms_id = 0
+        if payment_method_id >= self.payment_methods:
+            payment_method_id = 0
+        return self._table[(payment_method_id * self.credit_terms + credit_terms_id) * self.product_types + product_type_id]
@@ -0,0 +1,105 @@
+from bisect import bisect_right
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.discount_matrix import DiscountMatrix
+from app.services.shared_catalog import DiscountRule
+
+class DiscountTimeline:
+    """
+    Porcentaje de una llave (tipo de producto, método de pago o términos de
+    crédito) a lo largo del tiempo
+    
+    Las vigencias de sus reglas parten el tiempo en tramos donde el porcentaje
+    es constante: `boundaries` son los inicios de tramo ordenados y `rates[i]`
+    el porcentaje del tramo que termina en `boundaries[i]` (el último no
+    termina). El porcentaje en T se resuelve con una búsqueda binaria.
+    
+    Si varias reglas están vigentes a la vez gana la que empezó más tarde (una
+    promoción programada sobre el descuento permanente); si empezaron al mismo
+    tiempo, la de menor ID, como cuando no había vigencias.
+    """
+    
+    def __init__(self, rules: List[DiscountRule]):
+        boundaries = sorted({
+            moment for rule in rules for moment in (rule.valid_from, rule.valid_to) if moment is not None
+        })
+        starts: List[Optional[datetime]] = [None] + boundaries
+        rates = [self._winner(rules, start) for start in starts]
+        
+        # Se fusionan los tramos contiguos con el mismo porcentaje
+        self.boundaries: List[datetime] = []
+        self.rates: List[Decimal] = [rates[0]]
+        for boundary, rate in zip(boundaries, rates[1:]):
+            if rate != self.rates[-1]:
+                self.boundaries.append(boundary)
+                self.rates.append(rate)
+    
+    def at(self, moment: datetime) -> Decimal:
+        """Porcentaje vigente en `moment` (0 si no hay regla vigente)"""
+        return self.rates[bisect_right(self.boundaries, moment)]
+    
+    @staticmethod
+    def _winner(rules: List[DiscountRule], start: Optional[datetime]) -> Decimal:
+        """Porcentaje del tramo que empieza en `start` (None = desde siempre)"""
+        best = None
+        for order, rule in enumerate(rules):
+            if rule.valid_from is not None and (start is None or rule.valid_from > start):
+                continue
+            if rule.valid_to is not None and start is not None and rule.valid_to <= start:
+                continue
+            rank = (rule.valid_from or datetime.min, -order)
+            if best is None or rank > best[0]:
+                best = (rank, rule.discount_percent)
+        return best[1] if best is not None else Decimal('0')
+
+class DiscountSchedule:
+    """
+    Índice de vigencias de todos los descuentos de una versión del catálogo
+    
+    Cada llave tiene su DiscountTimeline. Además se guardan juntos todos los
+    límites de vigencia: entre dos límites consecutivos ningún porcentaje
+    cambia, así que cada tramo tiene una sola DiscountMatrix, que se compila la
+    primera vez que se pide (una venta a la hora actual o el recálculo de una
+    venta pasada) y se reutiliza.
+    
+    Es inmutable salvo por la caché de matrices, donde una escritura
+    concurrente a lo sumo compila la misma matriz dos veces: se lee sin locks.
+    """
+    
+    def __init__(self, catalog: Any):
+        """`catalog` es un CatalogSnapshot o una SharedCatalogView"""
+        self.product_types = self._timelines(catalog.product_type_discounts)
+        self.payment_methods = self._timelines(catalog.payment_method_discounts)
+        self.credit_terms = self._timelines(catalog.credit_terms_discounts)
+        self._payment_method_refs = dict(catalog.payment_methods.items())
+        self.boundaries: List[datetime] = sorted({
+            boundary
+            for timelines in (self.product_types, self.payment_methods, self.credit_terms)
+            for timeline in timelines.values()
+            for boundary in timeline.boundaries
+        })
+        self._matrices: Dict[int, DiscountMatrix] = {}
+    
+    def rates_at(self, moment: datetime) -> Tuple[Dict[int, Decimal], Dict[int, Decimal], Dict[int, Decimal]]:
+        """Porcentajes vigentes en `moment` por tipo de producto, método de pago y términos de crédito"""
+        return tuple(
+            {key: timeline.at(moment) for key, timeline in timelines.items()}
+            for timelines in (self.product_types, self.payment_methods, self.credit_terms)
+        )
+    
+    def matrix_at(self, moment: datetime) -> DiscountMatrix:
+        """Matriz de descuentos vigente en `moment`"""
+        period = bisect_right(self.boundaries, moment)
+        matrix = self._matrices.get(period)
+        if matrix is None:
+            matrix = DiscountMatrix(*self.rates_at(moment), self._payment_method_refs)
+            self._matrices[period] = matrix
+        return matrix
+    
+    @staticmethod
+    def _timelines(rules: List[DiscountRule]) -> Dict[int, DiscountTimeline]:
+        by_key: Dict[int, List[DiscountRule]] = {}
+        for rule in rules:
+            by_key.setdefault(rule.key, []).append(rule)
+        return {key: DiscountTimeline(key_rules) for key, key_rules in by_key.items()}
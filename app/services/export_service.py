@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.database.models import Sale, SaleItem
+from app.repositories.sale_item_repository import SaleItemRepository
+from app.storage import get_repository, open_session
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: solo se necesita para las exportaciones
+    pa = None
+    pq = None
+
+# Columnas exportadas: una fila por item de venta con los datos de su venta
+_EXPORT_COLUMNS = [
+    Sale.sale_id,
+    Sale.customer_id,
+    Sale.payment_method_id,
+    Sale.sale_datetime,
+    Sale.tax_rate_percent,
+    Sale.subtotal,
+    Sale.tax,
+    Sale.total,
+    Sale.total_discounts_amount,
+    SaleItem.sale_item_id,
+    SaleItem.product_id,
+    SaleItem.quantity,
+    SaleItem.list_price,
+    SaleItem.product_type_discount,
+    SaleItem.payment_method_discount,
+    SaleItem.credit_terms_discount,
+    SaleItem.line_subtotal_after_discounts,
+]
+
+def _arrow_type(column):
+    """Tipo Arrow equivalente a una columna del modelo"""
+    if column.name.endswith("_datetime"):
+        return pa.timestamp("us")
+    if column.name.endswith("_id") or column.name == "quantity":
+        return pa.int64()
+    return pa.decimal128(column.type.precision, column.type.scale)
+
+class _ChunkSink:
+    """Destino tipo archivo que acumula lo escrito para enviarlo por partes"""
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+class SalesExportService:
+    """
+    Exportación columnar (Parquet / Arrow IPC) de ventas con sus items
+    
+    Lee `sale` unido a `sale_item` con un cursor del lado del servidor y
+    convierte cada bloque de filas en un RecordBatch de Arrow, así la memoria
+    usada depende del tamaño de bloque y no del número de filas exportadas.
+    """
+    
+    def __init__(self, chunk_size: int = settings.EXPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.sale_item_repo = get_repository(SaleItemRepository)
+    
+    @staticmethod
+    def is_available() -> bool:
+        """pyarrow está instalado"""
+        return pa is not None
+    
+    @staticmethod
+    def schema():
+        """Esquema Arrow de la exportación"""
+        return pa.schema([(column.name, _arrow_type(column)) for column in _EXPORT_COLUMNS])
+    
+    def iter_record_batches(
+        self,
+        db: Session,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Iterator["pa.RecordBatch"]:
+        """Recorrer la exportación como RecordBatches de `chunk_size` filas"""
+        schema = self.schema()
+        for rows in self.sale_item_repo.iter_with_sales(
+            db, _EXPORT_COLUMNS, start_date, end_date, batch_size=self.chunk_size
+        ):
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            )
+    
+    def write_parquet(self, db: Session, where, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> int:
+        """Escribir la exportación en formato Parquet y devolver el número de filas"""
+        rows = 0
+        with pq.ParquetWriter(where, self.schema(), compression="zstd") as writer:
+            for batch in self.iter_record_batches(db, start_date, end_date):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        return rows
+    
+    def write_arrow(self, db: Session, where, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> int:
+        """Escribir la exportación como stream Arrow IPC y devolver el número de filas"""
+        rows = 0
+        with pa.ipc.new_stream(where, self.schema()) as writer:
+            for batch in self.iter_record_batches(db, start_date, end_date):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        return rows
+    
+    def stream_parquet(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Iterator[bytes]:
+        """Generar el archivo Parquet por partes (un row group por bloque) para una respuesta HTTP"""
+        yield from self._stream(pq.ParquetWriter, start_date, end_date, compression="zstd")
+    
+    def stream_arrow(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Iterator[bytes]:
+        """Generar el stream Arrow IPC por partes para una respuesta HTTP"""
+        yield from self._stream(pa.ipc.new_stream, start_date, end_date)
+    
+    def _stream(self, writer_factory, start_date, end_date, **writer_options) -> Iterator[bytes]:
+        # Sesión propia: el generador sigue vivo después de que el endpoint retorna
+        db = open_session()
+        sink = _ChunkSink()
+        try:
+            writer = writer_factory(sink, self.schema(), **writer_options)
+            for batch in self.iter_record_batches(db, start_date, end_date):
+                writer.write_batch(batch)
+                yield sink.drain()
+            writer.close()
+            yield sink.drain()
+        finally:
+            db.close()
@@ -0,0 +1,54 @@
+import threading
+from typing import Dict, List
+from sqlalchemy.exc import IntegrityError
+from app.config.settings import settings
+from app.repositories.id_sequence_repository import IdSequenceRepository
+from app.storage import get_repository, open_session
+
+class BlockIdAllocator:
+    """
+    Asignador de IDs por bloques (hi-lo)
+    
+    Cada proceso reserva rangos de IDs en la tabla `id_sequence` y los reparte
+    en memoria, de modo que las filas padre e hijo de una venta se pueden
+    construir antes de escribirlas, sin esperar al autoincrement.
+    """
+    
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self.sequence_repo = get_repository(IdSequenceRepository)
+        # nombre de tabla -> [siguiente ID libre, fin del bloque (exclusivo)]
+        self._blocks: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+    
+    def allocate(self, id_column, count: int = 1) -> List[int]:
+        """Obtener `count` IDs únicos para la columna indicada"""
+        name = id_column.property.columns[0].table.name
+        ids: List[int] = []
+        with self._lock:
+            block = self._blocks.setdefault(name, [0, 0])
+            while len(ids) < count:
+                if block[0] >= block[1]:
+                    size = max(self.block_size, count - len(ids))
+                    start = self._reserve_block(id_column, size)
+                    block[0], block[1] = start, start + size
+                take = min(count - len(ids), block[1] - block[0])
+                ids.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return ids
+    
+    def _reserve_block(self, id_column, size: int) -> int:
+        """Reservar un bloque nuevo en una transacción independiente"""
+        db = open_session()
+        try:
+            try:
+                return self.sequence_repo.reserve_block(db, id_column, size)
+            except IntegrityError:
+                # Otro proceso inicializó la secuencia al mismo tiempo: reintentar
+                db.rollback()
+                return self.sequence_repo.reserve_block(db, id_column, size)
+        finally:
+            db.close()
+
+# Instancia global del asignador
+id_allocator = BlockIdAllocator(settings.ID_BLOCK_SIZE)
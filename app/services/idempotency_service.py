@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.storage import get_repository
+
+class StoredResponse(NamedTuple):
+    """Respuesta guardada para una llave de idempotencia"""
+    request_hash: str
+    status_code: int
+    body: bytes
+    replayed: bool = False
+
+class IdempotencyKeyMismatch(ValueError):
+    """La llave ya se usó con una solicitud distinta"""
+
+class IdempotencyKeyInProgress(Exception):
+    """La solicitud original sigue en curso y no terminó a tiempo"""
+
+class IdempotencyService:
+    """
+    Servicio de idempotencia para solicitudes de escritura
+    
+    - Caché LRU en proceso delante de la tabla `idempotency_key`
+    - Los duplicados en curso dentro del proceso esperan a la primera solicitud
+    - Los duplicados de otros procesos esperan a que la fila quede completada
+    """
+    
+    def __init__(self, cache_size: int, wait_timeout: float, poll_interval: float):
+        self.repo = get_repository(IdempotencyRepository)
+        self.cache_size = cache_size
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._cache: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+    
+    @staticmethod
+    def fingerprint(method: str, path: str, payload: Any) -> str:
+        """Huella de la solicitud para detectar llaves reutilizadas con otro cuerpo"""
+        canonical = json.dumps([method, path, payload], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    async def execute(
+        self,
+        db: Session,
+        key: str,
+        request_hash: str,
+        handler: Callable[[], Awaitable[Tuple[int, bytes]]]
+    ) -> StoredResponse:
+        """
+        Ejecutar `handler` una sola vez por llave
+        
+        `handler` es una corrutina que devuelve (status_code, cuerpo). Las
+        respuestas 5xx no se guardan y liberan la llave para permitir el reintento.
+        """
+        while True:
+            stored = self._lookup(db, key)
+            if stored is not None:
+                return self._replay(stored, request_hash)
+            
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                # Esperar a la primera solicitud; si falló, volver a intentar
+                await asyncio.shield(in_flight)
+                continue
+            
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            result: Optional[StoredResponse] = None
+            try:
+                if not self.repo.claim(db, key, request_hash):
+                    result = await self._wait_for_completion(db, key)
+                    if result is None:
+                        continue
+                    return self._replay(result, request_hash)
+                
+                try:
+                    status_code, body = await handler()
+                except Exception:
+                    self.repo.release(db, key)
+                    raise
+                
+                if status_code >= 500:
+                    self.repo.release(db, key)
+                    return StoredResponse(request_hash, status_code, body)
+                
+                result = StoredResponse(request_hash, status_code, body)
+                self.repo.complete(db, key, status_code, body)
+                self._remember(key, result)
+                return result
+            finally:
+                self._in_flight.pop(key, None)
+                future.set_result(result)
+    
+    def _lookup(self, db: Session, key: str) -> Optional[StoredResponse]:
+        """Buscar una respuesta completada, primero en la caché LRU y luego en la BD"""
+        stored = self._cache.get(key)
+        if stored is not None:
+            self._cache.move_to_end(key)
+            return stored
+        
+        record = self.repo.get_by_key(db, key)
+        if record is None or record.status_code is None:
+            return None
+        stored = StoredResponse(record.request_hash, record.status_code, record.response_body)
+        self._remember(key, stored)
+        return stored
+    
+    async def _wait_for_completion(self, db: Session, key: str) -> Optional[StoredResponse]:
+        """
+        Esperar a que otro proceso complete la llave
+        
+        Devuelve None si la llave fue liberada (la solicitud original falló).
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            # Cerrar la transacción para ver los cambios confirmados por otros procesos
+            db.rollback()
+            record = self.repo.get_by_key(db, key)
+            if record is None:
+                return None
+            if record.status_code is not None:
+                stored = StoredResponse(record.request_hash, record.status_code, record.response_body)
+                self._remember(key, stored)
+                return stored
+        raise IdempotencyKeyInProgress(f"La solicitud con la llave '{key}' sigue en curso")
+    
+    def _replay(self, stored: StoredResponse, request_hash: str) -> StoredResponse:
+        """Devolver la respuesta guardada validando que la solicitud sea la misma"""
+        if stored.request_hash != request_hash:
+            raise IdempotencyKeyMismatch("La llave de idempotencia ya se usó con una solicitud distinta")
+        return stored._replace(replayed=True)
+    
+    def _remember(self, key: str, stored: StoredResponse) -> None:
+        """Guardar en la caché LRU respetando el tamaño máximo"""
+        self._cache[key] = stored
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+# Instancia global del servicio de idempotencia
+idempotency_service = IdempotencyService(
+    cache_size=settings.IDEMPOTENCY_CACHE_SIZE,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+    poll_interval=settings.IDEMPOTENCY_POLL_INTERVAL
+)
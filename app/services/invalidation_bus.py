@@ -0,0 +1,281 @@
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+from sqlalchemy import select, update
+from app.config.settings import settings
+from app.database.dialects import insert_ignore
+from app.database.models import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+# Temas de invalidación (uno por familia de datos cacheados)
+TOPIC_DISCOUNTS = "discounts"
+TOPIC_PRODUCTS = "products"
+TOPIC_SALES = "sales"
+
+# Acciones
+ACTION_CREATED = "created"
+ACTION_UPDATED = "updated"
+ACTION_DELETED = "deleted"
+
+# Identificador de este proceso como origen de eventos
+ORIGIN = f"{socket.gethostname()}:{os.getpid()}"
+
+class InvalidationEvent(NamedTuple):
+    """Cambio en los datos de un tema; `key` es el ID afectado o None si son varios"""
+    topic: str
+    action: str
+    key: Optional[int]
+    origin: str
+    published_at: float
+    
+    @property
+    def is_local(self) -> bool:
+        """El evento se publicó en este proceso"""
+        return self.origin == ORIGIN
+
+class VersionTableTransport:
+    """
+    Transporte por tabla de versiones (`cache_version`)
+    
+    Publicar incrementa la versión del tema en la base de datos; cada proceso
+    consulta la tabla cada `poll_interval` segundos y emite un evento
+    `updated` (sin llave) por cada tema cuya versión avanzó por escrituras de
+    otros procesos. La antigüedad máxima de un dato cacheado es el intervalo
+    de consulta.
+    """
+    
+    name = "version_table"
+    
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._versions: Optional[Dict[str, int]] = None
+        # Versiones escritas por este proceso aún no vistas por el poller (no se reenvían)
+        self._own_versions: Dict[str, Set[int]] = defaultdict(set)
+        self._lock = threading.Lock()
+    
+    @property
+    def max_staleness(self) -> float:
+        return self.poll_interval
+    
+    def send(self, event: InvalidationEvent) -> None:
+        from app.database.connection import SessionLocal
+        db = SessionLocal()
+        try:
+            advance = update(CacheVersion).where(
+                CacheVersion.topic == event.topic
+            ).values(version=CacheVersion.version + 1)
+            if db.execute(advance).rowcount == 0:
+                db.execute(insert_ignore(db, CacheVersion.__table__), {"topic": event.topic, "version": 0})
+                db.execute(advance)
+            # La fila queda bloqueada hasta el commit: la versión leída es la que escribimos
+            version = db.execute(
+                select(CacheVersion.version).where(CacheVersion.topic == event.topic)
+            ).scalar_one()
+            # Commit y registro bajo el candado del poller: nunca lee la versión sin su registro
+            with self._lock:
+                db.commit()
+                self._own_versions[event.topic].add(version)
+        finally:
+            db.close()
+    
+    def listen(self, deliver: Callable[[InvalidationEvent], None], stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                with self._lock:
+                    versions = self._read_versions()
+                    own_versions = {}
+                    for topic, version in versions.items():
+                        written = self._own_versions.get(topic, set())
+                        own_versions[topic] = {own for own in written if own <= version}
+                        written -= own_versions[topic]
+            except Exception:
+                logger.exception("Error al consultar la tabla de versiones de caché")
+                stop.wait(self.poll_interval)
+                continue
+            if self._versions is not None:
+                # Un tema nuevo parte de la versión 0 (ver `send`); solo se omiten
+                # las versiones que escribió este proceso
+                for topic, version in versions.items():
+                    previous = self._versions.get(topic, 0)
+                    own = sum(1 for own in own_versions[topic] if own > previous)
+                    if version - previous > own:
+                        deliver(InvalidationEvent(topic, ACTION_UPDATED, None, self.name, time.time()))
+            # La primera lectura solo fija las versiones de partida
+            self._versions = versions
+            stop.wait(self.poll_interval)
+    
+    def close(self) -> None:
+        pass
+    
+    @staticmethod
+    def _read_versions() -> Dict[str, int]:
+        from app.database.connection import SessionLocal
+        db = SessionLocal()
+        try:
+            return dict(db.execute(select(CacheVersion.topic, CacheVersion.version)).all())
+        finally:
+            db.close()
+
+class UnixSocketTransport:
+    """
+    Transporte por sockets UNIX de datagramas entre los workers del host
+    
+    Cada proceso escucha en `<directorio>/<pid>.sock`; publicar envía el
+    evento a todos los demás sockets del directorio. Los sockets de procesos
+    que ya no existen se eliminan al fallar el envío. La entrega es inmediata,
+    pero solo alcanza a los procesos del mismo host.
+    """
+    
+    name = "unix_socket"
+    
+    def __init__(self, directory: str, socket_name: Optional[str] = None):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{socket_name or os.getpid()}.sock")
+        self._socket: Optional[socket.socket] = None
+    
+    @property
+    def max_staleness(self) -> float:
+        return 0.0
+    
+    def send(self, event: InvalidationEvent) -> None:
+        message = json.dumps(event._asdict()).encode("utf-8")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            for path in glob.glob(os.path.join(self.directory, "*.sock")):
+                if path == self.path:
+                    continue
+                try:
+                    sender.sendto(message, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Proceso terminado sin limpiar su socket
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                except BlockingIOError:
+                    logger.warning("Cola llena en %s; el evento de invalidación se descartó", path)
+    
+    def listen(self, deliver: Callable[[InvalidationEvent], None], stop: threading.Event) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.path)
+        self._socket.settimeout(0.5)
+        while not stop.is_set():
+            try:
+                message = self._socket.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                deliver(InvalidationEvent(**json.loads(message)))
+            except Exception:
+                logger.exception("Evento de invalidación inválido")
+    
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+class InvalidationBus:
+    """
+    Bus de invalidación de cachés entre procesos
+    
+    Los routers publican un evento tipado al escribir; se entrega de inmediato
+    a los suscriptores de este proceso y, por el transporte configurado, a los
+    de los demás workers. Sin transporte (`none`) solo hay entrega local.
+    """
+    
+    def __init__(self, transport=None, origin: str = ORIGIN):
+        self.transport = transport
+        self.origin = origin
+        self._subscribers: Dict[str, List[Callable[[InvalidationEvent], None]]] = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._published = 0
+        self._received = 0
+        self._max_lag = 0.0
+    
+    def subscribe(self, topic: str, callback: Callable[[InvalidationEvent], None]) -> None:
+        """Registrar `callback` para los eventos de un tema"""
+        self._subscribers[topic].append(callback)
+    
+    def publish(self, topic: str, action: str = ACTION_UPDATED, key: Optional[int] = None) -> InvalidationEvent:
+        """Publicar un cambio: entrega local inmediata y envío a los demás procesos"""
+        event = InvalidationEvent(topic, action, key, self.origin, time.time())
+        self._published += 1
+        self._dispatch(event)
+        if self.transport is not None:
+            try:
+                self.transport.send(event)
+            except Exception:
+                # La escritura ya se confirmó: los demás procesos quedan acotados por el TTL
+                logger.exception("Error al enviar el evento de invalidación %s", event.topic)
+        return event
+    
+    def start(self) -> None:
+        """Arrancar el hilo que recibe los eventos de otros procesos"""
+        if self.transport is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.transport.listen,
+            args=(self._receive, self._stop),
+            name="invalidation-bus",
+            daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detener la recepción y liberar el transporte"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.transport.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores y antigüedad máxima que puede tener un dato cacheado"""
+        return {
+            "transport": self.transport.name if self.transport is not None else "none",
+            "max_staleness_seconds": self.transport.max_staleness if self.transport is not None else None,
+            "published": self._published,
+            "received": self._received,
+            "max_delivery_lag_ms": round(self._max_lag * 1000, 2)
+        }
+    
+    def _receive(self, event: InvalidationEvent) -> None:
+        if event.origin == self.origin:
+            return
+        self._received += 1
+        self._max_lag = max(self._max_lag, time.time() - event.published_at)
+        self._dispatch(event)
+    
+    def _dispatch(self, event: InvalidationEvent) -> None:
+        for callback in self._subscribers.get(event.topic, ()):
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Error en un suscriptor de invalidación de %s", event.topic)
+
+def _build_transport():
+    if settings.INVALIDATION_TRANSPORT == "version_table":
+        return VersionTableTransport(settings.INVALIDATION_POLL_INTERVAL)
+    if settings.INVALIDATION_TRANSPORT == "unix_socket":
+        return UnixSocketTransport(settings.INVALIDATION_SOCKET_DIR)
+    return None
+
+# Instancia global del bus de invalidación
+invalidation_bus = InvalidationBus(_build_transport())
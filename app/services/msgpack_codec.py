@@ -0,0 +1,85 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: sin él las respuestas siempre son JSON
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional: sin él no se comprime
+    zstandard = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Tipo de extensión para Decimal: el valor exacto como texto UTF-8 (p. ej. b"1234.50")
+DECIMAL_EXT_TYPE = 1
+
+def is_available() -> bool:
+    return msgpack is not None
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(DECIMAL_EXT_TYPE, str(value).encode("utf-8"))
+    if isinstance(value, (datetime, date)):
+        # Mismo formato que en JSON (las fechas del sistema no llevan zona horaria)
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable en MessagePack: {type(value).__name__}")
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == DECIMAL_EXT_TYPE:
+        return Decimal(data.decode("utf-8"))
+    return msgpack.ExtType(code, data)
+
+def packb(value: Any) -> bytes:
+    """Serializar a MessagePack con los Decimal como extensión (sin pérdida de precisión)"""
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+def unpackb(data: bytes) -> Any:
+    """Deserializar MessagePack reconstruyendo los Decimal"""
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False)
+
+def compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+def decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+def _accepted(params: str) -> bool:
+    """Los parámetros de un elemento de Accept/Accept-Encoding no lo rechazan (q=0)"""
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value.strip()) > 0
+            except ValueError:
+                return False
+    return True
+
+def accepts_msgpack(accept: Optional[str]) -> bool:
+    """El header Accept pide MessagePack (sin q=0)"""
+    if not accept:
+        return False
+    for media_range in accept.split(","):
+        media_type, _, params = media_range.strip().partition(";")
+        if media_type.strip().lower() in MSGPACK_MEDIA_TYPES:
+            return _accepted(params)
+    return False
+
+def accepts_zstd(accept_encoding: Optional[str]) -> bool:
+    """El header Accept-Encoding admite zstd (sin q=0)"""
+    if not accept_encoding:
+        return False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() == "zstd":
+            return _accepted(params)
+    return False
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
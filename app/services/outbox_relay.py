@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from app.config.settings import settings
+from app.repositories.outbox_repository import OutboxRepository
+from app.storage import get_repository, open_session
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se borran los eventos vencidos (segundos)
+PURGE_INTERVAL = 3600
+
+# IDs saltados que se siguen revisando a la vez (los de huecos más grandes se dan por perdidos)
+MAX_WATCHED_GAPS = 10000
+
+class EventRecord(NamedTuple):
+    """Evento del outbox con su JSON ya armado (`data`), listo para el feed"""
+    event_id: int
+    event_type: str
+    data: str
+
+def to_record(row: Any) -> EventRecord:
+    created_at = row.created_at.isoformat() if isinstance(row.created_at, datetime) else str(row.created_at)
+    data = (
+        f'{{"event_id":{row.event_id},"event_type":"{row.event_type}",'
+        f'"aggregate_id":{row.aggregate_id},"created_at":"{created_at}","payload":{row.payload}}}'
+    )
+    return EventRecord(row.event_id, row.event_type, data)
+
+class OutboxRelay:
+    """
+    Relay del outbox de ventas: lee los eventos nuevos en orden de ID y los
+    entrega a los consumidores de GET /events
+    
+    Un hilo por worker consulta la tabla cada `poll_interval` segundos (o al
+    momento, si este proceso escribió) en lotes de `batch_size` y guarda los
+    últimos `buffer_size` eventos en memoria; los consumidores al día se
+    sirven de ahí y los atrasados leen la tabla. `position` es el último ID
+    entregado: todo lo anterior ya es visible, así un cursor nunca se salta
+    un evento. Un hueco en los IDs puede ser una transacción que aún no hizo
+    commit, así que se espera hasta `gap_timeout` segundos antes de seguir.
+    
+    Los IDs saltados se siguen revisando en cada lectura durante `late_window`
+    segundos: si aparece el evento (una transacción lenta que hizo commit
+    tarde) se mueve al final del outbox con un ID nuevo (`reappend`) y se
+    entrega como cualquier evento nuevo, también a los cursores que ya habían
+    pasado el ID original. Las lecturas de la tabla omiten los IDs en revisión,
+    así el evento no sale dos veces. Si pasa `late_window` se da por
+    descartado (rollback); `stats()` informa los que se recuperaron y los que
+    se dieron por perdidos.
+    
+    Sin el hilo (por ejemplo, sin el lifespan de la aplicación) las lecturas
+    consultan la tabla al momento.
+    """
+    
+    def __init__(
+        self,
+        batch_size: int,
+        poll_interval: float,
+        buffer_size: int,
+        gap_timeout: float,
+        retention_days: int,
+        late_window: float = 300.0
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.buffer_size = buffer_size
+        self.gap_timeout = gap_timeout
+        self.late_window = late_window
+        self.retention_days = retention_days
+        self.outbox_repo = get_repository(OutboxRepository)
+        self.position: Optional[int] = None
+        self._ids: List[int] = []
+        self._events: List[EventRecord] = []
+        self._gap_since: Optional[float] = None
+        # IDs saltados en revisión -> momento en que se saltaron
+        self._watched_gaps: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_purge = 0.0
+        self._relayed = 0
+        self._skipped_ids = 0
+        self._late_events = 0
+        self._lost_ids = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+    
+    # Hilo del relay
+    def start(self) -> None:
+        """Arrancar el hilo que sigue la tabla del outbox"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detener el hilo del relay"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def notify(self) -> None:
+        """Avisar que este proceso escribió eventos: el relay los lee sin esperar al intervalo"""
+        self._wake.set()
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                while self.poll() == self.batch_size:
+                    pass
+                self._purge()
+            except Exception:
+                logger.exception("Error al leer el outbox de eventos; se reintentará")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+    
+    def poll(self) -> int:
+        """Leer un lote de eventos nuevos y devolver cuántos se entregaron"""
+        with self._poll_lock:
+            db = open_session()
+            try:
+                if self.position is None:
+                    # Se empieza desde el final: los eventos anteriores se leen de la tabla
+                    self.position = self.outbox_repo.get_last_id(db)
+                    return 0
+                if self._watched_gaps:
+                    self._recheck_gaps(db)
+                rows = self.outbox_repo.get_after(db, self.position, self.batch_size)
+            finally:
+                db.close()
+            
+            accepted: List[EventRecord] = []
+            expected = self.position + 1
+            for row in rows:
+                if row.event_id != expected:
+                    now = time.monotonic()
+                    if self._gap_since is None:
+                        self._gap_since = now
+                    if now - self._gap_since < self.gap_timeout:
+                        break
+                    self._skip(range(expected, row.event_id), now)
+                self._gap_since = None
+                accepted.append(to_record(row))
+                expected = row.event_id + 1
+            if accepted:
+                self._deliver(accepted)
+            return len(accepted)
+    
+    def _skip(self, event_ids: range, now: float) -> None:
+        """Seguir revisando los IDs de un hueco que se deja atrás"""
+        self._skipped_ids += len(event_ids)
+        watched = event_ids[:max(0, MAX_WATCHED_GAPS - len(self._watched_gaps))]
+        gaps = dict(self._watched_gaps)
+        gaps.update((event_id, now) for event_id in watched)
+        # Se reemplaza el dict (no se modifica): read() lo recorre sin lock
+        self._watched_gaps = gaps
+        if len(watched) < len(event_ids):
+            self._lost_ids += len(event_ids) - len(watched)
+            logger.warning("Outbox: %s IDs saltados sin revisar (límite de %s)", len(event_ids) - len(watched), MAX_WATCHED_GAPS)
+    
+    def _recheck_gaps(self, db) -> None:
+        """Mover al final los eventos que llegaron tarde a un hueco y olvidar los vencidos"""
+        now = time.monotonic()
+        gaps = {event_id: since for event_id, since in self._watched_gaps.items() if now - since < self.late_window}
+        expired = len(self._watched_gaps) - len(gaps)
+        if expired:
+            self._lost_ids += expired
+            logger.warning("Outbox: %s IDs saltados no aparecieron en %s s; se dan por descartados", expired, self.late_window)
+        moved = self.outbox_repo.reappend(db, list(gaps)) if gaps else []
+        if moved:
+            self._late_events += len(moved)
+            logger.warning("Outbox: %s eventos llegaron tarde y se volvieron a agregar al final", len(moved))
+            for event_id in moved:
+                del gaps[event_id]
+        self._watched_gaps = gaps
+    
+    def _deliver(self, records: List[EventRecord]) -> None:
+        with self._lock:
+            ids = self._ids + [record.event_id for record in records]
+            events = self._events + records
+            if len(events) > self.buffer_size:
+                ids = ids[-self.buffer_size:]
+                events = events[-self.buffer_size:]
+            # Se reemplazan las listas (no se modifican): los lectores no toman el lock para recorrerlas
+            self._ids, self._events = ids, events
+            self.position = records[-1].event_id
+            self._relayed += len(records)
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+    
+    def _purge(self) -> None:
+        if self.retention_days <= 0 or time.monotonic() - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = time.monotonic()
+        db = open_session()
+        try:
+            purged = self.outbox_repo.purge_before(db, datetime.now() - timedelta(days=self.retention_days))
+        finally:
+            db.close()
+        if purged:
+            logger.info("Outbox: %s eventos vencidos eliminados", purged)
+    
+    # Lectura del feed
+    def read(self, after: int, limit: int) -> Tuple[List[EventRecord], int]:
+        """
+        Eventos con ID mayor a `after` (hasta `limit`) y el cursor para la
+        siguiente lectura
+        """
+        if not self.is_running:
+            while self.poll() == self.batch_size:
+                pass
+        position = self.position or 0
+        if after >= position:
+            return [], after
+        ids, events = self._ids, self._events
+        if ids and after >= ids[0] - 1:
+            start = bisect_right(ids, after)
+            records = events[start:start + limit]
+        else:
+            db = open_session()
+            try:
+                rows = self.outbox_repo.get_after(db, after, limit, until=position)
+            finally:
+                db.close()
+            # Un ID en revisión que ya hizo commit se entregará con su ID nuevo
+            watched = self._watched_gaps
+            records = [to_record(row) for row in rows if row.event_id not in watched]
+            if len(rows) == limit:
+                return records, rows[-1].event_id
+        if len(records) < limit:
+            # Lo que falta hasta `position` son huecos de IDs saltados
+            return records, position
+        return records, records[-1].event_id
+    
+    async def wait(self, after: int, timeout: float) -> bool:
+        """Esperar (sin bloquear el event loop) a que haya eventos después de `after`"""
+        deadline = time.monotonic() + timeout
+        loop = asyncio.get_running_loop()
+        while (self.position or 0) <= after:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if not self.is_running:
+                # Sin hilo se consulta la tabla en cada intervalo
+                await asyncio.sleep(min(remaining, self.poll_interval))
+                await asyncio.to_thread(self.poll)
+                continue
+            future = loop.create_future()
+            with self._lock:
+                if (self.position or 0) > after:
+                    break
+                self._waiters.append((loop, future))
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    if (loop, future) in self._waiters:
+                        self._waiters.remove((loop, future))
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "position": self.position,
+            "buffered": len(self._events),
+            "relayed": self._relayed,
+            "skipped_ids": self._skipped_ids,
+            "watched_gaps": len(self._watched_gaps),
+            "late_events": self._late_events,
+            "lost_ids": self._lost_ids,
+            "waiting": len(self._waiters)
+        }
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+# Instancia global del relay del outbox
+outbox_relay = OutboxRelay(
+    batch_size=settings.OUTBOX_RELAY_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    buffer_size=settings.OUTBOX_BUFFER_SIZE,
+    gap_timeout=settings.OUTBOX_GAP_TIMEOUT,
+    retention_days=settings.OUTBOX_RETENTION_DAYS,
+    late_window=settings.OUTBOX_LATE_WINDOW
+)
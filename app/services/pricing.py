@@ -0,0 +1,107 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, NamedTuple
+
+# Tasa de impuesto aplicada sobre el subtotal después de descuentos
+TAX_RATE_PERCENT = Decimal('16.0')
+
+_CENT = Decimal('0.01')
+
+def _round(amount: Decimal) -> Decimal:
+    return amount.quantize(_CENT, rounding=ROUND_HALF_UP)
+
+class DiscountRates(NamedTuple):
+    """
+    Descuentos de una combinación (tipo de producto, método de pago, términos de
+    crédito) listos para aplicar: los porcentajes y el factor (1 - % / 100) de
+    cada paso
+    """
+    product_type: Decimal
+    payment_method: Decimal
+    credit_terms: Decimal
+    product_type_factor: Decimal
+    payment_method_factor: Decimal
+    credit_terms_factor: Decimal
+    # El método de pago es Store Credit (aplica el descuento por términos de crédito)
+    applies_credit_terms: bool
+    # Algún porcentaje es distinto de cero
+    has_discount: bool
+
+def discount_rates(
+    product_type_discount: Decimal,
+    payment_method_discount: Decimal,
+    credit_terms_discount: Decimal,
+    applies_credit_terms: bool = True
+) -> DiscountRates:
+    """Compilar los porcentajes de una combinación; sin Store Credit el de crédito queda en 0"""
+    if not applies_credit_terms:
+        credit_terms_discount = Decimal('0')
+    return DiscountRates(
+        product_type=product_type_discount,
+        payment_method=payment_method_discount,
+        credit_terms=credit_terms_discount,
+        product_type_factor=1 - product_type_discount / Decimal('100'),
+        payment_method_factor=1 - payment_method_discount / Decimal('100'),
+        credit_terms_factor=1 - credit_terms_discount / Decimal('100'),
+        applies_credit_terms=applies_credit_terms,
+        has_discount=bool(product_type_discount or payment_method_discount or credit_terms_discount)
+    )
+
+def price_line(
+    list_price: Decimal,
+    quantity: int,
+    product_type_discount: Decimal,
+    payment_method_discount: Decimal,
+    credit_terms_discount: Decimal
+) -> Dict[str, Any]:
+    """
+    Calcular una línea de venta con descuentos secuenciales
+    
+    Secuencia: Base → ProductType → PaymentMethod → CreditTerms, redondeando
+    a 2 decimales después de cada paso. Los descuentos son porcentajes; el de
+    términos de crédito debe llegar en 0 si el método de pago no es Store Credit.
+    """
+    return price_line_rates(
+        list_price,
+        quantity,
+        discount_rates(product_type_discount, payment_method_discount, credit_terms_discount)
+    )
+
+def price_line_rates(list_price: Decimal, quantity: int, rates: DiscountRates) -> Dict[str, Any]:
+    """
+    Calcular una línea de venta con descuentos ya compilados (ver price_line)
+    
+    Un paso con descuento 0 multiplica por 1 y el redondeo no cambia el monto,
+    así que las tres etapas se aplican siempre, sin condiciones.
+    """
+    # Precio base de la línea
+    line_base = list_price * quantity
+    
+    # 1. Descuento por tipo de producto
+    line_after_product_discount = _round(line_base * rates.product_type_factor)
+    
+    # 2. Descuento por método de pago
+    line_after_payment_discount = _round(line_after_product_discount * rates.payment_method_factor)
+    
+    # 3. Descuento por términos de crédito
+    line_after_credit_discount = _round(line_after_payment_discount * rates.credit_terms_factor)
+    
+    # Calcular montos de descuento
+    product_type_discount_amount = _round(line_base - line_after_product_discount)
+    payment_method_discount_amount = _round(line_after_product_discount - line_after_payment_discount)
+    credit_terms_discount_amount = _round(line_after_payment_discount - line_after_credit_discount)
+    
+    total_discount = product_type_discount_amount + payment_method_discount_amount + credit_terms_discount_amount
+    
+    return {
+        "line_total": line_after_credit_discount,
+        "discounts": {
+            "product_type_discount": product_type_discount_amount,
+            "payment_method_discount": payment_method_discount_amount,
+            "credit_terms_discount": credit_terms_discount_amount,
+            "total_discount": total_discount
+        }
+    }
+
+def calculate_tax(subtotal: Decimal, tax_rate: Decimal = TAX_RATE_PERCENT) -> Decimal:
+    """Impuesto sobre el subtotal después de descuentos, redondeado a 2 decimales"""
+    return _round(subtotal * tax_rate / Decimal('100'))
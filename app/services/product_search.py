@@ -0,0 +1,344 @@
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.services.invalidation_bus import (
+    ACTION_DELETED, TOPIC_PRODUCTS, InvalidationEvent, invalidation_bus
+)
+from app.storage import get_repository, open_session
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+# Orden estático de un producto: nombre más corto primero y luego por ID
+# (len(name) en los bits altos, product_id en los 40 bajos)
+_ID_BITS = 40
+_ID_MASK = (1 << _ID_BITS) - 1
+
+def tokenize(text: str) -> List[str]:
+    """Palabras en minúsculas y sin acentos ("Cámara HD-4K" -> ["camara", "hd", "4k"])"""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    return _TOKEN.findall("".join(char for char in normalized if not unicodedata.combining(char)))
+
+class ProductDoc(NamedTuple):
+    """Producto indexado con los campos que devuelve la búsqueda"""
+    product_id: int
+    name: str
+    product_type: str
+    list_price: Decimal
+    tokens: tuple
+    words: str
+    rank: int
+
+class _IndexState(NamedTuple):
+    """Estructuras del índice; una reconstrucción las reemplaza todas de una vez"""
+    docs: Dict[int, ProductDoc]
+    postings: Dict[str, List[int]]
+    vocabulary: List[str]
+
+class ProductSearchIndex:
+    """
+    Índice invertido en memoria para la búsqueda de productos por nombre
+    
+    Cada palabra de los nombres apunta a la lista de productos que la
+    contienen, ordenada por nombre más corto; el vocabulario ordenado funciona
+    como índice de prefijos (las palabras que empiezan con "cam" son un rango
+    contiguo que se encuentra con bisect). Una consulta exige que cada palabra
+    sea prefijo de alguna palabra del nombre, filtra por tipo y precio y
+    ordena por más palabras exactas, nombre que empieza con la primera palabra
+    y nombre más corto. Como las listas ya vienen en ese último orden, la
+    consulta se detiene en cuanto completa `limit` productos del mejor grupo
+    posible, y nunca evalúa más de `max_candidates`.
+    
+    Se mantiene al día con los eventos del bus de invalidación: los productos
+    creados, actualizados o eliminados con ID se aplican uno a uno y los
+    cambios masivos (sin ID) reconstruyen el índice en un hilo aparte, que lo
+    reemplaza de una vez. Las escrituras copian las listas que modifican, así
+    las búsquedas concurrentes no toman locks.
+    """
+    
+    def __init__(self, max_expansions: int, max_candidates: int):
+        self.max_expansions = max_expansions
+        self.max_candidates = max_candidates
+        self.product_repo = get_repository(ProductRepository)
+        self.product_type_repo = get_repository(ProductTypeRepository)
+        self._state: Optional[_IndexState] = None
+        self._write_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._rebuild_pending = False
+    
+    @property
+    def is_ready(self) -> bool:
+        return self._state is not None
+    
+    def __len__(self) -> int:
+        state = self._state
+        return len(state.docs) if state is not None else 0
+    
+    # Consulta
+    def search(
+        self,
+        q: str,
+        product_type: Optional[str] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        limit: int = 10
+    ) -> List[ProductDoc]:
+        """Los `limit` productos que mejor coinciden con `q`"""
+        state = self._state
+        tokens = list(dict.fromkeys(tokenize(q)))
+        if state is None or not tokens:
+            return []
+        
+        # Se recorre la palabra con menos coincidencias; las demás se comprueban
+        # contra las palabras de cada producto
+        driver = min((self._matches(state, token) for token in tokens), key=self._size)
+        if not driver:
+            return []
+        candidates = driver[0] if len(driver) == 1 else heapq.merge(*driver)
+        
+        # Grupos por (palabras exactas, empieza con la primera palabra); dentro de
+        # cada grupo los productos llegan ya en orden
+        needles = [" " + token for token in tokens]
+        exact = [token for token in tokens if state.postings.get(token)]
+        best_group = (-len(exact), False)
+        first = tokens[0]
+        groups: Dict[tuple, List[ProductDoc]] = {}
+        docs = state.docs
+        previous = None
+        examined = 0
+        for rank in candidates:
+            if rank == previous:
+                continue
+            previous = rank
+            examined += 1
+            if examined > self.max_candidates:
+                break
+            doc = docs.get(rank & _ID_MASK)
+            if doc is None:
+                continue
+            # `words` es " palabra1 palabra2 ...": " cam" aparece si alguna empieza con "cam"
+            words = doc.words
+            for needle in needles:
+                if needle not in words:
+                    break
+            else:
+                needle = None
+            if needle is not None:
+                continue
+            if product_type is not None and doc.product_type != product_type:
+                continue
+            if min_price is not None and doc.list_price < min_price:
+                continue
+            if max_price is not None and doc.list_price > max_price:
+                continue
+            group = (-sum(token in doc.tokens for token in exact), not doc.tokens[0].startswith(first))
+            members = groups.setdefault(group, [])
+            if len(members) < limit:
+                members.append(doc)
+                if group == best_group and len(members) == limit:
+                    break
+        
+        results: List[ProductDoc] = []
+        for group in sorted(groups):
+            results.extend(groups[group])
+        return results[:limit]
+    
+    def _matches(self, state: _IndexState, prefix: str) -> List[List[int]]:
+        """
+        Listas de productos de las palabras que empiezan con `prefix`
+        
+        Primero la de la palabra exacta y luego las de las palabras más largas
+        en orden alfabético, hasta `max_expansions` palabras o
+        `max_candidates` productos (prefijos muy cortos en catálogos grandes).
+        """
+        vocabulary = state.vocabulary
+        postings = state.postings
+        result: List[List[int]] = []
+        total = 0
+        start = bisect_left(vocabulary, prefix)
+        end = min(start + self.max_expansions, len(vocabulary))
+        for index in range(start, end):
+            word = vocabulary[index]
+            if not word.startswith(prefix):
+                break
+            posting = postings.get(word)
+            if posting:
+                result.append(posting)
+                total += len(posting)
+                if total >= self.max_candidates:
+                    break
+        return result
+    
+    @staticmethod
+    def _size(match: List[List[int]]) -> int:
+        return sum(len(posting) for posting in match)
+    
+    # Construcción y sincronización
+    def build(self, db: Session) -> None:
+        """Leer todos los productos y reemplazar el índice completo"""
+        type_names = {row.product_type_id: row.name for row in self.product_type_repo.iter_all(db, as_rows=True)}
+        self.load(
+            (row.product_id, row.name, type_names.get(row.product_type_id, ""), row.list_price)
+            for row in self.product_repo.iter_all(db, as_rows=True)
+        )
+    
+    def load(self, products: Iterable[Tuple[int, str, str, Any]]) -> None:
+        """Reemplazar el índice con (product_id, name, product_type, list_price)"""
+        docs: Dict[int, ProductDoc] = {}
+        postings: Dict[str, List[int]] = {}
+        for product in products:
+            doc = self._doc(*product)
+            docs[doc.product_id] = doc
+            for token in doc.tokens:
+                postings.setdefault(token, []).append(doc.rank)
+        for posting in postings.values():
+            posting.sort()
+        with self._write_lock:
+            self._state = _IndexState(docs, postings, sorted(postings))
+    
+    def clear(self) -> None:
+        """Descartar el índice; hasta el próximo `build` las búsquedas van a la base de datos"""
+        with self._write_lock:
+            self._state = None
+    
+    def upsert(self, product_id: int, name: str, product_type: str, list_price: Decimal) -> None:
+        """Agregar o reemplazar un producto"""
+        doc = self._doc(product_id, name, product_type, list_price)
+        with self._write_lock:
+            state = self._state
+            if state is None:
+                return
+            self._discard(state, product_id)
+            state.docs[product_id] = doc
+            for token in doc.tokens:
+                posting = state.postings.get(token)
+                if posting is None:
+                    state.postings[token] = [doc.rank]
+                    insort(state.vocabulary, token)
+                else:
+                    posting = list(posting)
+                    insort(posting, doc.rank)
+                    state.postings[token] = posting
+    
+    def remove(self, product_id: int) -> None:
+        """Quitar un producto (las palabras sin productos quedan en el vocabulario, vacías)"""
+        with self._write_lock:
+            if self._state is not None:
+                self._discard(self._state, product_id)
+    
+    def handle_invalidation(self, event: InvalidationEvent) -> None:
+        """Suscriptor del bus: aplica el cambio de un producto o reconstruye si fue masivo"""
+        if self._rebuild_thread is not None:
+            # La reconstrucción en curso pudo leer antes de este cambio: se repite al terminar
+            self.rebuild_async()
+            return
+        if not self.is_ready:
+            return
+        if event.key is None:
+            self.rebuild_async()
+            return
+        if event.action == ACTION_DELETED:
+            self.remove(event.key)
+            return
+        db = open_session()
+        try:
+            product = self.product_repo.get(db, event.key)
+            if product is None:
+                self.remove(event.key)
+            else:
+                self.upsert(product.product_id, product.name, product.product_type_ref.name, product.list_price)
+        finally:
+            db.close()
+    
+    def rebuild_async(self) -> None:
+        """Reconstruir en segundo plano; mientras tanto se sigue buscando en el índice anterior"""
+        with self._write_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                # Lo que cambie durante la reconstrucción en curso se recoge en otra al terminar
+                self._rebuild_pending = True
+                return
+            self._rebuild_pending = False
+            self._rebuild_thread = threading.Thread(target=self._rebuild, name="product-search-rebuild", daemon=True)
+            self._rebuild_thread.start()
+    
+    def _rebuild(self) -> None:
+        db = open_session()
+        try:
+            self.build(db)
+        except Exception:
+            logger.exception("Error al reconstruir el índice de búsqueda de productos")
+        finally:
+            db.close()
+        with self._write_lock:
+            pending, self._rebuild_thread = self._rebuild_pending, None
+        if pending:
+            self.rebuild_async()
+    
+    @staticmethod
+    def _doc(product_id: int, name: str, product_type: str, list_price: Any) -> ProductDoc:
+        tokens = tuple(dict.fromkeys(tokenize(name)))
+        rank = (len(name) << _ID_BITS) | product_id
+        words = "".join(" " + token for token in tokens)
+        return ProductDoc(product_id, name, product_type, Decimal(list_price), tokens, words, rank)
+    
+    @staticmethod
+    def _discard(state: _IndexState, product_id: int) -> None:
+        old = state.docs.pop(product_id, None)
+        if old is None:
+            return
+        for token in old.tokens:
+            posting = state.postings.get(token)
+            if posting is None:
+                continue
+            index = bisect_left(posting, old.rank)
+            if index < len(posting) and posting[index] == old.rank:
+                state.postings[token] = posting[:index] + posting[index + 1:]
+
+def search_products(
+    db: Session,
+    q: str,
+    product_type: Optional[str] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    limit: int = 10
+) -> List[Any]:
+    """
+    Buscar en el índice en memoria o, si está desactivado o aún no se construyó,
+    en la base de datos (FULLTEXT en MySQL)
+    
+    Devuelve objetos con product_id, name, product_type (nombre) y list_price.
+    Si el índice está activado y no existe, se construye en segundo plano.
+    """
+    if settings.PRODUCT_SEARCH_INDEX_ENABLED:
+        if product_search_index.is_ready:
+            return product_search_index.search(q, product_type, min_price, max_price, limit)
+        product_search_index.rebuild_async()
+    
+    product_type_id = None
+    if product_type is not None:
+        db_product_type = get_repository(ProductTypeRepository).get_by_name(db, product_type)
+        if db_product_type is None:
+            return []
+        product_type_id = db_product_type.product_type_id
+    products = get_repository(ProductRepository).search(db, q, product_type_id, min_price, max_price, limit)
+    return [
+        ProductDoc(product.product_id, product.name, product.product_type_ref.name, product.list_price, (), "", 0)
+        for product in products
+    ]
+
+# Instancia global del índice de búsqueda de productos
+product_search_index = ProductSearchIndex(
+    max_expansions=settings.PRODUCT_SEARCH_MAX_EXPANSIONS,
+    max_candidates=settings.PRODUCT_SEARCH_MAX_CANDIDATES
+)
+invalidation_bus.subscribe(TOPIC_PRODUCTS, product_search_index.handle_invalidation)
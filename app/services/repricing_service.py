@@ -0,0 +1,291 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, time as day_start, timedelta
+from decimal import Decimal
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.config.settings import settings
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.repositories.sale_item_repository import SaleItemRepository
+from app.services.catalog_cache import CatalogSnapshot, catalog_cache
+from app.services.discount_schedule import DiscountSchedule
+from app.services.pricing import price_line_rates
+from app.services.shared_catalog import DiscountRule
+from app.storage import get_repository, is_memory_backend, open_session
+
+logger = logging.getLogger(__name__)
+
+class RepricingScenario(NamedTuple):
+    """
+    Simulación: porcentajes propuestos por ID de tipo de producto, método de
+    pago y términos de crédito para las ventas de [start, end)
+    
+    Un porcentaje propuesto reemplaza a todas las reglas de su llave durante
+    todo el período; las llaves sin propuesta usan las reglas vigentes en la
+    fecha de cada venta.
+    """
+    start: datetime
+    end: datetime
+    product_type_discounts: Dict[int, Decimal] = {}
+    payment_method_discounts: Dict[int, Decimal] = {}
+    credit_terms_discounts: Dict[int, Decimal] = {}
+
+class PartitionResult(NamedTuple):
+    """Totales de un día: líneas, guardado, recalculado y lo mismo por ID de tipo de producto"""
+    day: date
+    lines: int
+    stored: Decimal
+    repriced: Decimal
+    by_product_type: Dict[int, Tuple[int, Decimal, Decimal]]
+
+def scenario_catalog(catalog: Any, scenario: RepricingScenario) -> CatalogSnapshot:
+    """Copia del catálogo (local o compartido) con las reglas de la simulación aplicadas"""
+    def apply(rules: List[DiscountRule], proposed: Dict[int, Decimal]) -> List[DiscountRule]:
+        kept = [rule for rule in rules if rule.key not in proposed]
+        return kept + [DiscountRule(key, Decimal(percent)) for key, percent in sorted(proposed.items())]
+    
+    return CatalogSnapshot(
+        payment_methods=dict(catalog.payment_methods.items()),
+        product_type_discounts=apply(catalog.product_type_discounts, scenario.product_type_discounts),
+        payment_method_discounts=apply(catalog.payment_method_discounts, scenario.payment_method_discounts),
+        credit_terms_discounts=apply(catalog.credit_terms_discounts, scenario.credit_terms_discounts),
+        loaded_at=0.0
+    )
+
+def partitions(start: datetime, end: datetime) -> List[Tuple[date, datetime, datetime]]:
+    """Días de [start, end) como (día, inicio, fin); el primero y el último pueden ser parciales"""
+    result = []
+    day = start.date()
+    while datetime.combine(day, day_start.min) < end:
+        next_day = datetime.combine(day + timedelta(days=1), day_start.min)
+        result.append((day, max(start, datetime.combine(day, day_start.min)), min(end, next_day)))
+        day += timedelta(days=1)
+    return result
+
+def reprice_partition(rows: Iterator[List[Any]], schedule: DiscountSchedule, day: date) -> PartitionResult:
+    """
+    Recalcular los items de un día con la misma cascada y redondeo que SaleService
+    
+    Cada línea usa la matriz de descuentos vigente en la fecha de su venta.
+    Las líneas con el mismo precio, cantidad y descuentos se calculan una vez.
+    """
+    lines = 0
+    stored_total = Decimal('0')
+    repriced_total = Decimal('0')
+    by_product_type: Dict[int, List[Any]] = {}
+    computed: Dict[Tuple[int, Decimal, int], Decimal] = {}
+    for batch in rows:
+        for sale_datetime, payment_method_id, credit_terms_id, product_type_id, list_price, quantity, stored in batch:
+            rates = schedule.matrix_at(sale_datetime).rates(product_type_id, payment_method_id, credit_terms_id)
+            # Las DiscountRates viven en matrices que el calendario conserva: su id no se reutiliza
+            key = (id(rates), list_price, quantity)
+            repriced = computed.get(key)
+            if repriced is None:
+                repriced = price_line_rates(list_price, quantity, rates)["line_total"]
+                computed[key] = repriced
+            lines += 1
+            stored_total += stored
+            repriced_total += repriced
+            totals = by_product_type.get(product_type_id)
+            if totals is None:
+                totals = by_product_type[product_type_id] = [0, Decimal('0'), Decimal('0')]
+            totals[0] += 1
+            totals[1] += stored
+            totals[2] += repriced
+    return PartitionResult(
+        day, lines, stored_total, repriced_total,
+        {product_type_id: tuple(totals) for product_type_id, totals in by_product_type.items()}
+    )
+
+# Estado de cada proceso del pool (lo arma _init_worker)
+_worker_session = None
+_worker_schedule: Optional[DiscountSchedule] = None
+
+def _init_worker(database_url: str, catalog: CatalogSnapshot) -> None:
+    """Conexión propia y calendario de descuentos compilado una vez por proceso"""
+    global _worker_session, _worker_schedule
+    _worker_session = sessionmaker(bind=create_engine(database_url, poolclass=NullPool))
+    _worker_schedule = DiscountSchedule(catalog)
+
+def _reprice_day(day: date, start: datetime, end: datetime) -> PartitionResult:
+    db = _worker_session()
+    try:
+        rows = SaleItemRepository().iter_repricing_rows(db, start, end)
+        return reprice_partition(rows, _worker_schedule, day)
+    finally:
+        db.close()
+
+class RepricingJob:
+    """Estado de una simulación lanzada en segundo plano"""
+    
+    def __init__(self, scenario: RepricingScenario):
+        self.job_id = uuid.uuid4().hex
+        self.scenario = scenario
+        self.status = "pending"
+        self.partitions_total = len(partitions(scenario.start, scenario.end))
+        self.partitions_done = 0
+        self.report: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+
+class RepricingService:
+    """
+    Recalcular ventas históricas con descuentos propuestos ("qué hubiera pasado si")
+    
+    El período se parte por día y cada día lo procesa un proceso del pool:
+    abre su propia conexión, recorre los items del día con un cursor del
+    servidor y los recalcula con la misma cascada y redondeo que SaleService,
+    usando en cada venta los descuentos vigentes en su fecha más los
+    propuestos. Cada proceso devuelve solo los totales del día, que se suman
+    por día y por tipo de producto contra `line_subtotal_after_discounts`.
+    
+    Con el backend en memoria, con SQLite en memoria (o con `workers=1`) los
+    días se procesan en el mismo proceso. Las simulaciones lanzadas con
+    `submit` corren en un hilo y se consultan por ID; se guardan las últimas
+    `max_jobs`.
+    """
+    
+    def __init__(self, workers: int, max_jobs: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.sale_item_repo = get_repository(SaleItemRepository)
+        self.product_type_repo = get_repository(ProductTypeRepository)
+        self._jobs: "OrderedDict[str, RepricingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    # Simulaciones en segundo plano
+    def submit(self, scenario: RepricingScenario) -> RepricingJob:
+        """Lanzar una simulación en un hilo y devolver su estado"""
+        job = RepricingJob(scenario)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run_job, args=(job,), name=f"repricing-{job.job_id[:8]}", daemon=True).start()
+        return job
+    
+    def get(self, job_id: str) -> Optional[RepricingJob]:
+        return self._jobs.get(job_id)
+    
+    def _run_job(self, job: RepricingJob) -> None:
+        job.status = "running"
+        
+        def progress(done: int) -> None:
+            job.partitions_done = done
+        
+        try:
+            job.report = self.run(job.scenario, progress=progress)
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Error en la simulación de precios %s", job.job_id)
+            job.error = str(e)
+            job.status = "failed"
+    
+    # Ejecución
+    def run(
+        self,
+        scenario: RepricingScenario,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """Recalcular el período y devolver el reporte por día y por tipo de producto"""
+        started = time.perf_counter()
+        workers = workers or self.workers
+        db = open_session()
+        try:
+            catalog = scenario_catalog(catalog_cache.get(db), scenario)
+            product_types = {row.product_type_id: row.name for row in self.product_type_repo.iter_all(db, as_rows=True)}
+        finally:
+            if not is_memory_backend():
+                db.close()
+        
+        days = partitions(scenario.start, scenario.end)
+        # Los procesos del pool abren su propia conexión: una base en memoria no la verían
+        if workers <= 1 or is_memory_backend() or settings.database.is_in_memory or len(days) <= 1:
+            workers = 1
+            results = self._run_in_process(catalog, days, progress)
+        else:
+            results = self._run_in_pool(catalog, days, workers, progress)
+        
+        report = self._report(results, product_types)
+        report.update({
+            "start_date": scenario.start,
+            "end_date": scenario.end,
+            "partitions": len(days),
+            "workers": workers,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        })
+        return report
+    
+    def _run_in_process(self, catalog: CatalogSnapshot, days, progress) -> List[PartitionResult]:
+        schedule = DiscountSchedule(catalog)
+        results = []
+        db = open_session()
+        try:
+            for day, start, end in days:
+                results.append(reprice_partition(self.sale_item_repo.iter_repricing_rows(db, start, end), schedule, day))
+                if progress is not None:
+                    progress(len(results))
+        finally:
+            if not is_memory_backend():
+                db.close()
+        return results
+    
+    def _run_in_pool(self, catalog: CatalogSnapshot, days, workers: int, progress) -> List[PartitionResult]:
+        # spawn: los procesos no heredan el event loop, los hilos ni las conexiones del servidor
+        results = []
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(days)),
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.database.database_url, catalog)
+        ) as pool:
+            futures = [pool.submit(_reprice_day, day, start, end) for day, start, end in days]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if progress is not None:
+                    progress(len(results))
+        return results
+    
+    @staticmethod
+    def _report(results: List[PartitionResult], product_types: Dict[int, str]) -> Dict[str, Any]:
+        def totals(lines: int, stored: Decimal, repriced: Decimal) -> Dict[str, Any]:
+            return {"lines": lines, "stored_total": stored, "repriced_total": repriced, "delta": repriced - stored}
+        
+        by_product_type: Dict[int, List[Any]] = {}
+        for result in results:
+            for product_type_id, (lines, stored, repriced) in result.by_product_type.items():
+                accumulated = by_product_type.setdefault(product_type_id, [0, Decimal('0'), Decimal('0')])
+                accumulated[0] += lines
+                accumulated[1] += stored
+                accumulated[2] += repriced
+        
+        report = totals(
+            sum(result.lines for result in results),
+            sum((result.stored for result in results), Decimal('0')),
+            sum((result.repriced for result in results), Decimal('0'))
+        )
+        report["by_day"] = [
+            {"day": result.day, **totals(result.lines, result.stored, result.repriced)}
+            for result in sorted(results, key=lambda result: result.day)
+            if result.lines
+        ]
+        report["by_product_type"] = [
+            {"product_type": product_types.get(product_type_id, str(product_type_id)), **totals(*accumulated)}
+            for product_type_id, accumulated in sorted(by_product_type.items())
+        ]
+        return report
+
+# Instancia global del servicio de simulación de precios
+repricing_service = RepricingService(
+    workers=settings.REPRICING_WORKERS,
+    max_jobs=settings.REPRICING_MAX_JOBS
+)
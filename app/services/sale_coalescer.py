@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from app.config.settings import settings
+from app.database.connection import SessionLocal
+from app.repositories.sale_repository import SaleRepository
+
+logger = logging.getLogger(__name__)
+
+class SaleWriteCoalescer:
+    """
+    Group commit de ventas
+    
+    Junta las ventas calculadas que llegan dentro de una ventana corta (o hasta
+    completar un lote) y las escribe en una sola transacción con INSERT
+    multi-fila, usando una única conexión del pool. Cada llamador recibe su
+    propio resultado; si el lote falla por una venta inválida, se reintenta
+    venta por venta para que el error solo le llegue a quien corresponde.
+    """
+    
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.sale_repo = SaleRepository()
+        self._pending: List[Tuple[Dict[str, Any], Future]] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+    
+    async def write(self, priced_sale: Dict[str, Any]) -> int:
+        """Encolar una venta calculada y esperar a que se confirme; devuelve su sale_id"""
+        return await asyncio.wrap_future(self.submit(priced_sale))
+    
+    def submit(self, priced_sale: Dict[str, Any]) -> Future:
+        """Encolar una venta calculada para el siguiente commit compartido"""
+        future: Future = Future()
+        with self._condition:
+            if self._thread is None:
+                self._start()
+            self._pending.append((priced_sale, future))
+            self._condition.notify()
+        return future
+    
+    def stop(self) -> None:
+        """Detener el hilo escritor tras escribir lo que quede en cola"""
+        with self._condition:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        thread.join()
+        self._thread = None
+    
+    def _start(self) -> None:
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="sale-write-coalescer", daemon=True)
+        self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                # Esperar a que se llene la ventana o el lote
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._flush(batch)
+    
+    def _flush(self, batch: List[Tuple[Dict[str, Any], Future]]) -> None:
+        db = SessionLocal()
+        try:
+            try:
+                self._insert(db, [priced_sale for priced_sale, _ in batch])
+            except IntegrityError:
+                db.rollback()
+                for priced_sale, future in batch:
+                    try:
+                        self._insert(db, [priced_sale])
+                    except Exception as e:
+                        db.rollback()
+                        future.set_exception(e)
+                    else:
+                        future.set_result(priced_sale["sale"]["sale_id"])
+                return
+            except Exception as e:
+                db.rollback()
+                logger.exception("Error al escribir un lote de %s ventas", len(batch))
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            
+            for priced_sale, future in batch:
+                future.set_result(priced_sale["sale"]["sale_id"])
+        finally:
+            db.close()
+    
+    def _insert(self, db, priced_sales: List[Dict[str, Any]]) -> None:
+        self.sale_repo.insert_sales(
+            db,
+            [priced_sale["sale"] for priced_sale in priced_sales],
+            [item for priced_sale in priced_sales for item in priced_sale["items"]]
+        )
+
+# Instancia global del coalescedor de escrituras
+sale_coalescer = SaleWriteCoalescer(
+    window_ms=settings.GROUP_COMMIT_WINDOW_MS,
+    max_batch=settings.GROUP_COMMIT_MAX_BATCH
+)
@@ -0,0 +1,238 @@
+import fcntl
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from app.config.settings import settings
+from app.database.connection import SessionLocal
+from app.repositories.sale_repository import SaleRepository
+
+logger = logging.getLogger(__name__)
+
+# Campos monetarios que se guardan como texto en el log y se restauran como Decimal
+_DECIMAL_FIELDS = {
+    "tax_rate_percent", "subtotal", "tax", "total", "total_discounts_amount",
+    "list_price", "product_type_discount", "payment_method_discount",
+    "credit_terms_discount", "line_subtotal_after_discounts"
+}
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable en el log de ventas: {type(value).__name__}")
+
+def _decode(payload: str) -> Dict[str, Any]:
+    priced_sale = json.loads(payload)
+    for row in [priced_sale["sale"], *priced_sale["items"]]:
+        for field in _DECIMAL_FIELDS.intersection(row):
+            row[field] = Decimal(row[field])
+    if priced_sale["sale"].get("sale_datetime"):
+        priced_sale["sale"]["sale_datetime"] = datetime.fromisoformat(priced_sale["sale"]["sale_datetime"])
+    return priced_sale
+
+class SaleJournal:
+    """
+    Log local durable (SQLite en modo WAL) de ventas aceptadas
+    
+    Cada venta calculada por SaleService.price_sale se guarda aquí antes de
+    responder; el escritor en segundo plano la pasa después a MySQL.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL: cada venta aceptada queda en disco antes de responder el 202.
+            # En WAL es un fsync de un append secuencial al log por venta; el
+            # archivo principal solo se sincroniza en los checkpoints
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sale_journal ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "sale_id INTEGER NOT NULL, "
+                "payload TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sale_journal_failed ("
+                "seq INTEGER PRIMARY KEY, "
+                "sale_id INTEGER NOT NULL, "
+                "payload TEXT NOT NULL, "
+                "error TEXT NOT NULL, "
+                "failed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+            self._conn = conn
+        return self._conn
+    
+    def append(self, priced_sale: Dict[str, Any]) -> int:
+        """Agregar una venta calculada al log y devolver su número de secuencia"""
+        payload = json.dumps(priced_sale, default=_json_default, separators=(",", ":"))
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT INTO sale_journal (sale_id, payload) VALUES (?, ?)",
+                (priced_sale["sale"]["sale_id"], payload)
+            )
+            return cursor.lastrowid
+    
+    def read_batch(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Leer las ventas pendientes más antiguas en orden de llegada"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT seq, payload FROM sale_journal ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [(seq, _decode(payload)) for seq, payload in rows]
+    
+    def remove(self, seqs: List[int]) -> None:
+        """Eliminar del log las ventas ya escritas en la base de datos"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            conn.executemany("DELETE FROM sale_journal WHERE seq = ?", [(seq,) for seq in seqs])
+            conn.execute("COMMIT")
+    
+    def move_to_failed(self, seq: int, error: str) -> None:
+        """Apartar una venta que la base de datos rechaza para no bloquear el resto del log"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            conn.execute(
+                "INSERT INTO sale_journal_failed (seq, sale_id, payload, error) "
+                "SELECT seq, sale_id, payload, ? FROM sale_journal WHERE seq = ?",
+                (error, seq)
+            )
+            conn.execute("DELETE FROM sale_journal WHERE seq = ?", (seq,))
+            conn.execute("COMMIT")
+    
+    def pending_count(self) -> int:
+        """Número de ventas aceptadas que aún no están en la base de datos"""
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM sale_journal").fetchone()[0]
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class SaleJournalWriter:
+    """
+    Escritor en segundo plano que vacía el log hacia la base de datos
+    
+    Escribe lotes grandes en una sola transacción. Solo un proceso (el que
+    obtiene el candado del archivo `<log>.lock`) vacía el log; el resto solo
+    agrega ventas. Al arrancar, lo primero que hace es reproducir lo que haya
+    quedado pendiente de una ejecución anterior.
+    """
+    
+    def __init__(self, journal: SaleJournal, batch_size: int, flush_interval: float):
+        self.journal = journal
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sale_repo = SaleRepository()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+    
+    def start(self) -> None:
+        """Arrancar el hilo escritor"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sale-journal-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detener el hilo escritor tras vaciar lo pendiente"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._acquire_leadership():
+                self._drain()
+            self._stop.wait(self.flush_interval)
+        if self._lock_file is not None:
+            self._drain()
+            self._lock_file.close()
+            self._lock_file = None
+    
+    def _acquire_leadership(self) -> bool:
+        """Intentar ser el único proceso que vacía el log"""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(f"{self.journal.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+    
+    def _drain(self) -> None:
+        """Vaciar lotes completos seguidos hasta dejar el log al día"""
+        try:
+            while self.flush() == self.batch_size:
+                pass
+        except Exception:
+            logger.exception("Error al vaciar el log de ventas; se reintentará")
+    
+    def flush(self) -> int:
+        """Escribir un lote del log en la base de datos y devolver cuántas ventas procesó"""
+        batch = self.journal.read_batch(self.batch_size)
+        if not batch:
+            return 0
+        
+        db = SessionLocal()
+        try:
+            try:
+                self._write(db, batch)
+            except IntegrityError:
+                # Alguna venta del lote es inválida: aislarla escribiendo una por una
+                db.rollback()
+                for entry in batch:
+                    try:
+                        self._write(db, [entry])
+                    except IntegrityError as e:
+                        db.rollback()
+                        logger.error("Venta %s rechazada por la base de datos: %s", entry[1]["sale"]["sale_id"], e)
+                        self.journal.move_to_failed(entry[0], str(e))
+        finally:
+            db.close()
+        return len(batch)
+    
+    def _write(self, db, batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+        # Las ventas que ya existen son de un vaciado interrumpido antes de limpiar el log
+        seen = set(self.sale_repo.get_existing_ids(db, [entry["sale"]["sale_id"] for _, entry in batch]))
+        pending = []
+        for _, entry in batch:
+            if entry["sale"]["sale_id"] not in seen:
+                seen.add(entry["sale"]["sale_id"])
+                pending.append(entry)
+        self.sale_repo.insert_sales(
+            db,
+            [entry["sale"] for entry in pending],
+            [item for entry in pending for item in entry["items"]]
+        )
+        self.journal.remove([seq for seq, _ in batch])
+
+# Instancias globales del log y su escritor
+sale_journal = SaleJournal(settings.SALE_JOURNAL_PATH)
+sale_journal_writer = SaleJournalWriter(
+    sale_journal,
+    batch_size=settings.SALE_JOURNAL_BATCH_SIZE,
+    flush_interval=settings.SALE_JOURNAL_FLUSH_INTERVAL
+)
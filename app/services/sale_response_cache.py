@@ -0,0 +1,103 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.config.settings import settings
+from app.models import Sale
+from app.services.invalidation_bus import TOPIC_SALES, InvalidationEvent, invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+class SaleResponseCache:
+    """
+    LRU de las respuestas de GET /sales/{id} ya serializadas a JSON
+    
+    Las ventas no cambian después de crearse: el cuerpo se guarda al crear
+    la venta (o en la primera lectura) y se sirve tal cual, sin consultar la
+    base de datos ni volver a construir el modelo. Solo el soft delete la
+    invalida, con el evento del tema `sales` del bus (los eventos sin ID,
+    como los del transporte por tabla de versiones, vacían la caché).
+    
+    Está acotada por bytes (`max_bytes`); al pasarse se descartan las menos
+    leídas. `generation` avanza con cada invalidación: una lectura que
+    empezó antes no guarda un cuerpo que pudo quedar obsoleto.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+    
+    @staticmethod
+    def render(sale: Sale) -> bytes:
+        """Cuerpo JSON idéntico al que genera FastAPI para el modelo"""
+        return JSONResponse(content=jsonable_encoder(sale)).body
+    
+    def get(self, sale_id: int) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(sale_id)
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(sale_id)
+            self._hits += 1
+            return body
+    
+    def put(self, sale_id: int, body: bytes, generation: Optional[int] = None) -> None:
+        """Guardar el cuerpo de una venta; con `generation`, solo si no hubo invalidaciones desde entonces"""
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            previous = self._entries.pop(sale_id, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[sale_id] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+    
+    def invalidate(self, sale_id: Optional[int] = None) -> None:
+        """Descartar una venta, o todas si `sale_id` es None"""
+        with self._lock:
+            self.generation += 1
+            if sale_id is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            body = self._entries.pop(sale_id, None)
+            if body is not None:
+                self._bytes -= len(body)
+    
+    def handle_invalidation(self, event: InvalidationEvent) -> None:
+        """Suscriptor del bus de invalidación (tema sales)"""
+        self.invalidate(event.key)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions
+            }
+
+# Instancia global de la caché de respuestas de ventas
+sale_response_cache = SaleResponseCache(max_bytes=settings.SALE_RESPONSE_CACHE_MAX_BYTES)
+invalidation_bus.subscribe(TOPIC_SALES, sale_response_cache.handle_invalidation)
@@ -1,27 +1,28 @@
-from typing import Dict, List, Any
-from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from decimal import Decimal
 from sqlalchemy.orm import Session
-from app.database.models import Sale, SaleItem, Customer, Product, PaymentMethod
+from app.database.models import Sale, SaleItem, Customer, Product
 from app.repositories.sale_repository import SaleRepository
 from app.repositories.sale_item_repository import SaleItemRepository
 from app.repositories.customer_repository import CustomerRepository
 from app.repositories.product_repository import ProductRepository
 from app.repositories.payment_method_repository import PaymentMethodRepository
-from app.repositories.discount_repository import ProductTypeDiscountRepository, PaymentMethodDiscountRepository
-from app.repositories.credit_terms_discount_repository import CreditTermsDiscountRepository
+from app.services.catalog_cache import CatalogSnapshot, PaymentMethodRef, catalog_cache
+from app.services.discount_matrix import DiscountMatrix
+from app.services.id_allocator import id_allocator
+from app.services.pricing import TAX_RATE_PERCENT, calculate_tax, price_line_rates
+from app.storage import get_repository
 
 class SaleService:
     """Servicio para la lógica de negocio de ventas"""
     
     def __init__(self):
-        self.sale_repo = SaleRepository()
-        self.sale_item_repo = SaleItemRepository()
-        self.customer_repo = CustomerRepository()
-        self.product_repo = ProductRepository()
-        self.payment_method_repo = PaymentMethodRepository()
-        self.product_type_discount_repo = ProductTypeDiscountRepository()
-        self.payment_method_discount_repo = PaymentMethodDiscountRepository()
-        self.credit_terms_discount_repo = CreditTermsDiscountRepository()
+        self.sale_repo = get_repository(SaleRepository)
+        self.sale_item_repo = get_repository(SaleItemRepository)
+        self.customer_repo = get_repository(CustomerRepository)
+        self.product_repo = get_repository(ProductRepository)
+        self.payment_method_repo = get_repository(PaymentMethodRepository)
     
     def create_sale(self, db: Session, sale_data: Dict[str, Any]) -> Sale:
         """
@@ -32,24 +33,116 @@ class SaleService:
         - Redondear cada línea a 2 decimales
         - Solo aplicar descuento de crédito si payment_method = "Store Credit"
         - Tax 16% sobre subtotal después de descuentos
+        - Los descuentos son los vigentes en sale_datetime
         """
+        priced_sale = self.price_sale(db, sale_data)
+        self.sale_repo.insert_sales(db, [priced_sale["sale"]], priced_sale["items"])
+        return Sale(**priced_sale["sale"])
+    
+    def price_sale(self, db: Session, sale_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validar y calcular una venta sin escribirla en la base de datos
+        
+        Los IDs de la venta y de sus items se toman del asignador por bloques,
+        así que las filas quedan listas para insertarse en un solo paso. Los
+        descuentos son los vigentes en `sale_data["sale_datetime"]` (por
+        defecto, ahora).
+        Devuelve {"sale": fila de venta, "items": filas de items, "payment_method": nombre}.
+        """
+        sale_datetime = sale_data.get("sale_datetime") or datetime.now()
+        
         # Validar que el cliente existe
         customer = self.customer_repo.get(db, sale_data["customer_id"])
         if not customer:
             raise ValueError("Cliente no encontrado")
         
+        # Con el catálogo compartido, si la versión leída se invalidó o el writer
+        # reutilizó su slot mientras se calculaba, se calcula de nuevo
+        while True:
+            catalog = catalog_cache.get(db)
+            try:
+                payment_method, items_data, subtotal, total_discounts = self._price_items(
+                    db, catalog, customer, sale_data, sale_datetime
+                )
+            except ValueError:
+                if catalog.is_current():
+                    raise
+                continue
+            if catalog.is_current():
+                break
+        
+        # Calcular impuestos (16%)
+        tax_rate = TAX_RATE_PERCENT
+        tax = calculate_tax(subtotal, tax_rate)
+        
+        # Calcular total
+        total = subtotal + tax
+        
+        # Asignar IDs en memoria (sin round trips al insertar)
+        sale_id = id_allocator.allocate(Sale.sale_id)[0]
+        sale_item_ids = id_allocator.allocate(SaleItem.sale_item_id, len(items_data))
+        
+        sale_row = {
+            "sale_id": sale_id,
+            "customer_id": customer.customer_id,
+            "payment_method_id": payment_method.payment_method_id,
+            "tax_rate_percent": tax_rate,
+            "subtotal": subtotal,
+            "tax": tax,
+            "total": total,
+            "total_discounts_amount": total_discounts,
+            "sale_datetime": sale_datetime
+        }
+        
+        item_rows = []
+        for sale_item_id, item_data in zip(sale_item_ids, items_data):
+            item_rows.append({
+                "sale_item_id": sale_item_id,
+                "sale_id": sale_id,
+                "product_id": item_data["product"].product_id,
+                "quantity": item_data["quantity"],
+                "list_price": item_data["product"].list_price,
+                "product_type_discount": item_data["discounts"]["product_type_discount"],
+                "payment_method_discount": item_data["discounts"]["payment_method_discount"],
+                "credit_terms_discount": item_data["discounts"]["credit_terms_discount"],
+                "line_subtotal_after_discounts": item_data["line_total"]
+            })
+        
+        return {
+            "sale": sale_row,
+            "items": item_rows,
+            "payment_method": payment_method.name
+        }
+    
+    def _price_items(
+        self,
+        db: Session,
+        catalog: CatalogSnapshot,
+        customer: Customer,
+        sale_data: Dict[str, Any],
+        sale_datetime: datetime
+    ) -> Tuple[PaymentMethodRef, List[Dict[str, Any]], Decimal, Decimal]:
+        """
+        Validar método de pago y productos y calcular las líneas con una versión del catálogo
+        
+        Los productos se toman del catálogo compartido cuando está activo y
+        los tiene; si no, de la base de datos. La matriz de descuentos vigente
+        en `sale_datetime` se busca una vez para toda la venta.
+        """
         # Validar que el método de pago existe
-        payment_method = self.payment_method_repo.get(db, sale_data["payment_method_id"])
+        payment_method = catalog.payment_methods.get(sale_data["payment_method_id"])
         if not payment_method:
             raise ValueError("Método de pago no encontrado")
         
+        matrix = catalog.discount_schedule.matrix_at(sale_datetime)
+        
         # Validar productos y calcular descuentos
         items_data = []
         subtotal = Decimal('0')
         total_discounts = Decimal('0')
         
         for item in sale_data["items"]:
-            product = self.product_repo.get(db, item["product_id"])
+            product = catalog.products.get(item["product_id"]) or self.product_repo.get(db, item["product_id"])
             if not product:
                 raise ValueError(f"Producto con ID {item['product_id']} no encontrado")
             
@@ -58,7 +151,7 @@ class SaleService:
             
             # Calcular descuentos secuenciales
             line_total = self._calculate_line_discounts(
-                db, product, payment_method, customer, item["quantity"]
+                matrix, product, payment_method, customer, item["quantity"]
             )
             
             items_data.append({
@@ -71,149 +164,150 @@ class SaleService:
             subtotal += line_total["line_total"]
             total_discounts += line_total["discounts"]["total_discount"]
         
-        # Calcular impuestos (16%)
-        tax_rate = Decimal('16.0')
-        tax = (subtotal * tax_rate / Decimal('100')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        
-        # Calcular total
-        total = subtotal + tax
-        
-        # Crear la venta
-        sale_data_db = {
-            "customer_id": customer.customer_id,
-            "payment_method_id": payment_method.payment_method_id,
-            "tax_rate_percent": tax_rate,
-            "subtotal": subtotal,
-            "tax": tax,
-            "total": total,
-            "total_discounts_amount": total_discounts
-        }
-        
-        db_sale = self.sale_repo.create(db, sale_data_db)
-        
-        # Crear los items de venta
-        for item_data in items_data:
-            sale_item_data = {
-                "sale_id": db_sale.sale_id,
-                "product_id": item_data["product"].product_id,
-                "quantity": item_data["quantity"],
-                "list_price": item_data["product"].list_price,
-                "product_type_discount": item_data["discounts"]["product_type_discount"],
-                "payment_method_discount": item_data["discounts"]["payment_method_discount"],
-                "credit_terms_discount": item_data["discounts"]["credit_terms_discount"],
-                "line_subtotal_after_discounts": item_data["line_total"]
-            }
-            
-            self.sale_item_repo.create(db, sale_item_data)
-        
-        return db_sale
+        return payment_method, items_data, subtotal, total_discounts
     
     def _calculate_line_discounts(
         self, 
-        db: Session, 
+        matrix: DiscountMatrix, 
         product: Product, 
-        payment_method: PaymentMethod, 
+        payment_method: PaymentMethodRef, 
         customer: Customer, 
         quantity: int
     ) -> Dict[str, Any]:
         """
         Calcular descuentos secuenciales para una línea de producto
         
-        Secuencia: Base → ProductType → PaymentMethod → CreditTerms
+        Secuencia: Base → ProductType → PaymentMethod → CreditTerms. Los
+        porcentajes (y la regla de Store Credit) salen ya compilados de la
+        matriz de descuentos vigente: un acceso a la tabla por línea.
         """
-        # Precio base de la línea
-        line_base = product.list_price * quantity
-        
-        # 1. Descuento por tipo de producto
-        product_type_discount = self._get_product_type_discount(db, product.product_type_id)
-        line_after_product_discount = line_base * (1 - product_type_discount / Decimal('100'))
-        line_after_product_discount = line_after_product_discount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        
-        # 2. Descuento por método de pago
-        payment_method_discount = self._get_payment_method_discount(db, payment_method.payment_method_id)
-        line_after_payment_discount = line_after_product_discount * (1 - payment_method_discount / Decimal('100'))
-        line_after_payment_discount = line_after_payment_discount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        
-        # 3. Descuento por términos de crédito (solo si es Store Credit)
-        credit_terms_discount = Decimal('0')
-        if payment_method.name == "Store Credit":
-            credit_terms_discount = self._get_credit_terms_discount(db, customer.credit_terms_id)
-            line_after_credit_discount = line_after_payment_discount * (1 - credit_terms_discount / Decimal('100'))
-            line_after_credit_discount = line_after_credit_discount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        else:
-            line_after_credit_discount = line_after_payment_discount
-        
-        # Calcular montos de descuento
-        product_type_discount_amount = (line_base - line_after_product_discount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        payment_method_discount_amount = (line_after_product_discount - line_after_payment_discount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        credit_terms_discount_amount = (line_after_payment_discount - line_after_credit_discount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        
-        total_discount = product_type_discount_amount + payment_method_discount_amount + credit_terms_discount_amount
-        
-        return {
-            "line_total": line_after_credit_discount,
-            "discounts": {
-                "product_type_discount": product_type_discount_amount,
-                "payment_method_discount": payment_method_discount_amount,
-                "credit_terms_discount": credit_terms_discount_amount,
-                "total_discount": total_discount
-            }
-        }
+        rates = matrix.rates(
+            product.product_type_id,
+            payment_method.payment_method_id,
+            customer.credit_terms_id
+        )
+        return price_line_rates(product.list_price, quantity, rates)
     
-    def _get_product_type_discount(self, db: Session, product_type_id: int) -> Decimal:
-        """Obtener descuento por tipo de producto"""
-        discount = self.product_type_discount_repo.get_by_product_type(db, product_type_id)
-        return Decimal(discount.discount_percent) if discount else Decimal('0')
-    
-    def _get_payment_method_discount(self, db: Session, payment_method_id: int) -> Decimal:
-        """Obtener descuento por método de pago"""
-        discount = self.payment_method_discount_repo.get_by_payment_method(db, payment_method_id)
-        return Decimal(discount.discount_percent) if discount else Decimal('0')
-    
-    def _get_credit_terms_discount(self, db: Session, credit_terms_id: int) -> Decimal:
-        """Obtener descuento por términos de crédito"""
-        discount = self.credit_terms_discount_repo.get_by_credit_terms_id(db, credit_terms_id)
-        return Decimal(discount.discount_percent) if discount else Decimal('0')
-    
-    def get_sale_with_breakdown(self, db: Session, sale_id: int) -> Dict[str, Any]:
-        """Obtener venta con breakdown detallado para la respuesta de la API"""
+    def reprice_sale(self, db: Session, sale_id: int, at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Recalcular una venta guardada con los descuentos vigentes en `at` (por
+        defecto, su sale_datetime) sin escribir nada
+        
+        Usa los precios de lista, cantidades y tasa de impuesto guardados en la
+        venta; solo cambian los descuentos. Devuelve el mismo formato que
+        get_sale_with_breakdown.
+        """
         sale = self.sale_repo.get(db, sale_id)
         if not sale:
             raise ValueError("Venta no encontrada")
-        
-        # Obtener items de la venta
         sale_items = self.sale_item_repo.get_by_sale(db, sale_id)
+        customer = self.customer_repo.get(db, sale.customer_id) or sale.customer
+        payment_method = self.payment_method_repo.get(db, sale.payment_method_id) or sale.payment_method
         
-        # Construir breakdown
-        lines = []
+        # Los productos dados de baja después de la venta se toman de la relación del item
+        products = self.product_repo.get_by_ids(db, [item.product_id for item in sale_items])
+        matrix = catalog_cache.get(db).discount_schedule.matrix_at(at or sale.sale_datetime)
+        
+        item_rows = []
+        subtotal = Decimal('0')
+        total_discounts = Decimal('0')
         for item in sale_items:
-            product = self.product_repo.get(db, item.product_id)
-            lines.append({
+            product = products.get(item.product_id) or item.product
+            rates = matrix.rates(product.product_type_id, payment_method.payment_method_id, customer.credit_terms_id)
+            line = price_line_rates(item.list_price, item.quantity, rates)
+            item_rows.append({
                 "product_id": item.product_id,
                 "quantity": item.quantity,
-                "list_price": str(item.list_price),
+                "list_price": item.list_price,
+                "product_type_discount": line["discounts"]["product_type_discount"],
+                "payment_method_discount": line["discounts"]["payment_method_discount"],
+                "credit_terms_discount": line["discounts"]["credit_terms_discount"],
+                "line_subtotal_after_discounts": line["line_total"]
+            })
+            subtotal += line["line_total"]
+            total_discounts += line["discounts"]["total_discount"]
+        
+        tax = calculate_tax(subtotal, sale.tax_rate_percent)
+        return self.build_breakdown({
+            "sale": {
+                "sale_id": sale.sale_id,
+                "customer_id": sale.customer_id,
+                "tax_rate_percent": sale.tax_rate_percent,
+                "subtotal": subtotal,
+                "tax": tax,
+                "total": subtotal + tax,
+                "total_discounts_amount": total_discounts
+            },
+            "items": item_rows,
+            "payment_method": payment_method.name
+        })
+    
+    def build_breakdown(self, priced_sale: Dict[str, Any]) -> Dict[str, Any]:
+        """Construir el breakdown de la API a partir de una venta calculada con price_sale"""
+        sale = priced_sale["sale"]
+        lines = []
+        for item in priced_sale["items"]:
+            lines.append({
+                "product_id": item["product_id"],
+                "quantity": item["quantity"],
+                "list_price": str(item["list_price"]),
                 "discounts": {
-                    "product_type": str(item.product_type_discount),
-                    "payment_method": str(item.payment_method_discount),
-                    "credit_terms": str(item.credit_terms_discount)
+                    "product_type": str(item["product_type_discount"]),
+                    "payment_method": str(item["payment_method_discount"]),
+                    "credit_terms": str(item["credit_terms_discount"])
                 },
-                "line_subtotal_after_discounts": str(item.line_subtotal_after_discounts)
+                "line_subtotal_after_discounts": str(item["line_subtotal_after_discounts"])
             })
         
-        # Obtener nombres para la respuesta
-        customer = self.customer_repo.get(db, sale.customer_id)
-        payment_method = self.payment_method_repo.get(db, sale.payment_method_id)
-        
         return {
-            "sale_id": sale.sale_id,
-            "customer_id": sale.customer_id,
-            "payment_method": payment_method.name,
-            "tax_rate_percent": str(sale.tax_rate_percent),
+            "sale_id": sale["sale_id"],
+            "customer_id": sale["customer_id"],
+            "payment_method": priced_sale["payment_method"],
+            # Con la escala de la columna, igual que una venta leída de la base de datos
+            "tax_rate_percent": str(sale["tax_rate_percent"].quantize(Decimal('0.01'))),
             "breakdown": {
                 "lines": lines,
-                "subtotal": str(sale.subtotal),
-                "tax": str(sale.tax),
-                "total": str(sale.total),
-                "total_discounts_amount": str(sale.total_discounts_amount)
+                "subtotal": str(sale["subtotal"]),
+                "tax": str(sale["tax"]),
+                "total": str(sale["total"]),
+                "total_discounts_amount": str(sale["total_discounts_amount"])
             }
         }
+    
+    def get_sale_with_breakdown(self, db: Session, sale_id: int) -> Dict[str, Any]:
+        """
+        Obtener venta con breakdown detallado para la respuesta de la API
+        
+        La venta, su método de pago y sus items salen de una sola consulta.
+        """
+        rows = self.sale_repo.get_breakdown_rows(db, sale_id)
+        if not rows:
+            raise ValueError("Venta no encontrada")
+        
+        sale = rows[0]
+        return self.build_breakdown({
+            "sale": {
+                "sale_id": sale.sale_id,
+                "customer_id": sale.customer_id,
+                "tax_rate_percent": sale.tax_rate_percent,
+                "subtotal": sale.subtotal,
+                "tax": sale.tax,
+                "total": sale.total,
+                "total_discounts_amount": sale.total_discounts_amount
+            },
+            "items": [
+                {
+                    "product_id": row.product_id,
+                    "quantity": row.quantity,
+                    "list_price": row.list_price,
+                    "product_type_discount": row.product_type_discount,
+                    "payment_method_discount": row.payment_method_discount,
+                    "credit_terms_discount": row.credit_terms_discount,
+                    "line_subtotal_after_discounts": row.line_subtotal_after_discounts
+                }
+                for row in rows
+                if row.product_id is not None
+            ],
+            "payment_method": sale.payment_method
+        })
+        
\ No newline at end of file
@@ -0,0 +1,301 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+# Encabezado del segmento: magic, versión de formato, generación publicada,
+# generación en escritura, última generación invalidada, hora de publicación
+# (epoch) y tamaño de cada slot. Se rellena a 64 bytes.
+HEADER = struct.Struct("<4sIQQQdQ")
+HEADER_SIZE = 64
+MAGIC = b"SCAT"
+FORMAT_VERSION = 2
+
+# Offsets de los campos del encabezado que se leen/escriben por separado
+_GENERATION = struct.Struct("<Q")
+_GENERATION_OFFSET = 8
+_WRITING_OFFSET = 16
+_INVALIDATED_OFFSET = 24
+_PUBLISHED_AT = struct.Struct("<d")
+_PUBLISHED_AT_OFFSET = 32
+
+# Encabezado de cada slot: filas de productos, descuentos por tipo de producto,
+# por método de pago, por términos de crédito y métodos de pago
+SLOT_HEADER = struct.Struct("<5Q")
+NAME_SIZE = 64
+
+class PaymentMethodRef(NamedTuple):
+    """Método de pago sin sesión (mismos atributos que el modelo que usa el cálculo)"""
+    payment_method_id: int
+    name: str
+
+class ProductRef(NamedTuple):
+    """Producto sin sesión (mismos atributos que el modelo que usa el cálculo)"""
+    product_id: int
+    product_type_id: int
+    list_price: Decimal
+
+class DiscountRule(NamedTuple):
+    """Descuento con su vigencia [valid_from, valid_to); None = sin límite por ese lado"""
+    key: int
+    discount_percent: Decimal
+    valid_from: Optional[datetime] = None
+    valid_to: Optional[datetime] = None
+
+class CatalogPayload(NamedTuple):
+    """Contenido a publicar; cada lista va ordenada por ID (los descuentos, por llave e ID)"""
+    products: List[Tuple[int, int, Decimal]]
+    product_type_discounts: List[DiscountRule]
+    payment_method_discounts: List[DiscountRule]
+    credit_terms_discounts: List[DiscountRule]
+    payment_methods: List[Tuple[int, str]]
+
+def _to_hundredths(value: Decimal) -> int:
+    """Precios y porcentajes tienen escala 2: se guardan como enteros en centésimas"""
+    return int((Decimal(value) * 100).to_integral_value())
+
+def _from_hundredths(value: int) -> Decimal:
+    return Decimal(value).scaleb(-2)
+
+# Las vigencias se guardan en microsegundos desde 1970 (sin zona horaria, como
+# las fechas del sistema); los extremos de int64 representan "sin límite"
+_EPOCH = datetime(1970, 1, 1)
+_OPEN_FROM = -(1 << 63)
+_OPEN_TO = (1 << 63) - 1
+
+def _to_ticks(value: Optional[datetime], open_value: int) -> int:
+    if value is None:
+        return open_value
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+def _from_ticks(value: int, open_value: int) -> Optional[datetime]:
+    if value == open_value:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+class _SortedTable:
+    """Vista de solo lectura sobre columnas int64 del segmento, buscada por llave con bisect"""
+    
+    def __init__(self, keys: memoryview, value: Callable[[int], Any]):
+        self._keys = keys
+        self._value = value
+    
+    def get(self, key: int, default: Any = None) -> Any:
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return self._value(index)
+        return default
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def items(self) -> List[Tuple[int, Any]]:
+        return [(self._keys[index], self._value(index)) for index in range(len(self._keys))]
+
+class SharedCatalogView:
+    """
+    Lectura sin copia de una generación del catálogo compartido
+    
+    Expone los mismos atributos que CatalogSnapshot. Los valores se leen
+    directamente del mmap; `is_current` indica si el writer aún no empezó a
+    sobrescribir el slot de esta generación, es decir, si todo lo leído desde
+    que se abrió la vista es consistente (protocolo tipo seqlock).
+    """
+    
+    def __init__(self, segment: "SharedCatalogSegment", generation: int, slot: memoryview):
+        self.segment = segment
+        self.generation = generation
+        # Lo compila CatalogCache una vez por generación
+        self.discount_schedule = None
+        counts = SLOT_HEADER.unpack_from(slot, 0)
+        columns = slot[SLOT_HEADER.size:].cast("q")
+        
+        def take(count: int) -> memoryview:
+            nonlocal columns
+            column, columns = columns[:count], columns[count:]
+            return column
+        
+        n_products, n_product_type, n_payment_method, n_credit_terms, n_methods = counts
+        product_ids, product_type_ids, prices = take(n_products), take(n_products), take(n_products)
+        self.products = _SortedTable(
+            product_ids,
+            lambda i: ProductRef(product_ids[i], product_type_ids[i], _from_hundredths(prices[i]))
+        )
+        self._discount_columns = [
+            [take(count) for _ in range(4)]
+            for count in (n_product_type, n_payment_method, n_credit_terms)
+        ]
+        
+        method_ids = take(n_methods)
+        names_offset = SLOT_HEADER.size + 8 * (3 * n_products + 4 * (n_product_type + n_payment_method + n_credit_terms) + n_methods)
+        names = slot[names_offset:names_offset + NAME_SIZE * n_methods]
+        self.payment_methods = _SortedTable(
+            method_ids,
+            lambda i: PaymentMethodRef(
+                method_ids[i],
+                bytes(names[i * NAME_SIZE:(i + 1) * NAME_SIZE]).rstrip(b"\0").decode("utf-8")
+            )
+        )
+    
+    # Los descuentos se decodifican solo cuando se piden (al compilar el calendario de descuentos)
+    @property
+    def product_type_discounts(self) -> List[DiscountRule]:
+        return self._rules(*self._discount_columns[0])
+    
+    @property
+    def payment_method_discounts(self) -> List[DiscountRule]:
+        return self._rules(*self._discount_columns[1])
+    
+    @property
+    def credit_terms_discounts(self) -> List[DiscountRule]:
+        return self._rules(*self._discount_columns[2])
+    
+    @staticmethod
+    def _rules(keys: memoryview, values: memoryview, valid_from: memoryview, valid_to: memoryview) -> List[DiscountRule]:
+        return [
+            DiscountRule(
+                keys[i],
+                _from_hundredths(values[i]),
+                _from_ticks(valid_from[i], _OPEN_FROM),
+                _from_ticks(valid_to[i], _OPEN_TO)
+            )
+            for i in range(len(keys))
+        ]
+    
+    def is_current(self) -> bool:
+        return self.segment.is_readable(self.generation)
+
+class SharedCatalogSegment:
+    """
+    Segmento de memoria compartida (archivo + mmap) con el catálogo de precios
+    
+    Lo usan todos los workers del host sobre el mismo archivo (idealmente en
+    /dev/shm). Tiene dos slots: la generación N vive en el slot N % 2, así que
+    el writer escribe la generación N + 1 en el otro slot mientras los lectores
+    siguen usando N sin locks, y la publica con una sola escritura de 8 bytes.
+    Antes de empezar a escribir anota la generación en `writing`; una vista de
+    la generación G deja de ser válida cuando `writing` llega a G + 2.
+    
+    Las escrituras (publicar e invalidar) se serializan entre procesos con
+    flock sobre el propio archivo. `invalidate` marca la generación vigente
+    como obsoleta en todos los workers a la vez.
+    """
+    
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.slot_size = (size - HEADER_SIZE) // 16 * 8
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._mmap = mmap.mmap(self._fd, size)
+            magic, version, _, _, _, _, slot_size = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION or slot_size != self.slot_size:
+                self._mmap[:HEADER_SIZE] = b"\0" * HEADER_SIZE
+                HEADER.pack_into(self._mmap, 0, MAGIC, FORMAT_VERSION, 0, 0, 0, 0.0, self.slot_size)
+        self._buffer = memoryview(self._mmap)
+    
+    # Lectura
+    def generation(self) -> int:
+        return _GENERATION.unpack_from(self._mmap, _GENERATION_OFFSET)[0]
+    
+    def published_at(self) -> float:
+        return _PUBLISHED_AT.unpack_from(self._mmap, _PUBLISHED_AT_OFFSET)[0]
+    
+    def is_readable(self, generation: int) -> bool:
+        """La generación sigue intacta en su slot y no fue invalidada"""
+        writing = _GENERATION.unpack_from(self._mmap, _WRITING_OFFSET)[0]
+        invalidated = _GENERATION.unpack_from(self._mmap, _INVALIDATED_OFFSET)[0]
+        return generation > 0 and invalidated < generation and writing < generation + 2
+    
+    def view(self, max_age: Optional[float] = None) -> Optional[SharedCatalogView]:
+        """Vista de la generación publicada; None si no hay una válida (o es más vieja que `max_age`)"""
+        generation = self.generation()
+        if not self.is_readable(generation):
+            return None
+        if max_age is not None and time.time() - self.published_at() > max_age:
+            return None
+        start = HEADER_SIZE + (generation % 2) * self.slot_size
+        view = SharedCatalogView(self, generation, self._buffer[start:start + self.slot_size])
+        return view if view.is_current() else None
+    
+    # Escritura
+    def publish(self, load: Callable[[], CatalogPayload], block: bool = True) -> Optional[int]:
+        """
+        Leer el catálogo con `load` y publicarlo como nueva generación
+        
+        Con `block=False` devuelve None si otro proceso está escribiendo.
+        """
+        with self._locked(block) as acquired:
+            if not acquired:
+                return None
+            payload = load()
+            generation = self.generation() + 1
+            slot = self._encode(payload)
+            if len(slot) > self.slot_size:
+                raise ValueError(
+                    f"El catálogo ocupa {len(slot)} bytes y el slot del segmento compartido solo {self.slot_size}"
+                )
+            _GENERATION.pack_into(self._mmap, _WRITING_OFFSET, generation)
+            start = HEADER_SIZE + (generation % 2) * self.slot_size
+            self._mmap[start:start + len(slot)] = slot
+            _PUBLISHED_AT.pack_into(self._mmap, _PUBLISHED_AT_OFFSET, time.time())
+            _GENERATION.pack_into(self._mmap, _GENERATION_OFFSET, generation)
+            return generation
+    
+    def invalidate(self) -> None:
+        """Marcar la generación vigente como obsoleta para todos los procesos"""
+        with self._locked():
+            _GENERATION.pack_into(self._mmap, _INVALIDATED_OFFSET, self.generation())
+    
+    # Internos
+    @contextmanager
+    def _locked(self, block: bool = True):
+        """flock excluye a otros procesos; el lock de hilos, a los demás hilos de este"""
+        if not self._thread_lock.acquire(blocking=block):
+            yield False
+            return
+        try:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX if block else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+    
+    @staticmethod
+    def _encode(payload: CatalogPayload) -> bytes:
+        columns = array("q")
+        columns.extend(product_id for product_id, _, _ in payload.products)
+        columns.extend(product_type_id for _, product_type_id, _ in payload.products)
+        columns.extend(_to_hundredths(price) for _, _, price in payload.products)
+        for rules in (payload.product_type_discounts, payload.payment_method_discounts, payload.credit_terms_discounts):
+            columns.extend(rule.key for rule in rules)
+            columns.extend(_to_hundredths(rule.discount_percent) for rule in rules)
+            columns.extend(_to_ticks(rule.valid_from, _OPEN_FROM) for rule in rules)
+            columns.extend(_to_ticks(rule.valid_to, _OPEN_TO) for rule in rules)
+        columns.extend(method_id for method_id, _ in payload.payment_methods)
+        
+        header = SLOT_HEADER.pack(
+            len(payload.products),
+            len(payload.product_type_discounts),
+            len(payload.payment_method_discounts),
+            len(payload.credit_terms_discounts),
+            len(payload.payment_methods)
+        )
+        names = b"".join(name.encode("utf-8")[:NAME_SIZE].ljust(NAME_SIZE, b"\0") for _, name in payload.payment_methods)
+        return header + columns.tobytes() + names
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+from app.config.settings import settings
+
+# Headers que cambian la respuesta: forman parte de la llave junto con ruta y query
+VARY_HEADERS = (b"accept", b"accept-encoding", b"authorization", b"cookie")
+
+# Rutas que no se agrupan: respuestas en streaming (memoria acotada) y sondas
+EXCLUDED_PREFIXES = ("/exports", "/events", "/health", "/ready", "/metrics")
+
+class SingleFlightGroup:
+    """
+    Agrupa solicitudes idénticas que están en curso al mismo tiempo
+    
+    La primera (líder) ejecuta la aplicación y guarda los mensajes ASGI de su
+    respuesta mientras los envía a su cliente; las que llegan con la misma
+    llave antes de que termine (seguidoras) esperan y reenvían esa misma
+    respuesta sin tocar la base de datos. No es una caché: al terminar la
+    líder la llave se libera y la siguiente solicitud vuelve a calcularse.
+    
+    Si la respuesta supera `max_bytes` o la líder falla, las seguidoras se
+    ejecutan cada una por su cuenta.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._in_flight: Dict[bytes, asyncio.Future] = {}
+        self._leaders = 0
+        self._followers = 0
+        self._fallbacks = 0
+        self._bytes_saved = 0
+    
+    @staticmethod
+    def key(scope) -> bytes:
+        """Método, ruta, query y headers de VARY_HEADERS (alcance de autenticación incluido)"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(scope["method"].encode("latin-1"))
+        digest.update(b"\0" + scope["path"].encode("utf-8"))
+        digest.update(b"\0" + scope.get("query_string", b""))
+        headers = dict(scope.get("headers", ()))
+        for name in VARY_HEADERS:
+            digest.update(b"\0" + headers.get(name, b""))
+        return digest.digest()
+    
+    async def run(self, key: bytes, app, scope, receive, send) -> None:
+        """Ejecutar la solicitud como líder o esperar la respuesta de la líder en curso"""
+        leader = self._in_flight.get(key)
+        if leader is not None:
+            messages = await asyncio.shield(leader)
+            if messages is None:
+                self._fallbacks += 1
+                await app(scope, receive, send)
+                return
+            self._followers += 1
+            for message in messages:
+                self._bytes_saved += len(message.get("body", b""))
+                await send(self._copy(message))
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._leaders += 1
+        buffer: Optional[List[Dict[str, Any]]] = []
+        size = 0
+        
+        async def send_and_buffer(message):
+            nonlocal buffer, size
+            if buffer is not None:
+                size += len(message.get("body", b""))
+                if size > self.max_bytes:
+                    buffer = None
+                else:
+                    buffer.append(self._copy(message))
+            await send(message)
+        
+        completed = False
+        try:
+            await app(scope, receive, send_and_buffer)
+            completed = True
+        finally:
+            del self._in_flight[key]
+            future.set_result(buffer if completed and buffer else None)
+    
+    @staticmethod
+    def _copy(message: Dict[str, Any]) -> Dict[str, Any]:
+        """Los middlewares externos (CORS) modifican los headers del mensaje: cada envío lleva su copia"""
+        if "headers" in message:
+            return dict(message, headers=list(message["headers"]))
+        return dict(message)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Solicitudes ejecutadas (líderes), agrupadas (seguidoras) y bytes que no se recalcularon"""
+        total = self._leaders + self._followers
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self._leaders,
+            "coalesced": self._followers,
+            "fallbacks": self._fallbacks,
+            "coalesced_ratio": round(self._followers / total, 4) if total else 0.0,
+            "bytes_saved": self._bytes_saved
+        }
+
+class SingleFlightMiddleware:
+    """Middleware ASGI que agrupa los GET idénticos concurrentes en un `SingleFlightGroup`"""
+    
+    def __init__(self, app, group: SingleFlightGroup):
+        self.app = app
+        self.group = group
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not settings.SINGLE_FLIGHT_ENABLED
+            or scope["path"].startswith(EXCLUDED_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        await self.group.run(self.group.key(scope), self.app, scope, receive, send)
+
+# Instancia global del agrupador de lecturas
+single_flight = SingleFlightGroup(settings.SINGLE_FLIGHT_MAX_BYTES)
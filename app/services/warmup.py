@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session, configure_mappers
+from sqlalchemy.pool import QueuePool
+from app.config.settings import settings
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.sale_repository import SaleRepository
+from app.repositories.sale_item_repository import SaleItemRepository
+from app.services.catalog_cache import catalog_cache
+from app.services.product_search import product_search_index
+from app.storage import get_repository, is_memory_backend, open_session
+
+logger = logging.getLogger(__name__)
+
+class WarmupService:
+    """
+    Calentamiento del proceso antes de declararlo listo (GET /ready)
+    
+    Pasos, en orden:
+    - schema: verifica que la base tenga todas las columnas de los modelos
+      (una base anterior sin actualizar falla aquí y no en cada consulta)
+    - pool: abre `pool_connections` conexiones y las devuelve al pool
+    - mappers: configura los mappers de SQLAlchemy
+    - statements: ejecuta una vez las consultas calientes de los repositorios
+      para dejarlas compiladas en la caché de sentencias del engine
+    - catalog: carga métodos de pago y descuentos en `catalog_cache` (o publica
+      el segmento compartido si ningún worker lo ha hecho)
+    - search_index: construye el índice de búsqueda de productos (si está activado)
+    
+    Si un paso falla (por ejemplo, la base de datos todavía no acepta
+    conexiones) el error queda en el estado y los pasos pendientes se
+    reintentan con espera exponencial (`retry_delay`, el doble cada vez, hasta
+    `retry_max_delay`), así que un fallo pasajero no deja el proceso fuera del
+    balanceador para siempre. Mientras tanto atiende en frío.
+    """
+    
+    def __init__(self, pool_connections: int, retry_delay: float = 1.0, retry_max_delay: float = 30.0):
+        self.pool_connections = pool_connections
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.customer_repo = get_repository(CustomerRepository)
+        self.product_repo = get_repository(ProductRepository)
+        self.sale_repo = get_repository(SaleRepository)
+        self.sale_item_repo = get_repository(SaleItemRepository)
+        self._ready = threading.Event()
+        self._stopped = False
+        self._steps: Dict[str, float] = {}
+        self._attempts = 0
+        self._error: Optional[str] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+    
+    def mark_ready(self) -> None:
+        """Declarar el proceso listo sin calentar (WARMUP_ENABLED=false)"""
+        self._ready.set()
+    
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Ejecutar los pasos hasta completarlos o hasta que se active `stop` (al
+        apagar); es bloqueante y se lanza en un hilo desde el lifespan
+        """
+        stop = stop or threading.Event()
+        self._ready.clear()
+        self._stopped = False
+        self._steps = {}
+        self._attempts = 0
+        self._error = None
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+        delay = self.retry_delay
+        while not self._attempt():
+            if stop.wait(delay):
+                self._stopped = True
+                break
+            delay = min(delay * 2, self.retry_max_delay)
+        self._finished_at = time.perf_counter()
+    
+    def _attempt(self) -> bool:
+        """Un intento: ejecuta los pasos que aún no terminaron; True si terminaron todos"""
+        self._attempts += 1
+        try:
+            self._step("schema", self._check_schema)
+            self._step("pool", self._open_pool_connections)
+            self._step("mappers", configure_mappers)
+            db = open_session()
+            try:
+                self._step("statements", lambda: self._prime_statements(db))
+                self._step("catalog", lambda: catalog_cache.get(db))
+                if settings.PRODUCT_SEARCH_INDEX_ENABLED:
+                    self._step("search_index", lambda: product_search_index.build(db))
+            finally:
+                db.close()
+        except Exception as e:
+            self._error = str(e)
+            logger.exception("Error en el calentamiento del proceso (intento %s)", self._attempts)
+            return False
+        self._error = None
+        self._ready.set()
+        return True
+    
+    def status(self) -> Dict[str, Any]:
+        """Estado del calentamiento para /ready"""
+        if self.ready:
+            state = "ready"
+        elif self._error is not None:
+            state = "failed" if self._stopped else "retrying"
+        else:
+            state = "warming_up"
+        
+        duration_ms = None
+        if self._started_at is not None and self._finished_at is not None:
+            duration_ms = round((self._finished_at - self._started_at) * 1000, 2)
+        return {
+            "status": state,
+            "duration_ms": duration_ms,
+            "steps_ms": dict(self._steps),
+            "attempts": self._attempts,
+            "error": self._error
+        }
+    
+    def _step(self, name: str, action) -> None:
+        """Ejecutar un paso y anotar su duración; los que ya terminaron en un intento anterior se omiten"""
+        if name in self._steps:
+            return
+        started = time.perf_counter()
+        action()
+        self._steps[name] = round((time.perf_counter() - started) * 1000, 2)
+    
+    @staticmethod
+    def _check_schema() -> None:
+        if is_memory_backend():
+            return
+        from app.database.connection import engine
+        from app.database.migrations import check_schema
+        check_schema(engine)
+    
+    def _open_pool_connections(self) -> None:
+        """Abrir las conexiones a la vez para que el pool las conserve abiertas"""
+        if is_memory_backend():
+            return
+        from app.database.connection import engine
+        if not isinstance(engine.pool, QueuePool):
+            return
+        count = min(self.pool_connections, engine.pool.size())
+        connections = []
+        try:
+            for _ in range(count):
+                connections.append(engine.connect())
+        finally:
+            for connection in connections:
+                connection.close()
+    
+    def _prime_statements(self, db: Session) -> None:
+        """Consultas de los endpoints más usados (el ID 0 no existe: solo se compila y ejecuta)"""
+        self.customer_repo.get(db, 0)
+        self.customer_repo.get_all(db, limit=1)
+        self.product_repo.get(db, 0)
+        self.product_repo.get_all(db, limit=1)
+        self.sale_repo.get(db, 0)
+        self.sale_repo.get_all(db, limit=1)
+        self.sale_repo.get_page_by_customer(db, 0, limit=1)
+        self.sale_repo.get_existing_ids(db, [0])
+        self.sale_item_repo.get_by_sale(db, 0)
+
+# Instancia global del calentamiento
+warmup_service = WarmupService(
+    settings.WARMUP_POOL_CONNECTIONS,
+    retry_delay=settings.WARMUP_RETRY_DELAY,
+    retry_max_delay=settings.WARMUP_RETRY_MAX_DELAY
+)
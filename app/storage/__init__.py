@@ -0,0 +1,26 @@
+# Storage package: selección del backend de almacenamiento (SQL o memoria)
+from app.config.settings import settings
+
+def is_memory_backend() -> bool:
+    """El backend configurado es el store en memoria"""
+    return settings.STORAGE_BACKEND == "memory"
+
+def get_repository(repository_class):
+    """
+    Instanciar el repositorio del backend configurado
+    
+    Con STORAGE_BACKEND=memory se devuelve la implementación equivalente
+    sobre MemoryStore; en cualquier otro caso, el repositorio SQL indicado.
+    """
+    if is_memory_backend():
+        from app.storage.memory_repositories import MEMORY_REPOSITORIES
+        return MEMORY_REPOSITORIES[repository_class]()
+    return repository_class()
+
+def open_session():
+    """Abrir una sesión independiente del request (el store en memoria no necesita conexión)"""
+    if is_memory_backend():
+        from app.storage.memory import memory_store
+        return memory_store
+    from app.database.connection import SessionLocal
+    return SessionLocal()
@@ -0,0 +1,313 @@
+import base64
+import bisect
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Tuple, Type
+from sqlalchemy import inspect
+from sqlalchemy.types import DECIMAL, DateTime, LargeBinary
+from app.database import models  # noqa: F401 (registra los modelos en Base)
+from app.database.connection import Base
+
+# Índices hash secundarios por tabla (campo -> valor -> IDs en orden de inserción)
+SECONDARY_INDEXES = {
+    "customer_type": ["name"],
+    "credit_terms": ["days"],
+    "customer": ["name", "customer_type_id"],
+    "product_type": ["name"],
+    "product": ["name", "product_type_id"],
+    "payment_method": ["name"],
+    "product_type_discount": ["product_type_id"],
+    "payment_method_discount": ["payment_method_id"],
+    "credit_terms_discount": ["credit_terms_id"],
+    "sale": ["customer_id"],
+    "sale_item": ["sale_id", "product_id"],
+    "idempotency_key": ["idempotency_key"]
+}
+
+SNAPSHOT_VERSION = 1
+
+def _model_for_table(table_name: str) -> Type[Base]:
+    for mapper in Base.registry.mappers:
+        if mapper.local_table.name == table_name:
+            return mapper.class_
+    raise KeyError(table_name)
+
+class MemoryStore:
+    """
+    Almacenamiento en memoria para despliegues sin MySQL (kioscos, edge) y tests
+    
+    Guarda instancias de los modelos ORM (sin sesión) por tabla y mantiene:
+    - índices hash por nombre y llaves foráneas (SECONDARY_INDEXES)
+    - ventas ordenadas por fecha, globales y por cliente, para rangos y keyset
+    - contadores de IDs compatibles con la reserva por bloques (hi-lo)
+    
+    Expone commit/rollback/close vacíos para poder pasarse donde los
+    repositorios esperan una sesión. Las escrituras son inmediatas y se
+    serializan con un lock; `snapshot` y `restore` persisten el contenido en
+    un archivo JSON.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+    
+    def clear(self) -> None:
+        """Vaciar todas las tablas e índices"""
+        with self._lock:
+            self._tables: Dict[str, Dict[Any, Any]] = defaultdict(dict)
+            self._next_ids: Dict[str, int] = defaultdict(lambda: 1)
+            self._indexes: Dict[str, Dict[str, Dict[Any, List[Any]]]] = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+            self._sales_by_date: List[Tuple[datetime, int]] = []
+            self._sales_by_customer_date: Dict[int, List[Tuple[datetime, int]]] = defaultdict(list)
+    
+    # Compatibilidad con Session: las escrituras del store no son transaccionales
+    def commit(self) -> None:
+        pass
+    
+    def rollback(self) -> None:
+        pass
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        pass
+    
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+    
+    def is_empty(self) -> bool:
+        return not any(self._tables.values())
+    
+    # Lecturas
+    def get(self, model: Type[Base], id: Any) -> Optional[Any]:
+        """Obtener un registro por llave primaria (incluye soft-deleted)"""
+        return self._tables[model.__tablename__].get(id)
+    
+    def all(self, model: Type[Base]) -> List[Any]:
+        """Todos los registros de una tabla en orden de llave primaria"""
+        table = self._tables[model.__tablename__]
+        return [table[id] for id in sorted(table)]
+    
+    def find(self, model: Type[Base], field: str, value: Any) -> List[Any]:
+        """Registros cuyo campo es igual al valor (usa el índice secundario si existe)"""
+        table_name = model.__tablename__
+        table = self._tables[table_name]
+        if field in SECONDARY_INDEXES.get(table_name, ()):
+            return [table[id] for id in self._indexes[table_name][field].get(value, ())]
+        return [row for row in self.all(model) if getattr(row, field) == value]
+    
+    def sales_by_date(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        customer_id: Optional[int] = None
+    ) -> List[Any]:
+        """Ventas con fecha en [start, end] en orden ascendente de (fecha, ID)"""
+        keys = self._sales_by_date if customer_id is None else self._sales_by_customer_date.get(customer_id, [])
+        low = 0 if start is None else bisect.bisect_left(keys, (start, -1))
+        high = len(keys) if end is None else bisect.bisect_right(keys, (end, float("inf")))
+        sales = self._tables["sale"]
+        return [sales[sale_id] for _, sale_id in keys[low:high]]
+    
+    def customer_sales_before(
+        self,
+        customer_id: int,
+        before: Optional[Tuple[datetime, int]],
+        limit: int
+    ) -> List[Any]:
+        """
+        Hasta `limit` ventas (sin soft-deleted) de un cliente anteriores a la
+        llave (fecha, ID), de la más reciente a la más antigua
+        
+        La posición de `before` se busca con bisect y solo se recorre la página.
+        """
+        with self._lock:
+            keys = self._sales_by_customer_date.get(customer_id, [])
+            index = len(keys) if before is None else bisect.bisect_left(keys, before)
+            sales = self._tables["sale"]
+            page = []
+            while index > 0 and len(page) < limit:
+                index -= 1
+                sale = sales[keys[index][1]]
+                if sale.deleted_at is None:
+                    page.append(sale)
+            return page
+    
+    # Escrituras
+    def insert(self, model: Type[Base], values: Dict[str, Any]) -> Any:
+        """Insertar un registro; asigna el ID si no viene en `values`"""
+        mapper = inspect(model)
+        pk = mapper.primary_key[0].key
+        table_name = model.__tablename__
+        with self._lock:
+            row = dict(values)
+            if row.get(pk) is None:
+                row[pk] = self._next_ids[table_name]
+            if row[pk] in self._tables[table_name]:
+                raise ValueError(f"Llave duplicada {row[pk]} en {table_name}")
+            if isinstance(row[pk], int):
+                self._next_ids[table_name] = max(self._next_ids[table_name], row[pk] + 1)
+            self._apply_defaults(model, row)
+            self._coerce(model, row)
+            
+            obj = model(**row)
+            self._tables[table_name][row[pk]] = obj
+            self._link(mapper, obj)
+            self._index(table_name, obj, row[pk])
+            return obj
+    
+    def update(self, obj: Any, values: Dict[str, Any]) -> Any:
+        """Actualizar campos de un registro manteniendo los índices"""
+        mapper = inspect(type(obj))
+        pk = mapper.primary_key[0].key
+        table_name = type(obj).__tablename__
+        with self._lock:
+            self._unindex(table_name, obj, getattr(obj, pk))
+            values = dict(values)
+            self._coerce(type(obj), values)
+            for field, value in values.items():
+                if hasattr(obj, field):
+                    setattr(obj, field, value)
+            if hasattr(obj, "updated_at"):
+                obj.updated_at = datetime.now()
+            self._link(mapper, obj)
+            self._index(table_name, obj, getattr(obj, pk))
+            return obj
+    
+    def delete(self, obj: Any) -> None:
+        """Eliminar físicamente un registro"""
+        pk = inspect(type(obj)).primary_key[0].key
+        table_name = type(obj).__tablename__
+        with self._lock:
+            self._unindex(table_name, obj, getattr(obj, pk))
+            del self._tables[table_name][getattr(obj, pk)]
+    
+    def reserve_ids(self, table_name: str, size: int) -> int:
+        """Reservar `size` IDs consecutivos de una tabla y devolver el primero"""
+        with self._lock:
+            start = self._next_ids[table_name]
+            self._next_ids[table_name] = start + size
+            return start
+    
+    # Persistencia
+    def snapshot(self, path: str) -> None:
+        """Guardar el contenido del store en un archivo JSON (escritura atómica)"""
+        with self._lock:
+            data = {
+                "version": SNAPSHOT_VERSION,
+                "next_ids": dict(self._next_ids),
+                "tables": {
+                    table_name: [self._encode_row(row) for _, row in sorted(rows.items())]
+                    for table_name, rows in self._tables.items() if rows
+                }
+            }
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(data, snapshot_file, separators=(",", ":"))
+        os.replace(temporary_path, path)
+    
+    def restore(self, path: str) -> None:
+        """Reemplazar el contenido del store por el de un snapshot"""
+        with open(path, "r", encoding="utf-8") as snapshot_file:
+            data = json.load(snapshot_file)
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada: {data.get('version')}")
+        
+        with self._lock:
+            self.clear()
+            # Insertar respetando las llaves foráneas para enlazar las relaciones
+            for table in Base.metadata.sorted_tables:
+                model = _model_for_table(table.name)
+                for encoded in data["tables"].get(table.name, []):
+                    self.insert(model, self._decode_row(model, encoded))
+            for table_name, next_id in data["next_ids"].items():
+                self._next_ids[table_name] = max(self._next_ids[table_name], next_id)
+    
+    # Internos
+    @staticmethod
+    def _apply_defaults(model: Type[Base], row: Dict[str, Any]) -> None:
+        """Valores que en SQL pone el servidor (server_default)"""
+        now = datetime.now()
+        for column in model.__table__.columns:
+            if row.get(column.key) is not None or column.server_default is None:
+                continue
+            if isinstance(column.type, DateTime):
+                row[column.key] = now
+            elif isinstance(column.type, DECIMAL):
+                row[column.key] = Decimal(str(column.server_default.arg))
+    
+    @staticmethod
+    def _coerce(model: Type[Base], row: Dict[str, Any]) -> None:
+        """Redondear los decimales a la escala de su columna, como lo guarda MySQL"""
+        for column in model.__table__.columns:
+            value = row.get(column.key)
+            if value is not None and isinstance(column.type, DECIMAL) and column.type.scale is not None:
+                row[column.key] = Decimal(str(value)).quantize(Decimal(1).scaleb(-column.type.scale), rounding=ROUND_HALF_UP)
+    
+    def _link(self, mapper, obj: Any) -> None:
+        """Enlazar las relaciones muchos-a-uno con los registros del store"""
+        for relationship in mapper.relationships:
+            if relationship.direction.name != "MANYTOONE":
+                continue
+            local_column = next(iter(relationship.local_columns))
+            target = self.get(relationship.mapper.class_, getattr(obj, local_column.key))
+            if getattr(obj, relationship.key) is not target:
+                setattr(obj, relationship.key, target)
+    
+    def _index(self, table_name: str, obj: Any, id: Any) -> None:
+        for field in SECONDARY_INDEXES.get(table_name, ()):
+            self._indexes[table_name][field][getattr(obj, field)].append(id)
+        if table_name == "sale":
+            key = (obj.sale_datetime, id)
+            bisect.insort(self._sales_by_date, key)
+            bisect.insort(self._sales_by_customer_date[obj.customer_id], key)
+    
+    def _unindex(self, table_name: str, obj: Any, id: Any) -> None:
+        for field in SECONDARY_INDEXES.get(table_name, ()):
+            ids = self._indexes[table_name][field].get(getattr(obj, field))
+            if ids and id in ids:
+                ids.remove(id)
+        if table_name == "sale":
+            key = (obj.sale_datetime, id)
+            for keys in (self._sales_by_date, self._sales_by_customer_date[obj.customer_id]):
+                position = bisect.bisect_left(keys, key)
+                if position < len(keys) and keys[position] == key:
+                    del keys[position]
+    
+    @staticmethod
+    def _encode_row(obj: Any) -> Dict[str, Any]:
+        encoded = {}
+        for column in obj.__table__.columns:
+            value = getattr(obj, column.key)
+            if isinstance(value, Decimal):
+                value = str(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, bytes):
+                value = base64.b64encode(value).decode("ascii")
+            encoded[column.key] = value
+        return encoded
+    
+    @staticmethod
+    def _decode_row(model: Type[Base], encoded: Dict[str, Any]) -> Dict[str, Any]:
+        row = {}
+        for column in model.__table__.columns:
+            value = encoded.get(column.key)
+            if value is not None:
+                if isinstance(column.type, DECIMAL):
+                    value = Decimal(value)
+                elif isinstance(column.type, DateTime):
+                    value = datetime.fromisoformat(value)
+                elif isinstance(column.type, LargeBinary):
+                    value = base64.b64decode(value)
+            row[column.key] = value
+        return row
+
+# Instancia global del store en memoria
+memory_store = MemoryStore()
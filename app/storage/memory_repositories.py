@@ -0,0 +1,665 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type
+from app.config.settings import settings
+from app.database.connection import Base
+from app.database.models import (
+    CreditTerms, CreditTermsDiscount, Customer, CustomerType, IdempotencyKey, OutboxEvent, PaymentMethod,
+    PaymentMethodDiscount, Product, ProductType, ProductTypeDiscount, Sale, SaleItem
+)
+from app.repositories.outbox_repository import EVENT_SALE_DELETED, event_row, sale_created_rows
+from app.repositories.product_repository import SEARCH_TOKEN
+from app.storage.memory import MemoryStore
+
+class BreakdownRow(NamedTuple):
+    """Fila de SaleRepository.get_breakdown_rows (venta, método de pago e item)"""
+    sale_id: int
+    customer_id: int
+    tax_rate_percent: Decimal
+    subtotal: Decimal
+    tax: Decimal
+    total: Decimal
+    total_discounts_amount: Decimal
+    payment_method: str
+    product_id: Optional[int]
+    quantity: Optional[int]
+    list_price: Optional[Decimal]
+    product_type_discount: Optional[Decimal]
+    payment_method_discount: Optional[Decimal]
+    credit_terms_discount: Optional[Decimal]
+    line_subtotal_after_discounts: Optional[Decimal]
+
+# Tuplas con nombre por tabla para `as_rows` (columnas en el orden de la tabla)
+_ROW_TYPES: Dict[str, Type[tuple]] = {}
+
+def _row_type(model: Type[Base]) -> Type[tuple]:
+    row_type = _ROW_TYPES.get(model.__tablename__)
+    if row_type is None:
+        row_type = _ROW_TYPES[model.__tablename__] = namedtuple(
+            f"{model.__name__}Row", [column.key for column in model.__table__.columns]
+        )
+    return row_type
+
+class MemoryRepository:
+    """
+    Repositorio base sobre MemoryStore con la misma interfaz que BaseRepository
+    
+    `db` es el store en memoria; los filtros por soft delete se aplican aquí
+    igual que en las consultas SQL.
+    """
+    
+    def __init__(self, model: Type[Base]):
+        self.model = model
+    
+    def get(self, db: MemoryStore, id: Any) -> Optional[Any]:
+        """Obtener un registro por ID"""
+        return self._alive(db.get(self.model, id))
+    
+    def get_all(self, db: MemoryStore, skip: int = 0, limit: Optional[int] = 100) -> List[Any]:
+        """Obtener todos los registros (sin soft-deleted)"""
+        rows = [row for row in db.all(self.model) if row.deleted_at is None]
+        return rows[skip:] if limit is None else rows[skip:skip + limit]
+    
+    def iter_all(self, db: MemoryStore, batch_size: Optional[int] = None, as_rows: bool = False) -> Iterator[Any]:
+        """Recorrer todos los registros (sin soft-deleted) uno por uno"""
+        for batch in self.iter_batches(db, batch_size=batch_size, as_rows=as_rows):
+            yield from batch
+    
+    def iter_batches(
+        self,
+        db: MemoryStore,
+        batch_size: Optional[int] = None,
+        as_rows: bool = False,
+        **filters: Any
+    ) -> Iterator[List[Any]]:
+        """
+        Recorrer los registros (sin soft-deleted) en lotes de `batch_size`, en orden de ID
+        
+        Con `as_rows=True` cada registro se copia a una tupla con nombre con las
+        columnas de la tabla, como las filas Core de BaseRepository.
+        """
+        batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        rows = self._find(db, **filters)
+        if filters:
+            # El índice secundario guarda los IDs en orden de llegada al valor, no de ID
+            id_field = self._get_id_field()
+            rows.sort(key=lambda row: getattr(row, id_field))
+        row_type = _row_type(self.model) if as_rows else None
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            if row_type is not None:
+                batch = [row_type(*(getattr(row, field) for field in row_type._fields)) for row in batch]
+            yield batch
+    
+    def create(self, db: MemoryStore, obj_in: Dict[str, Any]) -> Any:
+        """Crear un nuevo registro"""
+        return db.insert(self.model, obj_in)
+    
+    def bulk_create(
+        self,
+        db: MemoryStore,
+        rows: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        ignore_conflicts: bool = False
+    ) -> int:
+        """Insertar muchos registros (con `ignore_conflicts` se omiten los que chocan con una llave única)"""
+        id_field = self._get_id_field()
+        unique_fields = [column.key for column in self.model.__table__.columns if column.unique]
+        with db.lock:
+            for row in rows:
+                if ignore_conflicts and (
+                    (row.get(id_field) is not None and db.get(self.model, row[id_field]) is not None)
+                    or any(field in row and db.find(self.model, field, row[field]) for field in unique_fields)
+                ):
+                    continue
+                db.insert(self.model, row)
+        return len(rows)
+    
+    def bulk_update(self, db: MemoryStore, rows: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> int:
+        """Actualizar muchos registros; cada fila debe traer su ID"""
+        id_field = self._get_id_field()
+        with db.lock:
+            for row in rows:
+                db.update(db.get(self.model, row[id_field]), row)
+        return len(rows)
+    
+    def get_ids_by(self, db: MemoryStore, field: str, values: List[Any], chunk_size: Optional[int] = None) -> Dict[Any, int]:
+        """Mapear valores de un campo a su ID (el menor si el valor se repite)"""
+        id_field = self._get_id_field()
+        ids: Dict[Any, int] = {}
+        for value in dict.fromkeys(values):
+            rows = self._find(db, **{field: value})
+            if rows:
+                ids[value] = min(getattr(row, id_field) for row in rows)
+        return ids
+    
+    def get_by_ids(
+        self,
+        db: MemoryStore,
+        ids: List[Any],
+        load: Sequence[str] = (),
+        chunk_size: Optional[int] = None
+    ) -> Dict[Any, Any]:
+        """Obtener varios registros (sin soft-deleted) por ID; las relaciones ya están resueltas en memoria"""
+        rows: Dict[Any, Any] = {}
+        for id in dict.fromkeys(ids):
+            row = self.get(db, id)
+            if row is not None:
+                rows[id] = row
+        return rows
+    
+    def update(self, db: MemoryStore, db_obj: Any, obj_in: Dict[str, Any]) -> Any:
+        """Actualizar un registro existente"""
+        return db.update(db_obj, obj_in)
+    
+    def soft_delete(self, db: MemoryStore, id: Any) -> bool:
+        """Soft delete de un registro"""
+        db_obj = self.get(db, id)
+        if db_obj:
+            db.update(db_obj, {"deleted_at": datetime.now()})
+            return True
+        return False
+    
+    def hard_delete(self, db: MemoryStore, id: Any) -> bool:
+        """Eliminación física de un registro"""
+        db_obj = self.get(db, id)
+        if db_obj:
+            db.delete(db_obj)
+            return True
+        return False
+    
+    def exists(self, db: MemoryStore, id: Any) -> bool:
+        """Verificar si existe un registro"""
+        return self.get(db, id) is not None
+    
+    def _find(self, db: MemoryStore, **filters: Any) -> List[Any]:
+        """Registros sin soft-deleted que cumplen todos los filtros columna=valor"""
+        if not filters:
+            return [row for row in db.all(self.model) if row.deleted_at is None]
+        (field, value), *others = filters.items()
+        return [
+            row for row in db.find(self.model, field, value)
+            if row.deleted_at is None and all(getattr(row, name) == other for name, other in others)
+        ]
+    
+    def _first(self, db: MemoryStore, **filters: Any) -> Optional[Any]:
+        rows = self._find(db, **filters)
+        return rows[0] if rows else None
+    
+    def _get_id_field(self) -> str:
+        return self.model.__mapper__.primary_key[0].key
+    
+    @staticmethod
+    def _alive(row: Optional[Any]) -> Optional[Any]:
+        return row if row is not None and row.deleted_at is None else None
+
+class MemoryCustomerRepository(MemoryRepository):
+    """Clientes en memoria"""
+    
+    def __init__(self):
+        super().__init__(Customer)
+    
+    def get_by_name(self, db: MemoryStore, name: str) -> Optional[Customer]:
+        return self._first(db, name=name)
+    
+    def get_by_type(self, db: MemoryStore, customer_type_id: int) -> List[Customer]:
+        return self._find(db, customer_type_id=customer_type_id)
+    
+    def iter_by_type(self, db: MemoryStore, customer_type_id: int, batch_size: Optional[int] = None, as_rows: bool = False) -> Iterator[Any]:
+        for batch in self.iter_batches(db, batch_size=batch_size, as_rows=as_rows, customer_type_id=customer_type_id):
+            yield from batch
+    
+    def get_with_relations(self, db: MemoryStore, customer_id: int) -> Optional[Customer]:
+        return self.get(db, customer_id)
+
+class MemoryCustomerTypeRepository(MemoryRepository):
+    """Tipos de cliente en memoria"""
+    
+    def __init__(self):
+        super().__init__(CustomerType)
+    
+    def get_by_name(self, db: MemoryStore, name: str) -> Optional[CustomerType]:
+        return self._first(db, name=name)
+
+class MemoryCreditTermsRepository(MemoryRepository):
+    """Términos de crédito en memoria"""
+    
+    def __init__(self):
+        super().__init__(CreditTerms)
+    
+    def get_by_days(self, db: MemoryStore, days: int) -> Optional[CreditTerms]:
+        return self._first(db, days=days)
+
+class MemoryProductRepository(MemoryRepository):
+    """Productos en memoria"""
+    
+    def __init__(self):
+        super().__init__(Product)
+    
+    def get_by_name(self, db: MemoryStore, name: str) -> Optional[Product]:
+        return self._first(db, name=name)
+    
+    def get_by_type(self, db: MemoryStore, product_type_id: int) -> List[Product]:
+        return self._find(db, product_type_id=product_type_id)
+    
+    def iter_by_type(self, db: MemoryStore, product_type_id: int, batch_size: Optional[int] = None, as_rows: bool = False) -> Iterator[Any]:
+        for batch in self.iter_batches(db, batch_size=batch_size, as_rows=as_rows, product_type_id=product_type_id):
+            yield from batch
+    
+    def get_with_relations(self, db: MemoryStore, product_id: int) -> Optional[Product]:
+        return self.get(db, product_id)
+    
+    def search(
+        self,
+        db: MemoryStore,
+        q: str,
+        product_type_id: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        limit: int = 10
+    ) -> List[Product]:
+        # Mismas palabras y misma coincidencia (inicio de una palabra del nombre) que en SQL
+        tokens = SEARCH_TOKEN.findall(q.lower())
+        if not tokens:
+            return []
+        rows = [
+            row for row in self._find(db)
+            if all(row.name.lower().startswith(token) or f" {token}" in row.name.lower() for token in tokens)
+            and (product_type_id is None or row.product_type_id == product_type_id)
+            and (min_price is None or row.list_price >= min_price)
+            and (max_price is None or row.list_price <= max_price)
+        ]
+        rows.sort(key=lambda row: (not row.name.lower().startswith(tokens[0]), len(row.name), row.product_id))
+        return rows[:limit]
+
+class MemoryProductTypeRepository(MemoryRepository):
+    """Tipos de producto en memoria"""
+    
+    def __init__(self):
+        super().__init__(ProductType)
+    
+    def get_by_name(self, db: MemoryStore, name: str) -> Optional[ProductType]:
+        return self._first(db, name=name)
+
+class MemoryPaymentMethodRepository(MemoryRepository):
+    """Métodos de pago en memoria"""
+    
+    def __init__(self):
+        super().__init__(PaymentMethod)
+    
+    def get_by_name(self, db: MemoryStore, name: str) -> Optional[PaymentMethod]:
+        return self._first(db, name=name)
+
+class MemoryProductTypeDiscountRepository(MemoryRepository):
+    """Descuentos por tipo de producto en memoria"""
+    
+    def __init__(self):
+        super().__init__(ProductTypeDiscount)
+    
+    def get_by_product_type(self, db: MemoryStore, product_type_id: int) -> Optional[ProductTypeDiscount]:
+        return self._first(db, product_type_id=product_type_id)
+    
+    def get_by_product_type_name(self, db: MemoryStore, product_type_name: str) -> Optional[ProductTypeDiscount]:
+        product_type = MemoryProductTypeRepository().get_by_name(db, product_type_name)
+        return self.get_by_product_type(db, product_type.product_type_id) if product_type else None
+
+class MemoryPaymentMethodDiscountRepository(MemoryRepository):
+    """Descuentos por método de pago en memoria"""
+    
+    def __init__(self):
+        super().__init__(PaymentMethodDiscount)
+    
+    def get_by_payment_method(self, db: MemoryStore, payment_method_id: int) -> Optional[PaymentMethodDiscount]:
+        return self._first(db, payment_method_id=payment_method_id)
+    
+    def get_by_payment_method_name(self, db: MemoryStore, payment_method_name: str) -> Optional[PaymentMethodDiscount]:
+        payment_method = MemoryPaymentMethodRepository().get_by_name(db, payment_method_name)
+        return self.get_by_payment_method(db, payment_method.payment_method_id) if payment_method else None
+
+class MemoryCreditTermsDiscountRepository(MemoryRepository):
+    """Descuentos por términos de crédito en memoria"""
+    
+    def __init__(self):
+        super().__init__(CreditTermsDiscount)
+    
+    def get_by_credit_terms_id(self, db: MemoryStore, credit_terms_id: int) -> Optional[CreditTermsDiscount]:
+        return self._first(db, credit_terms_id=credit_terms_id)
+    
+    def get_by_days(self, db: MemoryStore, days: int) -> Optional[CreditTermsDiscount]:
+        credit_terms = MemoryCreditTermsRepository().get_by_days(db, days)
+        return self.get_by_credit_terms_id(db, credit_terms.credit_terms_id) if credit_terms else None
+
+class MemorySaleItemRepository(MemoryRepository):
+    """Items de venta en memoria, con los agregados de estadísticas calculados en Python"""
+    
+    def __init__(self):
+        super().__init__(SaleItem)
+    
+    def get_by_sale(self, db: MemoryStore, sale_id: int) -> List[SaleItem]:
+        return self._find(db, sale_id=sale_id)
+    
+    def get_by_product(self, db: MemoryStore, product_id: int) -> List[SaleItem]:
+        return self._find(db, product_id=product_id)
+    
+    def iter_with_sales(
+        self,
+        db: MemoryStore,
+        columns: List[Any],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[List[Tuple]]:
+        """Recorrer items unidos a su venta como tuplas en el orden de `columns`, por lotes"""
+        batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        batch = []
+        for sale in db.sales_by_date(start_date, end_date):
+            if sale.deleted_at is not None:
+                continue
+            for item in self.get_by_sale(db, sale.sale_id):
+                batch.append(tuple(
+                    getattr(sale if column.table is Sale.__table__ else item, column.key)
+                    for column in columns
+                ))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    
+    def iter_repricing_rows(
+        self,
+        db: MemoryStore,
+        start: datetime,
+        end: datetime,
+        batch_size: Optional[int] = None
+    ) -> Iterator[List[Tuple]]:
+        """Items vendidos en [start, end) con lo necesario para recalcularlos (ver SaleItemRepository)"""
+        batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        batch = []
+        for sale in db.sales_by_date(start, end):
+            if sale.deleted_at is not None or sale.sale_datetime >= end:
+                continue
+            customer = db.get(Customer, sale.customer_id)
+            for item in self.get_by_sale(db, sale.sale_id):
+                batch.append((
+                    sale.sale_datetime,
+                    sale.payment_method_id,
+                    customer.credit_terms_id,
+                    db.get(Product, item.product_id).product_type_id,
+                    item.list_price,
+                    item.quantity,
+                    item.line_subtotal_after_discounts
+                ))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    
+    def get_product_stats(
+        self,
+        db: MemoryStore,
+        product_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        items = self._items_in_range(db, self.get_by_product(db, product_id), start_date, end_date)
+        return self._aggregate(items)
+    
+    def get_top_products(
+        self,
+        db: MemoryStore,
+        limit: int = 10,
+        order_by: str = "revenue",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        product_type_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        by_product = defaultdict(list)
+        for item in self._items_in_range(db, self._find(db), start_date, end_date):
+            if product_type_id is None or item.product.product_type_id == product_type_id:
+                by_product[item.product_id].append(item)
+        
+        rows = []
+        for product_id, items in by_product.items():
+            product = items[0].product
+            rows.append({
+                "product_id": product_id,
+                "name": product.name,
+                "product_type": product.product_type_ref.name,
+                **self._aggregate(items)
+            })
+        sort_key = "units_sold" if order_by == "units" else "revenue"
+        rows.sort(key=lambda row: (-row[sort_key], row["product_id"]))
+        return rows[:limit]
+    
+    def get_product_type_rollup(
+        self,
+        db: MemoryStore,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        by_type = defaultdict(list)
+        for item in self._items_in_range(db, self._find(db), start_date, end_date):
+            by_type[item.product.product_type_ref.name].append(item)
+        
+        rows = [
+            {
+                "product_type": product_type,
+                "products_sold": len({item.product_id for item in items}),
+                **self._aggregate(items)
+            }
+            for product_type, items in by_type.items()
+        ]
+        rows.sort(key=lambda row: -row["revenue"])
+        return rows
+    
+    @staticmethod
+    def _items_in_range(
+        db: MemoryStore,
+        items: List[SaleItem],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> List[SaleItem]:
+        return [
+            item for item in items
+            if item.sale.deleted_at is None
+            and (start_date is None or item.sale.sale_datetime >= start_date)
+            and (end_date is None or item.sale.sale_datetime <= end_date)
+        ]
+    
+    @staticmethod
+    def _aggregate(items: List[SaleItem]) -> Dict[str, Any]:
+        return {
+            "units_sold": sum(item.quantity for item in items),
+            "sales_count": len(items),
+            "revenue": sum((item.line_subtotal_after_discounts for item in items), Decimal('0.00')),
+            "discounts_amount": sum(
+                (item.product_type_discount + item.payment_method_discount + item.credit_terms_discount for item in items),
+                Decimal('0.00')
+            ),
+            "last_sale": max((item.sale.sale_datetime for item in items), default=None)
+        }
+
+class MemorySaleRepository(MemoryRepository):
+    """Ventas en memoria, con índices por cliente y por fecha"""
+    
+    def __init__(self):
+        super().__init__(Sale)
+    
+    def get_by_customer(self, db: MemoryStore, customer_id: int) -> List[Sale]:
+        return self._find(db, customer_id=customer_id)
+    
+    def get_page_by_customer(
+        self,
+        db: MemoryStore,
+        customer_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None
+    ) -> List[Tuple[Sale, str]]:
+        """Página del historial de un cliente (keyset sobre fecha e ID, descendente)"""
+        return [(sale, sale.payment_method.name) for sale in db.customer_sales_before(customer_id, before, limit)]
+    
+    def get_customer_summary(self, db: MemoryStore, customer_id: int) -> Dict[str, Any]:
+        sales = self.get_by_customer(db, customer_id)
+        return {
+            "sales_count": len(sales),
+            "lifetime_total": sum((sale.total for sale in sales), Decimal('0')),
+            "last_purchase": max((sale.sale_datetime for sale in sales), default=None)
+        }
+    
+    def get_by_date_range(self, db: MemoryStore, start_date, end_date) -> List[Sale]:
+        return [sale for sale in db.sales_by_date(start_date, end_date) if sale.deleted_at is None]
+    
+    def get_with_items(self, db: MemoryStore, sale_id: int) -> Optional[Sale]:
+        return self.get(db, sale_id)
+    
+    def get_breakdown_rows(self, db: MemoryStore, sale_id: int) -> List[BreakdownRow]:
+        """Venta con su método de pago y sus items, una fila por item (ver SaleRepository)"""
+        sale = self.get(db, sale_id)
+        if sale is None:
+            return []
+        items = [item for item in db.find(SaleItem, "sale_id", sale_id) if item.deleted_at is None]
+        sale_fields = (
+            sale.sale_id, sale.customer_id, sale.tax_rate_percent, sale.subtotal, sale.tax,
+            sale.total, sale.total_discounts_amount, sale.payment_method.name
+        )
+        if not items:
+            return [BreakdownRow(*sale_fields, *([None] * 7))]
+        return [
+            BreakdownRow(
+                *sale_fields,
+                item.product_id, item.quantity, item.list_price, item.product_type_discount,
+                item.payment_method_discount, item.credit_terms_discount, item.line_subtotal_after_discounts
+            )
+            for item in sorted(items, key=lambda item: item.sale_item_id)
+        ]
+    
+    def insert_sales(self, db: MemoryStore, sale_rows: List[Dict[str, Any]], item_rows: List[Dict[str, Any]]) -> None:
+        """Insertar ventas y sus items con IDs ya asignados (y sus eventos `sale.created`)"""
+        with db.lock:
+            for sale_row in sale_rows:
+                db.insert(Sale, sale_row)
+            for item_row in item_rows:
+                db.insert(SaleItem, item_row)
+            MemoryOutboxRepository().append(db, sale_created_rows(sale_rows, item_rows))
+    
+    def soft_delete(self, db: MemoryStore, id: Any) -> bool:
+        """Soft delete de una venta con su evento `sale.deleted`"""
+        with db.lock:
+            if not super().soft_delete(db, id):
+                return False
+            MemoryOutboxRepository().append(db, [event_row(EVENT_SALE_DELETED, id, {"sale_id": id})])
+            return True
+    
+    def get_existing_ids(self, db: MemoryStore, sale_ids: List[int]) -> List[int]:
+        return [sale_id for sale_id in sale_ids if db.get(Sale, sale_id) is not None]
+    
+    def get_total_sales(self, db: MemoryStore) -> float:
+        return float(sum(sale.total for sale in self._find(db)))
+
+class MemoryIdSequenceRepository:
+    """Secuencias de IDs por bloques sobre los contadores del store"""
+    
+    def reserve_block(self, db: MemoryStore, id_column, size: int) -> int:
+        return db.reserve_ids(id_column.property.columns[0].table.name, size)
+
+class MemoryIdempotencyRepository:
+    """Llaves de idempotencia en memoria"""
+    
+    def get_by_key(self, db: MemoryStore, key: str) -> Optional[IdempotencyKey]:
+        rows = db.find(IdempotencyKey, "idempotency_key", key)
+        return rows[0] if rows else None
+    
+    def claim(self, db: MemoryStore, key: str, request_hash: str) -> bool:
+        with db.lock:
+            if self.get_by_key(db, key) is not None:
+                return False
+            db.insert(IdempotencyKey, {"idempotency_key": key, "request_hash": request_hash})
+            return True
+    
+    def complete(self, db: MemoryStore, key: str, status_code: int, response_body: bytes) -> None:
+        record = self.get_by_key(db, key)
+        if record is not None:
+            db.update(record, {"status_code": status_code, "response_body": response_body})
+    
+    def release(self, db: MemoryStore, key: str) -> None:
+        record = self.get_by_key(db, key)
+        if record is not None and record.status_code is None:
+            db.delete(record)
+
+class MemoryOutboxRepository:
+    """Eventos del outbox en memoria (en orden de event_id)"""
+    
+    def append(self, db: MemoryStore, rows: List[Dict[str, Any]]) -> None:
+        with db.lock:
+            for row in rows:
+                db.insert(OutboxEvent, row)
+    
+    def get_after(self, db: MemoryStore, after: int, limit: int, until: Optional[int] = None) -> List[OutboxEvent]:
+        events = []
+        for event in db.all(OutboxEvent):
+            if event.event_id <= after:
+                continue
+            if until is not None and event.event_id > until:
+                break
+            events.append(event)
+            if len(events) == limit:
+                break
+        return events
+    
+    def reappend(self, db: MemoryStore, event_ids: List[int]) -> List[int]:
+        moved = []
+        with db.lock:
+            for event in db.all(OutboxEvent):
+                if event.event_id in event_ids:
+                    db.delete(event)
+                    db.insert(OutboxEvent, {
+                        "event_type": event.event_type,
+                        "aggregate_id": event.aggregate_id,
+                        "payload": event.payload,
+                        "created_at": event.created_at
+                    })
+                    moved.append(event.event_id)
+        return moved
+    
+    def get_last_id(self, db: MemoryStore) -> int:
+        return max((event.event_id for event in db.all(OutboxEvent)), default=0)
+    
+    def purge_before(self, db: MemoryStore, created_before: datetime) -> int:
+        with db.lock:
+            expired = [event for event in db.all(OutboxEvent) if event.created_at < created_before]
+            for event in expired:
+                db.delete(event)
+        return len(expired)
+
+def _build_registry() -> Dict[type, type]:
+    from app.repositories import (
+        credit_terms_discount_repository, credit_terms_repository, customer_repository,
+        customer_type_repository, discount_repository, id_sequence_repository, idempotency_repository,
+        outbox_repository, payment_method_repository, product_repository, product_type_repository,
+        sale_item_repository, sale_repository
+    )
+    return {
+        customer_repository.CustomerRepository: MemoryCustomerRepository,
+        customer_repository.CustomerTypeRepository: MemoryCustomerTypeRepository,
+        customer_repository.CreditTermsRepository: MemoryCreditTermsRepository,
+        customer_type_repository.CustomerTypeRepository: MemoryCustomerTypeRepository,
+        credit_terms_repository.CreditTermsRepository: MemoryCreditTermsRepository,
+        product_repository.ProductRepository: MemoryProductRepository,
+        product_repository.ProductTypeRepository: MemoryProductTypeRepository,
+        product_type_repository.ProductTypeRepository: MemoryProductTypeRepository,
+        payment_method_repository.PaymentMethodRepository: MemoryPaymentMethodRepository,
+        discount_repository.ProductTypeDiscountRepository: MemoryProductTypeDiscountRepository,
+        discount_repository.PaymentMethodDiscountRepository: MemoryPaymentMethodDiscountRepository,
+        credit_terms_discount_repository.CreditTermsDiscountRepository: MemoryCreditTermsDiscountRepository,
+        sale_repository.SaleRepository: MemorySaleRepository,
+        sale_item_repository.SaleItemRepository: MemorySaleItemRepository,
+        id_sequence_repository.IdSequenceRepository: MemoryIdSequenceRepository,
+        idempotency_repository.IdempotencyRepository: MemoryIdempotencyRepository,
+        outbox_repository.OutboxRepository: MemoryOutboxRepository
+    }
+
+# Repositorio SQL -> implementación en memoria
+MEMORY_REPOSITORIES = _build_registry()
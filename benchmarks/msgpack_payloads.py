@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tamaño y tiempo de codificación: JSON contra MessagePack (+ zstd)
+
+Arma en memoria las respuestas típicas de los terminales (desglose de una
+venta con muchos items y listado de productos) con los modelos de la API y
+las codifica como lo hace cada camino:
+- json: `jsonable_encoder` + `json.dumps` (lo que hace FastAPI)
+- msgpack: modelo en modo python + `msgpack_codec.packb` (Decimal como extensión)
+- msgpack+zstd: lo anterior comprimido con el nivel configurado
+- msgpack (ruta): lo que hace NegotiatedRoute sobre la respuesta JSON ya
+  generada (decodificar, validar contra el response_model y empaquetar);
+  se suma al tiempo de json
+
+Requiere msgpack; zstandard es opcional.
+
+Ejemplo:
+    python benchmarks/msgpack_payloads.py --items 200 --products 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.config.settings import settings
+from app.models import Product, Sale
+from app.services import msgpack_codec
+
+def sale_payload(items: int) -> Sale:
+    lines = [
+        {
+            "product_id": i,
+            "quantity": 1 + i % 5,
+            "list_price": Decimal("1299.90") + i,
+            "discounts": {"product_type": Decimal("5.00"), "payment_method": Decimal("2.50"), "credit_terms": Decimal("1.00")},
+            "line_subtotal_after_discounts": Decimal("1180.35") + i
+        }
+        for i in range(items)
+    ]
+    return Sale(
+        sale_id=1,
+        customer_id=1,
+        payment_method="Cash",
+        tax_rate_percent=Decimal("16.00"),
+        breakdown={
+            "lines": lines,
+            "subtotal": Decimal("236070.00"),
+            "tax": Decimal("37771.20"),
+            "total": Decimal("273841.20"),
+            "total_discounts_amount": Decimal("20460.00")
+        }
+    )
+
+def products_payload(products: int) -> list:
+    return [
+        Product(product_id=i, name=f"Producto {i}", product_type="Electronics", list_price=Decimal("99.99") + i)
+        for i in range(products)
+    ]
+
+def encode_json(payload) -> bytes:
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+
+def encode_msgpack(payload) -> bytes:
+    if isinstance(payload, list):
+        return msgpack_codec.packb([item.model_dump(mode="python") for item in payload])
+    return msgpack_codec.packb(payload.model_dump(mode="python"))
+
+def encode_msgpack_zstd(payload) -> bytes:
+    return msgpack_codec.compress(encode_msgpack(payload), settings.MSGPACK_ZSTD_LEVEL)
+
+def encode_route(payload) -> bytes:
+    adapter = TypeAdapter(List[Product] if isinstance(payload, list) else Sale)
+    body = encode_json(payload)
+    return msgpack_codec.packb(adapter.dump_python(adapter.validate_python(json.loads(body)), mode="python"))
+
+def measure(encode, payload, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    return len(body), statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamaño y tiempo de codificación JSON vs MessagePack")
+    parser.add_argument("--items", type=int, default=200, help="Items en el desglose de la venta")
+    parser.add_argument("--products", type=int, default=5000, help="Productos en el listado")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por medición (se reporta la mediana)")
+    args = parser.parse_args()
+    
+    if not msgpack_codec.is_available():
+        sys.exit("Este benchmark requiere msgpack (pip install msgpack)")
+    
+    encoders = {"json": encode_json, "msgpack": encode_msgpack}
+    if msgpack_codec.zstd_available():
+        encoders["msgpack+zstd"] = encode_msgpack_zstd
+    encoders["msgpack (ruta)"] = encode_route
+    
+    payloads = {
+        f"venta ({args.items} items)": sale_payload(args.items),
+        f"productos ({args.products})": products_payload(args.products)
+    }
+    for label, payload in payloads.items():
+        json_size, _ = measure(encode_json, payload, 1)
+        print(f"\n{label}")
+        print(f"   {'formato':<14}{'bytes':>12}{'vs json':>10}{'codificar':>14}")
+        for name, encode in encoders.items():
+            size, encode_ms = measure(encode, payload, args.repeat)
+            print(f"   {name:<14}{size:>12}{size / json_size:>9.0%}{encode_ms:>12.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice de búsqueda de productos (typeahead)
+
+Genera nombres sintéticos (marca + categoría + modelo + atributos), construye
+el índice en memoria sin base de datos y mide la latencia de consultas como
+las que envía un cuadro de búsqueda mientras se escribe: prefijos de 1 a N
+letras, con y sin filtros.
+
+Ejemplo:
+    python benchmarks/product_search.py --products 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.product_search import ProductSearchIndex
+from app.config.settings import settings
+
+BRANDS = ["Sony", "Samsung", "Lenovo", "Acme", "Nike", "Adidas", "Penguin", "Planeta", "Logitech", "Philips"]
+CATEGORIES = {
+    "Electronics": ["Cámara", "Televisor", "Audífonos", "Laptop", "Monitor", "Teclado", "Bocina", "Tableta"],
+    "Clothing": ["Camisa", "Pantalón", "Chamarra", "Tenis", "Sudadera", "Calcetines", "Gorra", "Vestido"],
+    "Books": ["Novela", "Cuentos", "Manual", "Enciclopedia", "Diccionario", "Biografía", "Poesía", "Ensayo"]
+}
+ATTRIBUTES = ["Pro", "Max", "Mini", "Ultra", "Lite", "Plus", "Negro", "Blanco", "Azul", "Rojo", "XL", "4K", "HD"]
+
+def products(count: int, rng: random.Random):
+    types = list(CATEGORIES)
+    for product_id in range(1, count + 1):
+        product_type = rng.choice(types)
+        name = " ".join([
+            rng.choice(CATEGORIES[product_type]),
+            rng.choice(BRANDS),
+            f"{rng.choice('ABCDEFGHJKLMNPRSTVXZ')}{rng.randint(1, 9999)}",
+            *rng.sample(ATTRIBUTES, rng.randint(0, 2))
+        ])
+        yield product_id, name, product_type, Decimal(rng.randint(100, 5000000)) / 100
+
+def typeahead(phrase: str):
+    """Las consultas de ir escribiendo una frase letra por letra"""
+    return [phrase[:end] for end in range(1, len(phrase) + 1) if not phrase[:end].endswith(" ")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia del índice de búsqueda de productos")
+    parser.add_argument("--products", type=int, default=500000, help="Productos en el índice")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    index = ProductSearchIndex(settings.PRODUCT_SEARCH_MAX_EXPANSIONS, settings.PRODUCT_SEARCH_MAX_CANDIDATES)
+    started = time.perf_counter()
+    index.load(products(args.products, random.Random(args.seed)))
+    print(f"Índice: {len(index)} productos en {time.perf_counter() - started:.1f}s")
+    
+    scenarios = {
+        "typeahead 'camara sony pro'": [(q, {}) for q in typeahead("camara sony pro")],
+        "typeahead 'novela planeta'": [(q, {}) for q in typeahead("novela planeta")],
+        "typeahead con tipo y precio": [
+            (q, {"product_type": "Electronics", "min_price": Decimal("1000"), "max_price": Decimal("20000")})
+            for q in typeahead("monitor 4k")
+        ],
+        "sin resultados": [("zzz", {}), ("camara xyz", {})]
+    }
+    print(f"   {'escenario':<32}{'consultas':>10}{'p50':>10}{'p99':>10}{'max':>10}")
+    for label, queries in scenarios.items():
+        timings = []
+        for _ in range(20):
+            for q, filters in queries:
+                started = time.perf_counter()
+                index.search(q, limit=10, **filters)
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"   {label:<32}{len(queries):>10}{statistics.median(timings):>8.2f}ms{p99:>8.2f}ms{timings[-1]:>8.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia de la primera solicitud después de iniciar un worker
+
+Cada modo corre en un proceso nuevo (mappers, pool y cachés en frío): arranca
+la aplicación con el lifespan, espera a /ready y mide la primera llamada a
+cada endpoint contra la mediana de las siguientes (estado estable).
+
+Ejemplo:
+    python benchmarks/startup_latency.py --requests 50
+    DB_ENGINE=sqlite SQLITE_PATH=ventas.sqlite3 python benchmarks/startup_latency.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure(requests: int) -> dict:
+    """Medir en este proceso (se ejecuta en el hijo con WARMUP_ENABLED ya fijado)"""
+    sys.path.insert(0, ROOT)
+    from fastapi.testclient import TestClient
+    from main import app
+    
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.01)
+        ready_ms = (time.perf_counter() - started) * 1000
+        
+        calls = {
+            "GET /customers/": lambda: client.get("/customers/"),
+            "GET /products/": lambda: client.get("/products/"),
+            "GET /sales/": lambda: client.get("/sales/"),
+            "GET /customers/0/sales": lambda: client.get("/customers/0/sales")
+        }
+        results = {}
+        for name, call in calls.items():
+            timings = []
+            for _ in range(requests + 1):
+                call_started = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - call_started) * 1000)
+            results[name] = {"first_ms": timings[0], "steady_ms": statistics.median(timings[1:])}
+    return {"ready_ms": ready_ms, "endpoints": results}
+
+def run_child(warmup: bool, requests: int) -> dict:
+    env = dict(os.environ, WARMUP_ENABLED=str(warmup))
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--requests", str(requests)],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de la primera solicitud con y sin calentamiento")
+    parser.add_argument("--requests", type=int, default=50, help="Solicitudes por endpoint para el estado estable")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(measure(args.requests)))
+        return
+    
+    for label, warmup in (("sin calentamiento", False), ("con calentamiento", True)):
+        result = run_child(warmup, args.requests)
+        print(f"\n{label} (listo en {result['ready_ms']:.1f} ms)")
+        print(f"   {'endpoint':<24}{'primera':>12}{'estable':>12}{'ratio':>8}")
+        for name, timing in result["endpoints"].items():
+            ratio = timing["first_ms"] / timing["steady_ms"] if timing["steady_ms"] else float("inf")
+            print(f"   {name:<24}{timing['first_ms']:>10.2f}ms{timing['steady_ms']:>10.2f}ms{ratio:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
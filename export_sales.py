@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Script para exportar ventas con sus items en formato columnar (Parquet / Arrow)
+
+Ejemplo:
+    python export_sales.py --output ventas_2025.parquet --start-date 2025-01-01 --end-date 2025-12-31
+"""
+import argparse
+from datetime import datetime
+from app.database.connection import SessionLocal
+from app.services.export_service import SalesExportService
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exportar ventas en formato Parquet o Arrow IPC")
+    parser.add_argument("--output", required=True, help="Archivo de salida")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet", help="Formato de salida")
+    parser.add_argument("--start-date", type=datetime.fromisoformat, help="Fecha inicial (ISO 8601)")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, help="Fecha final (ISO 8601)")
+    parser.add_argument("--chunk-size", type=int, help="Filas por bloque leído de la base de datos")
+    return parser.parse_args()
+
+def export_sales():
+    """Exportar ventas al archivo indicado"""
+    args = parse_args()
+    
+    if not SalesExportService.is_available():
+        raise SystemExit("❌ Las exportaciones requieren pyarrow: pip install pyarrow")
+    
+    export_service = SalesExportService(args.chunk_size) if args.chunk_size else SalesExportService()
+    db = SessionLocal()
+    try:
+        print(f"🔄 Exportando ventas a {args.output}...")
+        if args.format == "parquet":
+            rows = export_service.write_parquet(db, args.output, args.start_date, args.end_date)
+        else:
+            rows = export_service.write_arrow(db, args.output, args.start_date, args.end_date)
+        print(f"✅ {rows} filas exportadas")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    export_sales()
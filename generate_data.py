@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script para generar datos sintéticos a escala de producción
+
+Requiere los catálogos básicos (ejecutar init_db.py antes). En MySQL usa
+LOAD DATA LOCAL INFILE, por lo que el servidor debe tener `local_infile=1`.
+
+Ejemplo:
+    python generate_data.py --customers 1000000 --products 100000 --sales 50000000 --seed 42
+"""
+import argparse
+import time
+from sqlalchemy import create_engine
+from app.config.settings import settings
+from app.services.data_generator import SyntheticDataGenerator
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generar clientes, productos y ventas sintéticos")
+    parser.add_argument("--customers", type=int, default=0, help="Clientes a generar")
+    parser.add_argument("--products", type=int, default=0, help="Productos a generar")
+    parser.add_argument("--sales", type=int, default=0, help="Ventas a generar (usa todos los clientes y productos existentes)")
+    parser.add_argument("--days", type=int, default=365, help="Días hacia atrás en los que se reparten las ventas")
+    parser.add_argument("--seed", type=int, help="Semilla para obtener siempre los mismos datos")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Filas por bloque cargado")
+    parser.add_argument(
+        "--method",
+        choices=["auto", "load_data", "insert"],
+        default="auto",
+        help="Vía de carga: LOAD DATA LOCAL INFILE (MySQL) o INSERT por lotes"
+    )
+    parser.add_argument("--database-url", default=settings.database.database_url, help="URL de SQLAlchemy de la base destino")
+    return parser.parse_args()
+
+def generate_data():
+    """Generar los datos sintéticos indicados por línea de comandos"""
+    args = parse_args()
+    
+    connect_args = {"local_infile": True} if args.database_url.startswith("mysql") else {}
+    engine = create_engine(args.database_url, connect_args=connect_args)
+    
+    def progress(table: str, done: int, total: int):
+        print(f"   {table}: {done:,}/{total:,}", flush=True)
+    
+    generator = SyntheticDataGenerator(
+        engine,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        method=args.method,
+        days=args.days,
+        progress=progress
+    )
+    
+    print(f"🚀 Generando datos ({generator.method})...")
+    started = time.perf_counter()
+    try:
+        counts = generator.generate(args.customers, args.products, args.sales)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    finally:
+        engine.dispose()
+    
+    elapsed = time.perf_counter() - started
+    print(f"\n🎉 Datos generados en {elapsed:.1f}s:")
+    for table, rows in counts.items():
+        print(f"   - {table}: {rows:,} filas")
+
+if __name__ == "__main__":
+    generate_data()
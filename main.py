@@ -1,16 +1,90 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import customers, products, discounts, sales
+from fastapi.responses import JSONResponse
+from app.routers import customers, products, discounts, sales, exports, repricing, events
 from app.config.settings import settings
+from app.services.sale_journal import sale_journal_writer
+from app.services.sale_coalescer import sale_coalescer
+from app.services.invalidation_bus import invalidation_bus
+from app.services.admission_control import AdmissionControlMiddleware, admission_controller
+from app.services.single_flight import SingleFlightMiddleware, single_flight
+from app.services.sale_response_cache import sale_response_cache
+from app.services.outbox_relay import outbox_relay
+from app.database.connection import pool_wait_monitor
+from app.services.warmup import warmup_service
+from app.storage import is_memory_backend
+from app.storage.memory import memory_store
+from app.database.seed import init_database
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida de la aplicación
+    
+    En modo de escritura diferida arranca el escritor del log de ventas, que
+    primero reproduce lo que haya quedado pendiente, y lo vacía al apagar.
+    En modo group commit escribe las ventas que sigan en cola antes de salir.
+    
+    Con el backend en memoria restaura el snapshot configurado (o carga los
+    catálogos básicos si no existe) y lo guarda al apagar.
+    
+    El calentamiento (pool, mappers, consultas y catálogos) corre en un hilo
+    para que /health responda desde el inicio; /ready espera a que termine
+    (si falla, lo reintenta hasta lograrlo o hasta apagar).
+    El bus de invalidación recibe en segundo plano los cambios de otros workers
+    y el relay del outbox sigue los eventos de ventas para GET /events.
+    """
+    if is_memory_backend():
+        if settings.SALE_WRITE_MODE != "direct":
+            raise RuntimeError("El backend en memoria solo soporta SALE_WRITE_MODE=direct")
+        if settings.MEMORY_SNAPSHOT_PATH and os.path.exists(settings.MEMORY_SNAPSHOT_PATH):
+            memory_store.restore(settings.MEMORY_SNAPSHOT_PATH)
+        elif memory_store.is_empty():
+            init_database()
+    if settings.SALE_WRITE_MODE == "write_behind":
+        sale_journal_writer.start()
+    
+    invalidation_bus.start()
+    outbox_relay.start()
+    warmup_task = None
+    warmup_stop = threading.Event()
+    if settings.WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(asyncio.to_thread(warmup_service.run, warmup_stop))
+    else:
+        warmup_service.mark_ready()
+    yield
+    if warmup_task is not None:
+        # Un calentamiento que sigue reintentando se abandona al apagar
+        warmup_stop.set()
+        await warmup_task
+    invalidation_bus.stop()
+    outbox_relay.stop()
+    if settings.SALE_WRITE_MODE == "write_behind":
+        sale_journal_writer.stop()
+    sale_coalescer.stop()
+    if is_memory_backend() and settings.MEMORY_SNAPSHOT_PATH:
+        memory_store.snapshot(settings.MEMORY_SNAPSHOT_PATH)
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="Sistema de API para gestión de ventas, clientes, productos y descuentos",
     version=settings.APP_VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Control de admisión (se agrega antes que CORS para que los 503 lleven sus headers)
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
+# Agrupación de lecturas idénticas: por fuera del control de admisión, así
+# las solicitudes agrupadas no ocupan lugar
+app.add_middleware(SingleFlightMiddleware, group=single_flight)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +99,9 @@ app.include_router(customers.router)
 app.include_router(products.router)
 app.include_router(discounts.router)
 app.include_router(sales.router)
+app.include_router(exports.router)
+app.include_router(repricing.router)
+app.include_router(events.router)
 
 @app.get("/")
 def read_root():
@@ -39,7 +116,8 @@ def read_root():
             "customers": "/customers",
             "products": "/products", 
             "discounts": "/discounts",
-            "sales": "/sales"
+            "sales": "/sales",
+            "exports": "/exports"
         }
     }
 
@@ -48,4 +126,30 @@ def health_check():
     """
     Endpoint de verificación de salud de la API
     """
-    return {"status": "healthy", "service": settings.APP_NAME}
\ No newline at end of file
+    return {"status": "healthy", "service": settings.APP_NAME}
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Endpoint de disponibilidad: 503 hasta que el proceso termina de calentarse
+    """
+    warmup = warmup_service.status()
+    status_code = status.HTTP_200_OK if warmup_service.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(
+        status_code=status_code,
+        content={"status": warmup["status"], "warmup": warmup, "invalidation": invalidation_bus.stats()}
+    )
+
+@app.get("/metrics")
+def metrics():
+    """
+    Métricas del proceso: control de admisión, lecturas agrupadas, espera del pool, bus de invalidación, caché de ventas y relay del outbox
+    """
+    return {
+        "admission": admission_controller.stats(),
+        "single_flight": single_flight.stats(),
+        "pool": pool_wait_monitor.stats(),
+        "invalidation": invalidation_bus.stats(),
+        "sale_response_cache": sale_response_cache.stats(),
+        "outbox": outbox_relay.stats()
+    }
\ No newline at end of file
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Script para simular cómo hubieran cambiado las ventas con otros descuentos
+
+Ejemplo:
+    python reprice_sales.py --start-date 2025-01-01 --end-date 2026-01-01 --product-type Electronics=7.5 --payment-method Cash=3
+"""
+import argparse
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.config.settings import settings
+from app.database.connection import SessionLocal
+from app.repositories.credit_terms_repository import CreditTermsRepository
+from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.services.repricing_service import RepricingScenario, repricing_service
+
+def discount(value: str):
+    """`nombre=porcentaje`"""
+    name, _, percent = value.rpartition("=")
+    if not name:
+        raise argparse.ArgumentTypeError("Se espera nombre=porcentaje")
+    return name, Decimal(percent)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recalcular ventas históricas con descuentos propuestos")
+    parser.add_argument("--start-date", type=datetime.fromisoformat, help="Fecha inicial (ISO 8601)")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, help="Fecha final, excluida (ISO 8601)")
+    parser.add_argument("--product-type", type=discount, action="append", default=[], help="Tipo=porcentaje")
+    parser.add_argument("--payment-method", type=discount, action="append", default=[], help="Método=porcentaje")
+    parser.add_argument("--credit-terms", type=discount, action="append", default=[], help="Días=porcentaje")
+    parser.add_argument("--workers", type=int, help="Procesos del pool (por defecto REPRICING_WORKERS)")
+    return parser.parse_args()
+
+def resolve(db, proposed, lookup, id_field: str, label: str):
+    resolved = {}
+    for key, percent in proposed:
+        row = lookup(db, key)
+        if row is None:
+            raise SystemExit(f"❌ {label} '{key}' no encontrado")
+        resolved[getattr(row, id_field)] = percent
+    return resolved
+
+def reprice_sales():
+    """Recalcular el período e imprimir el reporte por tipo de producto"""
+    args = parse_args()
+    end = args.end_date or datetime.now()
+    start = args.start_date or end - timedelta(days=settings.REPRICING_DEFAULT_DAYS)
+    
+    db = SessionLocal()
+    try:
+        scenario = RepricingScenario(
+            start=start,
+            end=end,
+            product_type_discounts=resolve(
+                db, args.product_type, ProductTypeRepository().get_by_name, "product_type_id", "Tipo de producto"
+            ),
+            payment_method_discounts=resolve(
+                db, args.payment_method, PaymentMethodRepository().get_by_name, "payment_method_id", "Método de pago"
+            ),
+            credit_terms_discounts=resolve(
+                db, [(int(days), percent) for days, percent in args.credit_terms],
+                CreditTermsRepository().get_by_days, "credit_terms_id", "Términos de crédito de días"
+            )
+        )
+    finally:
+        db.close()
+    
+    print(f"🔄 Recalculando ventas de {start:%Y-%m-%d} a {end:%Y-%m-%d}...")
+    report = repricing_service.run(scenario, workers=args.workers)
+    print(f"✅ {report['lines']} items en {report['partitions']} días con {report['workers']} procesos ({report['elapsed_ms'] / 1000:.1f}s)")
+    print(f"   {'tipo de producto':<20}{'items':>10}{'cobrado':>16}{'simulado':>16}{'diferencia':>14}")
+    for row in report["by_product_type"]:
+        print(f"   {row['product_type']:<20}{row['lines']:>10}{row['stored_total']:>16.2f}{row['repriced_total']:>16.2f}{row['delta']:>14.2f}")
+    print(f"   {'total':<20}{report['lines']:>10}{report['stored_total']:>16.2f}{report['repriced_total']:>16.2f}{report['delta']:>14.2f}")
+
+if __name__ == "__main__":
+    reprice_sales()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import pytest
+from app.config.settings import settings
+
+# Con DB_ENGINE=sqlite cada proceso de pytest (y cada worker de pytest-xdist)
+# usa su propio archivo, así los tests pueden correr en paralelo sin MySQL.
+# Debe fijarse antes de importar la conexión, que crea el engine al cargar.
+if settings.database.is_sqlite and not os.getenv("SQLITE_PATH"):
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    settings.database.SQLITE_PATH = os.path.join(tempfile.gettempdir(), f"sales_system_test_{worker}_{os.getpid()}.sqlite3")
+
+from app.storage import is_memory_backend
+from app.storage.memory import memory_store
+
+@pytest.fixture(scope="session", autouse=True)
+def memory_catalog():
+    """Con STORAGE_BACKEND=memory los tests corren sin MySQL sobre los catálogos básicos"""
+    if is_memory_backend():
+        from app.database.seed import init_database
+        memory_store.clear()
+        init_database()
+    yield
+
+@pytest.fixture(scope="session", autouse=True)
+def sqlite_database():
+    """Con DB_ENGINE=sqlite se crea una base nueva por proceso con los catálogos básicos"""
+    if is_memory_backend() or not settings.database.is_sqlite:
+        yield
+        return
+    
+    from app.database.connection import drop_tables, engine
+    from app.database.seed import init_database
+    drop_tables()
+    init_database()
+    yield
+    engine.dispose()
+    path = settings.database.SQLITE_PATH
+    if path != ":memory:":
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
@@ -0,0 +1,88 @@
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+from app.services.admission_control import (
+    AdmissionController, admission_controller, ROUTE_READ, ROUTE_REPORT, ROUTE_SALE_WRITE, ROUTE_WRITE, classify
+)
+
+client = TestClient(app)
+
+def _controller(pool_wait: float = 0.0) -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=4,
+        read_share=0.5,
+        report_share=0.25,
+        queue_budget=0.05,
+        sale_queue_budget=1,
+        pool_wait_budget=0.1,
+        pool_wait=lambda: pool_wait
+    )
+
+def test_classify_routes():
+    """Las ventas, los reportes, las lecturas y las demás escrituras van a clases distintas"""
+    assert classify("POST", "/sales/") == ROUTE_SALE_WRITE
+    assert classify("GET", "/sales/") == ROUTE_READ
+    assert classify("GET", "/products/top") == ROUTE_REPORT
+    assert classify("GET", "/products/1/stats") == ROUTE_REPORT
+    assert classify("GET", "/exports/sales.arrow") == ROUTE_REPORT
+    assert classify("POST", "/products/") == ROUTE_WRITE
+
+def test_reads_shed_while_sales_keep_capacity():
+    """Con las lecturas en su límite, una lectura más se rechaza y una venta entra"""
+    async def scenario():
+        controller = _controller()
+        assert await controller.acquire(ROUTE_READ)
+        assert await controller.acquire(ROUTE_READ)
+        assert not await controller.acquire(ROUTE_READ)
+        assert await controller.acquire(ROUTE_SALE_WRITE)
+        return controller.stats()["classes"]
+    
+    classes = asyncio.run(scenario())
+    assert classes[ROUTE_READ]["rejected"] == 1
+    assert classes[ROUTE_SALE_WRITE]["admitted"] == 1
+
+def test_queued_sale_admitted_before_reads():
+    """Al liberarse un lugar entra primero la venta en cola, aunque llegó después"""
+    async def scenario():
+        controller = _controller()
+        for _ in range(2):
+            await controller.acquire(ROUTE_READ)
+        await controller.acquire(ROUTE_WRITE)
+        await controller.acquire(ROUTE_SALE_WRITE)
+        order = []
+        
+        async def request(route_class):
+            if await controller.acquire(route_class):
+                order.append(route_class)
+        
+        waiting = [asyncio.create_task(request(ROUTE_WRITE)), asyncio.create_task(request(ROUTE_SALE_WRITE))]
+        await asyncio.sleep(0)
+        controller.release(ROUTE_READ)
+        await asyncio.gather(*waiting)
+        return order
+    
+    assert asyncio.run(scenario())[0] == ROUTE_SALE_WRITE
+
+def test_pool_saturation_rejects_all_but_sales():
+    """Si los checkouts del pool esperan más que el presupuesto solo se admiten ventas"""
+    async def scenario():
+        controller = _controller(pool_wait=0.5)
+        return await controller.acquire(ROUTE_READ), await controller.acquire(ROUTE_SALE_WRITE)
+    
+    assert asyncio.run(scenario()) == (False, True)
+
+def test_rejected_request_gets_retry_after():
+    """El middleware responde 503 con Retry-After; las sondas y métricas no pasan por él"""
+    pool_wait = admission_controller.pool_wait
+    admission_controller.pool_wait = lambda: 0.5
+    try:
+        response = client.get("/customers/")
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert client.get("/health").status_code == 200
+        metrics = client.get("/metrics").json()
+    finally:
+        admission_controller.pool_wait = pool_wait
+    
+    assert {"admission", "pool", "invalidation"} <= set(metrics)
+    assert metrics["admission"]["classes"][ROUTE_READ]["rejected"] >= 1
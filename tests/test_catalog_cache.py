@@ -0,0 +1,98 @@
+from datetime import datetime
+from decimal import Decimal
+from app.services.discount_schedule import DiscountSchedule
+from app.services.shared_catalog import CatalogPayload, DiscountRule, SharedCatalogSegment
+
+def _payload(electronics_discount: str) -> CatalogPayload:
+    return CatalogPayload(
+        products=[(1, 1, Decimal("15000.00")), (7, 2, Decimal("99.99"))],
+        product_type_discounts=[
+            DiscountRule(1, Decimal(electronics_discount)),
+            DiscountRule(1, Decimal("30.00"), datetime(2024, 11, 29), datetime(2024, 12, 2))
+        ],
+        payment_method_discounts=[DiscountRule(2, Decimal("5.00"))],
+        credit_terms_discounts=[DiscountRule(2, Decimal("2.00")), DiscountRule(3, Decimal("4.00"))],
+        payment_methods=[(1, "Cash"), (2, "Credit Card"), (3, "Store Credit")]
+    )
+
+def test_shared_catalog_publish_and_read_across_segments(tmp_path):
+    """Un worker publica y otro lee la misma generación sin copiar; invalidar afecta a ambos"""
+    path = str(tmp_path / "catalog.bin")
+    writer = SharedCatalogSegment(path, 1024 * 1024)
+    reader = SharedCatalogSegment(path, 1024 * 1024)
+    assert reader.view() is None
+    
+    assert writer.publish(lambda: _payload("10.00")) == 1
+    view = reader.view()
+    assert view.generation == 1
+    assert view.products.get(7).list_price == Decimal("99.99")
+    assert view.products.get(2) is None
+    assert view.product_type_discounts[0] == DiscountRule(1, Decimal("10.00"), None, None)
+    assert view.product_type_discounts[1].valid_to == datetime(2024, 12, 2)
+    assert view.credit_terms_discounts[1] == DiscountRule(3, Decimal("4.00"), None, None)
+    assert view.payment_methods.get(3).name == "Store Credit"
+    
+    # La generación 2 va al otro slot: la vista anterior sigue siendo legible
+    writer.publish(lambda: _payload("15.00"))
+    assert view.product_type_discounts[0].discount_percent == Decimal("10.00")
+    assert reader.view().product_type_discounts[0].discount_percent == Decimal("15.00")
+    
+    # La generación 3 reutiliza el slot de la 1
+    writer.publish(lambda: _payload("20.00"))
+    assert not view.is_current()
+    
+    reader.invalidate()
+    assert writer.view() is None
+    assert writer.publish(lambda: _payload("20.00")) == 4
+    assert reader.view().generation == 4
+
+def test_discount_matrix_compiles_every_combination(tmp_path):
+    """La matriz resuelve tipo × método × términos en un acceso, con la regla de Store Credit aplicada"""
+    from app.services.pricing import price_line, price_line_rates
+    
+    segment = SharedCatalogSegment(str(tmp_path / "catalog.bin"), 1024 * 1024)
+    segment.publish(lambda: _payload("10.00"))
+    matrix = DiscountSchedule(segment.view()).matrix_at(datetime(2025, 1, 1))
+    
+    # Credit Card: tipo + método, sin descuento por términos
+    rates = matrix.rates(1, 2, 3)
+    assert (rates.product_type, rates.payment_method, rates.credit_terms) == (Decimal("10.00"), Decimal("5.00"), Decimal("0"))
+    assert not rates.applies_credit_terms
+    
+    # Store Credit: aplica términos de crédito
+    rates = matrix.rates(1, 3, 3)
+    assert (rates.product_type, rates.payment_method, rates.credit_terms) == (Decimal("10.00"), Decimal("0"), Decimal("4.00"))
+    assert rates.applies_credit_terms and rates.has_discount
+    
+    # IDs sin descuento configurado (o fuera de la tabla) no descuentan
+    assert not matrix.rates(2, 1, 1).has_discount
+    assert not matrix.rates(99, 1, 99).has_discount
+    
+    # Mismo resultado que el cálculo paso a paso
+    assert price_line_rates(Decimal("15000.00"), 3, matrix.rates(1, 3, 3)) == price_line(
+        Decimal("15000.00"), 3, Decimal("10.00"), Decimal("0"), Decimal("4.00")
+    )
+
+def test_discount_schedule_resolves_rates_at_any_time():
+    """Cada llave resuelve su porcentaje en T; la regla que empezó más tarde gana mientras está vigente"""
+    from app.services.catalog_cache import CatalogSnapshot
+    from app.services.shared_catalog import PaymentMethodRef
+    
+    payload = _payload("10.00")
+    schedule = DiscountSchedule(CatalogSnapshot(
+        payment_methods={id: PaymentMethodRef(id, name) for id, name in payload.payment_methods},
+        product_type_discounts=payload.product_type_discounts,
+        payment_method_discounts=payload.payment_method_discounts,
+        credit_terms_discounts=payload.credit_terms_discounts,
+        loaded_at=0.0
+    ))
+    timeline = schedule.product_types[1]
+    assert timeline.at(datetime(2024, 11, 28, 23, 59)) == Decimal("10.00")
+    assert timeline.at(datetime(2024, 11, 29)) == Decimal("30.00")
+    assert timeline.at(datetime(2024, 12, 1, 23, 59)) == Decimal("30.00")
+    assert timeline.at(datetime(2024, 12, 2)) == Decimal("10.00")
+    
+    # Una matriz por tramo: las ventas del mismo tramo comparten la compilada
+    assert schedule.matrix_at(datetime(2024, 11, 30)) is schedule.matrix_at(datetime(2024, 12, 1))
+    assert schedule.matrix_at(datetime(2024, 11, 30)).rates(1, 1, 1).product_type == Decimal("30.00")
+    assert schedule.matrix_at(datetime(2024, 12, 5)).rates(1, 1, 1).product_type == Decimal("10.00")
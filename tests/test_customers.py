@@ -65,3 +65,82 @@ def test_create_customer_invalid_credit_terms():
     
     response = client.post("/customers/", json=customer_data)
     assert response.status_code == 422  # Validation error
+
+def test_get_customer_sales_history():
+    """Test para obtener el historial de ventas paginado de un cliente"""
+    customer_data = {
+        "name": "Cliente Historial",
+        "customer_type": "Regular",
+        "credit_terms_days": 30
+    }
+    customer_id = client.post("/customers/", json=customer_data).json()["customer_id"]
+
+    product_data = {
+        "name": "Producto Historial",
+        "product_type": "Books",
+        "list_price": 100.00
+    }
+    product_id = client.post("/products/", json=product_data).json()["product_id"]
+
+    for quantity in (1, 2, 3):
+        sale_data = {
+            "customer_id": customer_id,
+            "payment_method": "Cash",
+            "items": [{"product_id": product_id, "quantity": quantity}]
+        }
+        assert client.post("/sales/", json=sale_data).status_code == 201
+
+    response = client.get(f"/customers/{customer_id}/sales", params={"limit": 2})
+    assert response.status_code == 200
+
+    first_page = response.json()
+    assert first_page["summary"]["sales_count"] == 3
+    assert len(first_page["sales"]) == 2
+    assert first_page["next_cursor"] is not None
+
+    response = client.get(
+        f"/customers/{customer_id}/sales",
+        params={"limit": 2, "cursor": first_page["next_cursor"]}
+    )
+    second_page = response.json()
+    assert len(second_page["sales"]) == 1
+    assert second_page["next_cursor"] is None
+
+    sale_ids = [sale["sale_id"] for sale in first_page["sales"] + second_page["sales"]]
+    assert len(set(sale_ids)) == 3
+
+def test_get_customer_sales_not_found():
+    """Test para validar historial de un cliente inexistente"""
+    response = client.get("/customers/99999/sales")
+    assert response.status_code == 404
+
+def test_bulk_import_customers_ndjson_upsert():
+    """Test para la carga masiva de clientes en NDJSON con upsert por nombre"""
+    ndjson_data = '{"name": "Cliente Masivo Upsert", "customer_type": "Regular", "credit_terms_days": 30}\n'
+    first = client.post("/customers/bulk?upsert=true", content=ndjson_data, headers={"Content-Type": "application/x-ndjson"})
+    assert first.status_code == 200
+
+    ndjson_data = '{"name": "Cliente Masivo Upsert", "customer_type": "VIP", "credit_terms_days": 90}\n'
+    second = client.post("/customers/bulk?upsert=true", content=ndjson_data, headers={"Content-Type": "application/x-ndjson"})
+    assert second.status_code == 200
+    assert second.json()["updated"] == 1
+    assert second.json()["created"] == 0
+
+def test_bulk_import_customers_unsupported_format():
+    """Test para rechazar cargas masivas que no son CSV ni NDJSON"""
+    response = client.post("/customers/bulk", content="<customers/>", headers={"Content-Type": "application/xml"})
+    assert response.status_code == 415
+
+def test_get_customers_batch_post():
+    """Test para consultar clientes por lote con la variante POST"""
+    customer_id = client.post(
+        "/customers/", json={"name": "Cliente Lote", "customer_type": "VIP", "credit_terms_days": 90}
+    ).json()["customer_id"]
+
+    response = client.post("/customers/batch", json={"ids": [customer_id, 99999]})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["items"][0]["customer_id"] == customer_id
+    assert data["items"][0]["customer_type"] == "VIP"
+    assert data["missing"] == [99999]
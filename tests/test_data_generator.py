@@ -0,0 +1,97 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, select
+from app.database.connection import Base
+from app.database.models import (
+    CreditTerms, CreditTermsDiscount, Customer, CustomerType, PaymentMethod, PaymentMethodDiscount,
+    Product, ProductType, ProductTypeDiscount, Sale, SaleItem
+)
+from app.services.data_generator import SyntheticDataGenerator
+from app.services.pricing import calculate_tax, price_line
+
+# Promoción de Electronics (ID 1) a mitad del año generado: mientras está vigente reemplaza al 7.5%
+PROMOTION_START = datetime.now().replace(microsecond=0) - timedelta(days=200)
+PROMOTION_END = PROMOTION_START + timedelta(days=100)
+
+# Catálogos de la base de prueba: (tabla, filas)
+CATALOGS = [
+    (CustomerType, [{"customer_type_id": 1, "name": "VIP"}, {"customer_type_id": 2, "name": "Regular"}]),
+    (CreditTerms, [{"credit_terms_id": 1, "days": 30}, {"credit_terms_id": 2, "days": 90}, {"credit_terms_id": 3, "days": 120}]),
+    (ProductType, [{"product_type_id": 1, "name": "Electronics"}, {"product_type_id": 2, "name": "Clothing"}]),
+    (PaymentMethod, [{"payment_method_id": 1, "name": "Cash"}, {"payment_method_id": 2, "name": "Credit Card"}, {"payment_method_id": 3, "name": "Store Credit"}]),
+    (ProductTypeDiscount, [
+        {"product_type_id": 1, "discount_percent": Decimal('7.5'), "valid_from": None, "valid_to": None},
+        {"product_type_id": 1, "discount_percent": Decimal('20'), "valid_from": PROMOTION_START, "valid_to": PROMOTION_END}
+    ]),
+    (PaymentMethodDiscount, [{"payment_method_id": 1, "discount_percent": Decimal('3')}, {"payment_method_id": 3, "discount_percent": Decimal('1.25')}]),
+    (CreditTermsDiscount, [{"credit_terms_id": 2, "discount_percent": Decimal('2')}, {"credit_terms_id": 3, "discount_percent": Decimal('4')}])
+]
+
+def _engine(tmp_path):
+    """Base SQLite propia con los catálogos y descuentos, para no mezclar ventas con las de los demás tests"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'generated.sqlite3'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for model, rows in CATALOGS:
+            connection.execute(model.__table__.insert(), rows)
+    return engine
+
+def test_generated_sales_match_pricing_rules(tmp_path):
+    """Las ventas generadas (vía INSERT por lotes) cuadran al centavo con price_line y calculate_tax, con los descuentos de su fecha"""
+    engine = _engine(tmp_path)
+    generator = SyntheticDataGenerator(engine, seed=42, chunk_size=40)
+    assert generator.method == "insert"
+    
+    counts = generator.generate(customers=30, products=20, sales=100)
+    assert counts["customer"] == 30
+    assert counts["product"] == 20
+    assert counts["sale"] == 100
+    
+    payment_method_discounts = {row["payment_method_id"]: row["discount_percent"] for row in CATALOGS[5][1]}
+    credit_terms_discounts = {row["credit_terms_id"]: row["discount_percent"] for row in CATALOGS[6][1]}
+    with engine.connect() as connection:
+        product_types = dict(connection.execute(select(Product.product_id, Product.product_type_id)).all())
+        credit_terms = dict(connection.execute(select(Customer.customer_id, Customer.credit_terms_id)).all())
+        sales = connection.execute(select(Sale.__table__)).all()
+        items = defaultdict(list)
+        for item in connection.execute(select(SaleItem.__table__)):
+            items[item.sale_id].append(item)
+    
+    assert len(sales) == 100
+    assert any(sale.payment_method_id == 3 for sale in sales)
+    assert any(sale.total_discounts_amount for sale in sales)
+    assert any(PROMOTION_START <= sale.sale_datetime < PROMOTION_END for sale in sales)
+    assert sum(len(sale_items) for sale_items in items.values()) == counts["sale_item"]
+    for sale in sales:
+        assert items[sale.sale_id]
+        subtotal = Decimal('0')
+        total_discounts = Decimal('0')
+        in_promotion = PROMOTION_START <= sale.sale_datetime < PROMOTION_END
+        for item in items[sale.sale_id]:
+            product_type_discount = Decimal('0')
+            if product_types[item.product_id] == 1:
+                product_type_discount = Decimal('20') if in_promotion else Decimal('7.5')
+            # El descuento por crédito solo aplica con Store Credit (ID 3)
+            credit_terms_discount = Decimal('0')
+            if sale.payment_method_id == 3:
+                credit_terms_discount = credit_terms_discounts.get(credit_terms[sale.customer_id], Decimal('0'))
+            line = price_line(
+                item.list_price,
+                item.quantity,
+                product_type_discount,
+                payment_method_discounts.get(sale.payment_method_id, Decimal('0')),
+                credit_terms_discount
+            )
+            assert item.line_subtotal_after_discounts == line["line_total"]
+            assert item.product_type_discount == line["discounts"]["product_type_discount"]
+            assert item.payment_method_discount == line["discounts"]["payment_method_discount"]
+            assert item.credit_terms_discount == line["discounts"]["credit_terms_discount"]
+            subtotal += line["line_total"]
+            total_discounts += line["discounts"]["total_discount"]
+        
+        assert sale.subtotal == subtotal
+        assert sale.tax == calculate_tax(subtotal)
+        assert sale.total == subtotal + calculate_tax(subtotal)
+        assert sale.total_discounts_amount == total_discounts
+    engine.dispose()
@@ -44,3 +44,45 @@ def test_create_discount_invalid_percent():
     response = client.post("/discounts/product", json=discount_data)
     # La API devuelve 422 Unprocessable Entity para validación de datos
     assert response.status_code == 422
+
+def test_scheduled_discount_applies_only_within_its_window():
+    """Un descuento con vigencia solo aplica a las ventas (o recálculos) dentro de ella"""
+    response = client.post("/discounts/product", json={
+        "product_type": "Clothing",
+        "discount_percent": 40.0,
+        "valid_from": "2020-11-27T00:00:00",
+        "valid_to": "2020-11-30T00:00:00"
+    })
+    assert response.status_code == 201
+    assert response.json()["valid_to"] == "2020-11-30T00:00:00"
+
+    customer_id = client.post(
+        "/customers/", json={"name": "Scheduled Discount Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    product_id = client.post(
+        "/products/", json={"name": "Scheduled Discount Shirt", "product_type": "Clothing", "list_price": 100}
+    ).json()["product_id"]
+    sale = client.post(
+        "/sales/", json={"customer_id": customer_id, "payment_method": "Credit Card", "items": [{"product_id": product_id, "quantity": 1}]}
+    ).json()
+    assert sale["breakdown"]["lines"][0]["discounts"]["product_type"] == "0.00"
+
+    # Recalculada a su propia fecha queda igual; dentro de la vigencia aplica el 40%
+    response = client.get(f"/sales/{sale['sale_id']}/repricing")
+    assert response.status_code == 200
+    assert response.json()["breakdown"] == sale["breakdown"]
+
+    repriced = client.get(f"/sales/{sale['sale_id']}/repricing", params={"at": "2020-11-28T12:00:00"}).json()
+    assert repriced["breakdown"]["lines"][0]["discounts"]["product_type"] == "40.00"
+    assert repriced["breakdown"]["lines"][0]["list_price"] == "100.00"
+
+def test_create_discount_invalid_window():
+    """valid_to debe ser posterior a valid_from"""
+    response = client.post("/discounts/payment", json={
+        "payment_method": "Cash",
+        "discount_percent": 5.0,
+        "valid_from": "2025-01-02T00:00:00",
+        "valid_to": "2025-01-01T00:00:00"
+    })
+    assert response.status_code == 422
+    assert "valid_to debe ser posterior a valid_from" in response.text
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from fastapi.testclient import TestClient
+from main import app
+from app.database.models import OutboxEvent
+from app.repositories.outbox_repository import EVENT_SALE_CREATED, OutboxRepository, event_row
+from app.routers.events import sse_events
+from app.services.outbox_relay import OutboxRelay
+from app.storage import get_repository, is_memory_backend
+from app.storage.memory import MemoryStore
+
+client = TestClient(app)
+
+def _tail() -> int:
+    """Cursor después del último evento existente"""
+    cursor = 0
+    while True:
+        page = client.get("/events/", params={"after": cursor, "limit": 1000, "wait": 0}).json()
+        cursor = page["next_cursor"]
+        if not page["events"]:
+            return cursor
+
+def _create_sale() -> dict:
+    customer_id = client.post(
+        "/customers/", json={"name": "Events Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    product_id = client.post(
+        "/products/", json={"name": "Events Product", "product_type": "Electronics", "list_price": 80}
+    ).json()["product_id"]
+    response = client.post(
+        "/sales/", json={"customer_id": customer_id, "payment_method": "Cash", "items": [{"product_id": product_id, "quantity": 3}]}
+    )
+    assert response.status_code == 201
+    return response.json()
+
+def test_sale_events_in_cursor_order():
+    """Crear y eliminar una venta deja sus eventos en el feed, en orden y sin repetirse"""
+    cursor = _tail()
+    sale = _create_sale()
+    assert client.delete(f"/sales/{sale['sale_id']}").status_code == 204
+    
+    page = client.get("/events/", params={"after": cursor, "wait": 0}).json()
+    events = [event for event in page["events"] if event["aggregate_id"] == sale["sale_id"]]
+    assert [event["event_type"] for event in events] == ["sale.created", "sale.deleted"]
+    created = events[0]["payload"]
+    assert Decimal(created["total"]) == Decimal(sale["breakdown"]["total"])
+    assert created["items"][0]["quantity"] == 3
+    assert [event["event_id"] for event in page["events"]] == sorted(event["event_id"] for event in page["events"])
+    
+    # Con el cursor devuelto no se vuelve a recibir nada
+    again = client.get("/events/", params={"after": page["next_cursor"], "wait": 0}).json()
+    assert again["events"] == []
+    assert again["next_cursor"] == page["next_cursor"]
+
+def test_long_poll_returns_when_a_sale_is_created():
+    """El long-poll espera y responde en cuanto aparece un evento nuevo"""
+    cursor = _tail()
+    timer = threading.Timer(0.3, _create_sale)
+    timer.start()
+    try:
+        page = client.get("/events/", params={"after": cursor, "wait": 10}).json()
+    finally:
+        timer.join()
+    assert page["events"]
+    assert page["events"][0]["event_type"] == "sale.created"
+    assert page["next_cursor"] > cursor
+
+def test_sse_stream_formats_events():
+    """El stream SSE envía cada evento con su ID (para Last-Event-ID), tipo y JSON"""
+    cursor = _tail()
+    sale = _create_sale()
+    
+    async def connected() -> bool:
+        return False
+    
+    async def first_event() -> str:
+        stream = sse_events(cursor, connected)
+        async for chunk in stream:
+            if chunk.startswith("id: "):
+                await stream.aclose()
+                return chunk
+    
+    chunk = asyncio.run(first_event())
+    lines = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+    assert lines["event"] == "sale.created"
+    data = json.loads(lines["data"])
+    assert data["event_id"] == int(lines["id"])
+    assert data["aggregate_id"] == sale["sale_id"]
+
+@pytest.fixture
+def isolated_outbox(tmp_path, monkeypatch):
+    """Outbox propio (sin los eventos de los demás tests) para abrir huecos de IDs a mano"""
+    if is_memory_backend():
+        store = MemoryStore()
+        open_outbox = lambda: store
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path / 'outbox.sqlite3'}")
+        OutboxEvent.__table__.create(engine)
+        open_outbox = lambda: Session(bind=engine)
+    monkeypatch.setattr("app.services.outbox_relay.open_session", open_outbox)
+    yield open_outbox
+    if not is_memory_backend():
+        engine.dispose()
+
+def _append_event(open_outbox, event_id: int, aggregate_id: int) -> None:
+    db = open_outbox()
+    try:
+        row = event_row(EVENT_SALE_CREATED, aggregate_id, {"sale_id": aggregate_id})
+        get_repository(OutboxRepository).append(db, [dict(row, event_id=event_id)])
+        db.commit()
+    finally:
+        db.close()
+
+def _relay(late_window: float) -> OutboxRelay:
+    return OutboxRelay(batch_size=100, poll_interval=0.01, buffer_size=100, gap_timeout=0, retention_days=0, late_window=late_window)
+
+def test_late_event_delivered_after_its_gap_was_skipped(isolated_outbox):
+    """Un evento que hace commit después de saltarse su ID se entrega al final, también a los cursores que ya pasaron"""
+    _append_event(isolated_outbox, 1, 100)
+    relay = _relay(late_window=60)
+    relay.poll()
+    assert relay.position == 1
+    
+    # El ID 2 es una transacción que todavía no hizo commit: se salta y queda en revisión
+    _append_event(isolated_outbox, 3, 300)
+    assert relay.poll() == 1
+    events, cursor = relay.read(1, 10)
+    assert [event.event_id for event in events] == [3]
+    assert relay.stats()["watched_gaps"] == 1
+    
+    # Hace commit tarde: se mueve al final con un ID nuevo
+    _append_event(isolated_outbox, 2, 200)
+    assert relay.poll() == 1
+    events, next_cursor = relay.read(cursor, 10)
+    assert len(events) == 1
+    assert events[0].event_id > 3
+    assert json.loads(events[0].data)["aggregate_id"] == 200
+    assert [event.event_id for event in relay.read(0, 10)[0]] == [1, 3, events[0].event_id]
+    
+    stats = relay.stats()
+    assert (stats["watched_gaps"], stats["late_events"], stats["lost_ids"]) == (0, 1, 0)
+    assert relay.read(next_cursor, 10) == ([], next_cursor)
+
+def test_skipped_ids_lost_after_late_window(isolated_outbox):
+    """Pasada la ventana de revisión los IDs saltados se dan por perdidos y se informan"""
+    _append_event(isolated_outbox, 1, 100)
+    relay = _relay(late_window=0)
+    relay.poll()
+    _append_event(isolated_outbox, 4, 400)
+    relay.poll()
+    relay.poll()
+    
+    stats = relay.stats()
+    assert (stats["skipped_ids"], stats["watched_gaps"], stats["lost_ids"]) == (2, 0, 2)
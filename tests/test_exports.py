@@ -0,0 +1,68 @@
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+def test_export_sales_parquet():
+    """Test para exportar ventas en formato Parquet"""
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    response = client.get("/exports/sales.parquet")
+    assert response.status_code == 200
+
+    table = pq.read_table(io.BytesIO(response.content))
+    assert "sale_id" in table.schema.names
+    assert "line_subtotal_after_discounts" in table.schema.names
+
+def test_export_sales_arrow_date_range():
+    """Test para exportar ventas como Arrow IPC filtrando por fechas"""
+    pa = pytest.importorskip("pyarrow")
+
+    response = client.get("/exports/sales.arrow", params={"start_date": "2100-01-01T00:00:00"})
+    assert response.status_code == 200
+
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 0
+
+def test_export_sales_parquet_round_trip():
+    """Las filas exportadas en Parquet conservan los valores de la venta y de cada item"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    started = (datetime.now() - timedelta(seconds=1)).replace(microsecond=0)
+    customer_id = client.post(
+        "/customers/", json={"name": "Export Customer", "customer_type": "VIP", "credit_terms_days": 120}
+    ).json()["customer_id"]
+    product_ids = [
+        client.post("/products/", json={"name": name, "product_type": product_type, "list_price": price}).json()["product_id"]
+        for name, product_type, price in [("Export Lamp", "Electronics", 249.99), ("Export Novel", "Books", 18.35)]
+    ]
+    sale = client.post("/sales/", json={
+        "customer_id": customer_id,
+        "payment_method": "Store Credit",
+        "items": [{"product_id": product_ids[0], "quantity": 3}, {"product_id": product_ids[1], "quantity": 7}]
+    }).json()
+
+    response = client.get("/exports/sales.parquet", params={"start_date": started.isoformat()})
+    assert response.status_code == 200
+    rows = [row for row in pq.read_table(io.BytesIO(response.content)).to_pylist() if row["sale_id"] == sale["sale_id"]]
+    assert len(rows) == 2
+    assert len({row["sale_item_id"] for row in rows}) == 2
+
+    breakdown = sale["breakdown"]
+    lines = {line["product_id"]: line for line in breakdown["lines"]}
+    for row in sorted(rows, key=lambda row: row["product_id"]):
+        assert row["customer_id"] == customer_id
+        assert row["sale_datetime"] >= started
+        assert row["tax_rate_percent"] == Decimal(sale["tax_rate_percent"])
+        for field in ("subtotal", "tax", "total", "total_discounts_amount"):
+            assert row[field] == Decimal(breakdown[field])
+
+        line = lines[row["product_id"]]
+        assert row["quantity"] == line["quantity"]
+        assert row["list_price"] == Decimal(line["list_price"])
+        assert row["line_subtotal_after_discounts"] == Decimal(line["line_subtotal_after_discounts"])
+        for discount in ("product_type", "payment_method", "credit_terms"):
+            assert row[f"{discount}_discount"] == Decimal(line["discounts"][discount])
@@ -0,0 +1,66 @@
+import threading
+import time
+from fastapi.testclient import TestClient
+from main import app
+from app.services.warmup import WarmupService
+
+def test_ready_after_warmup():
+    """/health responde desde el inicio y /ready solo cuando terminó el calentamiento"""
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+        
+        deadline = time.monotonic() + 10
+        response = client.get("/ready")
+        while response.status_code == 503 and time.monotonic() < deadline:
+            assert response.json()["status"] == "warming_up"
+            time.sleep(0.05)
+            response = client.get("/ready")
+        
+        assert response.status_code == 200
+        warmup = response.json()["warmup"]
+        assert warmup["status"] == "ready"
+        assert {"pool", "mappers", "statements", "catalog"} <= set(warmup["steps_ms"])
+
+def test_warmup_retries_failed_step(monkeypatch):
+    """Un paso que falla se reintenta con espera hasta que el proceso queda listo"""
+    service = WarmupService(pool_connections=1, retry_delay=0.01, retry_max_delay=0.02)
+    calls = []
+    
+    def flaky_pool():
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise ConnectionError("base de datos no disponible")
+    
+    monkeypatch.setattr(service, "_open_pool_connections", flaky_pool)
+    service.run()
+    
+    status = service.status()
+    assert service.ready
+    assert status["status"] == "ready"
+    assert status["attempts"] == 3
+    assert status["error"] is None
+    assert len(calls) == 3
+    assert {"schema", "pool", "mappers", "statements", "catalog"} <= set(status["steps_ms"])
+
+def test_warmup_stops_retrying_on_shutdown(monkeypatch):
+    """Al apagar se dejan los reintentos y /ready sigue informando el error"""
+    service = WarmupService(pool_connections=1, retry_delay=60, retry_max_delay=60)
+    
+    def unreachable():
+        raise ConnectionError("sin conexión")
+    
+    monkeypatch.setattr(service, "_check_schema", unreachable)
+    stop = threading.Event()
+    thread = threading.Thread(target=service.run, args=(stop,))
+    thread.start()
+    
+    deadline = time.monotonic() + 5
+    while service.status()["status"] != "retrying" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.status()["error"] == "sin conexión"
+    stop.set()
+    thread.join(timeout=5)
+    
+    assert not thread.is_alive()
+    assert not service.ready
+    assert service.status()["status"] == "failed"
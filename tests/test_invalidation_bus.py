@@ -0,0 +1,61 @@
+import time
+import pytest
+from app.services.invalidation_bus import (
+    ACTION_CREATED, TOPIC_DISCOUNTS, InvalidationBus, UnixSocketTransport, VersionTableTransport
+)
+from app.storage import is_memory_backend
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def _wait_for(events, count):
+    _wait_until(lambda: len(events) >= count)
+    return events
+
+def _buses(transport_a, transport_b):
+    bus_a = InvalidationBus(transport_a, origin="worker-a")
+    bus_b = InvalidationBus(transport_b, origin="worker-b")
+    received_a, received_b = [], []
+    bus_a.subscribe(TOPIC_DISCOUNTS, received_a.append)
+    bus_b.subscribe(TOPIC_DISCOUNTS, received_b.append)
+    bus_a.start()
+    bus_b.start()
+    return bus_a, bus_b, received_a, received_b
+
+def test_unix_socket_broadcast(tmp_path):
+    """Un evento publicado en un worker llega al otro con su tipo y llave"""
+    bus_a, bus_b, received_a, received_b = _buses(
+        UnixSocketTransport(str(tmp_path), "a"),
+        UnixSocketTransport(str(tmp_path), "b")
+    )
+    try:
+        _wait_until(lambda: (tmp_path / "b.sock").exists())
+        bus_a.publish(TOPIC_DISCOUNTS, ACTION_CREATED, 42)
+        
+        event = _wait_for(received_b, 1)[0]
+        assert (event.topic, event.action, event.key, event.origin) == (TOPIC_DISCOUNTS, ACTION_CREATED, 42, "worker-a")
+        # El publicador lo recibe una sola vez (entrega local)
+        assert len(received_a) == 1
+        assert bus_b.stats()["received"] == 1
+    finally:
+        bus_a.stop()
+        bus_b.stop()
+
+@pytest.mark.skipif(is_memory_backend(), reason="la tabla de versiones requiere backend SQL")
+def test_version_table_poller():
+    """El cambio de versión de un tema se detecta en el siguiente sondeo del otro worker"""
+    bus_a, bus_b, received_a, received_b = _buses(VersionTableTransport(0.05), VersionTableTransport(0.05))
+    try:
+        time.sleep(0.2)
+        bus_a.publish(TOPIC_DISCOUNTS, ACTION_CREATED, 7)
+        
+        assert _wait_for(received_b, 1)[0].topic == TOPIC_DISCOUNTS
+        time.sleep(0.2)
+        # El poller del publicador no reenvía su propio incremento
+        assert len(received_a) == 1
+        assert bus_b.stats()["max_staleness_seconds"] == 0.05
+    finally:
+        bus_a.stop()
+        bus_b.stop()
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from app.database.migrations import check_schema, missing_columns, upgrade_schema
+
+def _old_database(tmp_path):
+    """Base creada antes de las vigencias de descuentos"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite3'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE product_type_discount ("
+            "discount_id INTEGER PRIMARY KEY, product_type_id INTEGER NOT NULL, discount_percent DECIMAL(5, 2) NOT NULL, "
+            "created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME, deleted_at DATETIME)"
+        )
+        connection.exec_driver_sql("INSERT INTO product_type_discount (product_type_id, discount_percent) VALUES (1, 7.5)")
+    return engine
+
+def test_upgrade_adds_discount_validity_columns(tmp_path):
+    """Una base anterior falla la verificación hasta que upgrade_schema agrega las columnas"""
+    engine = _old_database(tmp_path)
+    assert missing_columns(engine) == {"product_type_discount": ["valid_from", "valid_to"]}
+    with pytest.raises(RuntimeError, match="product_type_discount.valid_from"):
+        check_schema(engine)
+    
+    statements = upgrade_schema(engine)
+    assert len(statements) == 2
+    check_schema(engine)
+    assert upgrade_schema(engine) == []
+    
+    columns = {column["name"] for column in inspect(engine).get_columns("product_type_discount")}
+    assert {"valid_from", "valid_to"} <= columns
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT discount_percent, valid_from, valid_to FROM product_type_discount").all()
+    assert [(float(row[0]), row[1], row[2]) for row in rows] == [(7.5, None, None)]
+    engine.dispose()
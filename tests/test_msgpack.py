@@ -0,0 +1,79 @@
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+msgpack = pytest.importorskip("msgpack")
+from app.services.msgpack_codec import accepts_msgpack, accepts_zstd, packb, unpackb
+
+client = TestClient(app)
+
+MSGPACK = "application/msgpack"
+
+def test_products_as_msgpack_keep_decimals():
+    """Con Accept: application/msgpack los precios llegan como Decimal, no como texto"""
+    client.post("/products/", json={"name": "Msgpack Product", "product_type": "Electronics", "list_price": 1234.5})
+    
+    response = client.get("/products/", headers={"Accept": MSGPACK})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+    
+    products = unpackb(response.content)
+    product = next(p for p in products if p["name"] == "Msgpack Product")
+    assert product["list_price"] == Decimal("1234.50")
+    assert isinstance(product["list_price"], Decimal)
+
+def test_create_sale_with_msgpack_body():
+    """POST /sales/ acepta el cuerpo en MessagePack y responde en el formato pedido"""
+    customer_id = client.post(
+        "/customers/", json={"name": "Msgpack Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    product_id = client.post(
+        "/products/", json={"name": "Msgpack Sale Product", "product_type": "Electronics", "list_price": 100}
+    ).json()["product_id"]
+    
+    response = client.post(
+        "/sales/",
+        content=packb({"customer_id": customer_id, "payment_method": "Cash", "items": [{"product_id": product_id, "quantity": 3}]}),
+        headers={"Content-Type": MSGPACK, "Accept": MSGPACK}
+    )
+    assert response.status_code == 201
+    
+    sale = unpackb(response.content)
+    assert sale["customer_id"] == customer_id
+    assert isinstance(sale["breakdown"]["total"], Decimal)
+
+def test_large_msgpack_response_compressed_with_zstd():
+    """Las respuestas grandes se comprimen con zstd si el cliente lo admite"""
+    zstandard = pytest.importorskip("zstandard")
+    for i in range(20):
+        client.post("/products/", json={"name": f"Zstd Product {i}", "product_type": "Electronics", "list_price": 10 + i})
+    
+    response = client.get("/products/", headers={"Accept": MSGPACK, "Accept-Encoding": "zstd"})
+    assert response.headers["content-encoding"] == "zstd"
+    # httpx no descomprime zstd sin dependencias extra: se descomprime aquí si aún viene comprimido
+    body = response.content
+    if body[:4] == b"\x28\xb5\x2f\xfd":
+        body = zstandard.ZstdDecompressor().decompress(body)
+    assert any(p["name"] == "Zstd Product 19" for p in unpackb(body))
+
+def test_zstd_refused_with_q_zero():
+    """Accept-Encoding con zstd;q=0 rechaza zstd: la respuesta va sin comprimir"""
+    pytest.importorskip("zstandard")
+    for i in range(20):
+        client.post("/products/", json={"name": f"Zstd Refused Product {i}", "product_type": "Electronics", "list_price": 10 + i})
+    
+    response = client.get("/products/", headers={"Accept": MSGPACK, "Accept-Encoding": "gzip, zstd;q=0"})
+    assert response.headers.get("content-encoding") != "zstd"
+    assert any(p["name"] == "Zstd Refused Product 19" for p in unpackb(response.content))
+
+def test_accept_headers_honor_q_values():
+    """q=0 (en cualquier formato) rechaza el tipo o la codificación; otro q la acepta"""
+    assert accepts_zstd("zstd")
+    assert accepts_zstd("gzip;q=1.0, zstd;q=0.5")
+    assert not accepts_zstd("zstd;q=0")
+    assert not accepts_zstd("zstd; q=0.000")
+    assert not accepts_zstd("gzip, br")
+    assert accepts_msgpack("application/msgpack;q=0.9")
+    assert not accepts_msgpack("application/msgpack; q=0.00")
+    assert not accepts_msgpack("application/json")
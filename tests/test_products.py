@@ -1,6 +1,9 @@
 import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
 from fastapi.testclient import TestClient
 from main import app
+from app.config.settings import settings
 
 client = TestClient(app)
 
@@ -42,3 +45,191 @@ def test_create_product_invalid_price():
     response = client.post("/products/", json=product_data)
     # La API devuelve 422 Unprocessable Entity para validación de datos
     assert response.status_code == 422
+
+def test_get_product_stats():
+    """Test para obtener las estadísticas de ventas de un producto"""
+    product_data = {
+        "name": "Producto Estadísticas",
+        "product_type": "Clothing",
+        "list_price": 200.00
+    }
+    product_id = client.post("/products/", json=product_data).json()["product_id"]
+
+    customer_data = {
+        "name": "Cliente Estadísticas",
+        "customer_type": "Regular",
+        "credit_terms_days": 30
+    }
+    customer_id = client.post("/customers/", json=customer_data).json()["customer_id"]
+
+    sale_data = {
+        "customer_id": customer_id,
+        "payment_method": "Cash",
+        "items": [{"product_id": product_id, "quantity": 3}]
+    }
+    client.post("/sales/", json=sale_data)
+    client.post("/sales/", json=sale_data)
+
+    response = client.get(f"/products/{product_id}/stats")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["product_id"] == product_id
+    assert data["units_sold"] == 6
+    assert data["sales_count"] == 2
+    assert float(data["revenue"]) > 0
+
+def test_get_top_products():
+    """Test para obtener los productos más vendidos por unidades y por ingresos"""
+    start_date = (datetime.now() - timedelta(seconds=1)).replace(microsecond=0)
+    customer_data = {
+        "name": "Cliente Top",
+        "customer_type": "Regular",
+        "credit_terms_days": 30
+    }
+    customer_id = client.post("/customers/", json=customer_data).json()["customer_id"]
+
+    # (nombre, precio, cantidad): por unidades A > C > B, por ingresos B > A > C
+    products = {}
+    for name, price, quantity in [("Top A", 10.00, 5), ("Top B", 100.00, 2), ("Top C", 1.00, 3)]:
+        product_data = {"name": name, "product_type": "Books", "list_price": price}
+        product_id = client.post("/products/", json=product_data).json()["product_id"]
+        products[product_id] = (name, quantity)
+
+    sale_data = {
+        "customer_id": customer_id,
+        "payment_method": "Cash",
+        "items": [{"product_id": product_id, "quantity": quantity} for product_id, (_, quantity) in products.items()]
+    }
+    response = client.post("/sales/", json=sale_data)
+    assert response.status_code == 201
+    revenue = {
+        line["product_id"]: Decimal(line["line_subtotal_after_discounts"])
+        for line in response.json()["breakdown"]["lines"]
+    }
+
+    def top(by):
+        response = client.get("/products/top", params={"by": by, "limit": 100, "start_date": start_date.isoformat()})
+        assert response.status_code == 200
+        return [row for row in response.json() if row["product_id"] in products]
+
+    rows = top("units")
+    assert [row["name"] for row in rows] == ["Top A", "Top C", "Top B"]
+    for row in rows:
+        assert row["units_sold"] == products[row["product_id"]][1]
+        assert row["sales_count"] == 1
+        assert Decimal(row["revenue"]) == revenue[row["product_id"]]
+
+    rows = top("revenue")
+    assert [row["name"] for row in rows] == ["Top B", "Top A", "Top C"]
+    assert [Decimal(row["revenue"]) for row in rows] == sorted(revenue.values(), reverse=True)
+
+def test_get_product_stats_not_found():
+    """Test para validar estadísticas de un producto inexistente"""
+    response = client.get("/products/99999/stats")
+    assert response.status_code == 404
+
+def test_bulk_import_products_csv():
+    """Test para la carga masiva de productos en CSV con filas inválidas"""
+    csv_data = (
+        "name,product_type,list_price\n"
+        "Producto Masivo 1,Electronics,100.00\n"
+        "Producto Masivo 2,Juguetes,50.00\n"
+        "Producto Masivo 3,Books,-1\n"
+    )
+
+    response = client.post("/products/bulk", content=csv_data, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["received"] == 3
+    assert data["created"] == 1
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 3]
+
+def test_get_products_by_ids_reports_missing():
+    """Test para consultar productos por lote de IDs con IDs inexistentes"""
+    ids = [
+        client.post("/products/", json={"name": f"Producto Lote {i}", "product_type": "Electronics", "list_price": 10}).json()["product_id"]
+        for i in range(2)
+    ]
+
+    response = client.get("/products/", params={"ids": f"{ids[1]},99999,{ids[0]},{ids[1]}"})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [product["product_id"] for product in data["items"]] == [ids[1], ids[0]]
+    assert data["missing"] == [99999]
+
+    response = client.get("/products/", params={"ids": "1,abc"})
+    assert response.status_code == 400
+
+@pytest.fixture
+def search_index():
+    """Índice de búsqueda del proceso, reconstruido (o descartado) al terminar como estaba antes"""
+    from app.services.product_search import product_search_index
+    from app.storage import open_session
+    
+    def rebuild():
+        db = open_session()
+        try:
+            product_search_index.build(db)
+        finally:
+            db.close()
+    
+    was_ready = product_search_index.is_ready
+    yield product_search_index, rebuild
+    if was_ready:
+        rebuild()
+    else:
+        product_search_index.clear()
+
+def test_search_products(search_index):
+    """Test para la búsqueda de productos por prefijo, con filtros y ranking"""
+    product_search_index, rebuild = search_index
+    
+    for name, price in [("Cámara Reflex Pro", 900), ("Cámara Compacta", 300), ("Funda para cámara", 20)]:
+        client.post("/products/", json={"name": name, "product_type": "Electronics", "list_price": price})
+    
+    # Sin índice construido responde la base de datos (FULLTEXT / LIKE)
+    product_search_index.clear()
+    response = client.get("/products/search", params={"q": "Cámara Compacta"})
+    assert response.status_code == 200
+    assert [product["name"] for product in response.json()] == ["Cámara Compacta"]
+    
+    rebuild()
+    
+    response = client.get("/products/search", params={"q": "cam"})
+    names = [product["name"] for product in response.json()]
+    assert names[:2] == ["Cámara Compacta", "Cámara Reflex Pro"]
+    assert "Funda para cámara" in names
+    
+    response = client.get("/products/search", params={"q": "cam re", "max_price": 1000})
+    assert [product["name"] for product in response.json()] == ["Cámara Reflex Pro"]
+    
+    response = client.get("/products/search", params={"q": "cam", "max_price": 100})
+    assert [product["name"] for product in response.json()] == ["Funda para cámara"]
+    
+    # Los productos nuevos entran al índice por el bus de invalidación
+    client.post("/products/", json={"name": "Cámara Instantánea", "product_type": "Electronics", "list_price": 150})
+    response = client.get("/products/search", params={"q": "instant"})
+    assert [product["name"] for product in response.json()] == ["Cámara Instantánea"]
+
+def test_search_products_matches_word_prefixes(search_index, monkeypatch):
+    """La base de datos y el índice en memoria buscan al inicio de una palabra, no dentro de ella"""
+    product_search_index, rebuild = search_index
+    
+    for name in ["Kettle Stovetop", "Backstove Rack"]:
+        client.post("/products/", json={"name": name, "product_type": "Books", "list_price": 15})
+    
+    # Índice desactivado: responde la base de datos (FULLTEXT / LIKE)
+    monkeypatch.setattr(settings, "PRODUCT_SEARCH_INDEX_ENABLED", False)
+    names = [product["name"] for product in client.get("/products/search", params={"q": "stove"}).json()]
+    assert "Kettle Stovetop" in names
+    assert "Backstove Rack" not in names
+    
+    monkeypatch.setattr(settings, "PRODUCT_SEARCH_INDEX_ENABLED", True)
+    rebuild()
+    names = [product["name"] for product in client.get("/products/search", params={"q": "stove"}).json()]
+    assert "Kettle Stovetop" in names
+    assert "Backstove Rack" not in names
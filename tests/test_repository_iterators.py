@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from main import app
+from app.database.models import Sale, SaleItem
+from app.repositories.customer_repository import CustomerRepository, CustomerTypeRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.repositories.sale_item_repository import SaleItemRepository
+from app.storage import get_repository, is_memory_backend, open_session
+
+client = TestClient(app)
+
+def _close(db) -> None:
+    if not is_memory_backend():
+        db.close()
+
+def _create_products(count: int) -> list:
+    return [
+        client.post("/products/", json={"name": f"Iter Product {i}", "product_type": "Clothing", "list_price": 5 + i}).json()["product_id"]
+        for i in range(count)
+    ]
+
+def test_iter_batches_filters_orders_and_skips_deleted():
+    """iter_batches respeta batch_size y filtros, va en orden de ID y omite los soft-deleted"""
+    product_ids = _create_products(5)
+    product_repo = get_repository(ProductRepository)
+    db = open_session()
+    try:
+        product_type_id = get_repository(ProductTypeRepository).get_by_name(db, "Clothing").product_type_id
+        product_repo.soft_delete(db, product_ids[2])
+        
+        batches = list(product_repo.iter_batches(db, batch_size=2, product_type_id=product_type_id))
+        assert all(len(batch) <= 2 for batch in batches)
+        ids = [product.product_id for batch in batches for product in batch]
+        assert ids == sorted(ids)
+        assert set(product_ids) - set(ids) == {product_ids[2]}
+        assert all(product.product_type_id == product_type_id for batch in batches for product in batch)
+        
+        all_ids = [product.product_id for product in product_repo.iter_all(db, batch_size=3)]
+        assert all_ids == [product.product_id for product in product_repo.get_all(db, limit=None)]
+    finally:
+        _close(db)
+
+def test_iter_all_as_rows():
+    """Con as_rows=True se recorren filas con las columnas de la tabla en lugar de objetos"""
+    _create_products(1)
+    product_repo = get_repository(ProductRepository)
+    db = open_session()
+    try:
+        objects = list(product_repo.iter_all(db))
+        rows = list(product_repo.iter_all(db, batch_size=2, as_rows=True))
+        assert [(row.product_id, row.name, row.list_price) for row in rows] == [
+            (product.product_id, product.name, product.list_price) for product in objects
+        ]
+        # Solo columnas: sin relaciones ORM
+        assert not hasattr(rows[0], "product_type_ref")
+        assert hasattr(objects[0], "product_type_ref")
+    finally:
+        _close(db)
+
+def test_iter_by_type_as_rows():
+    """iter_by_type de productos y clientes entrega los mismos registros como objetos o como filas"""
+    product_ids = _create_products(3)
+    customer_id = client.post(
+        "/customers/", json={"name": "Iter Customer", "customer_type": "VIP", "credit_terms_days": 90}
+    ).json()["customer_id"]
+    product_repo = get_repository(ProductRepository)
+    customer_repo = get_repository(CustomerRepository)
+    db = open_session()
+    try:
+        product_type_id = get_repository(ProductTypeRepository).get_by_name(db, "Clothing").product_type_id
+        products = [product.product_id for product in product_repo.iter_by_type(db, product_type_id, batch_size=2)]
+        product_rows = list(product_repo.iter_by_type(db, product_type_id, batch_size=2, as_rows=True))
+        assert set(product_ids) <= set(products)
+        assert [row.product_id for row in product_rows] == products
+        assert not hasattr(product_rows[0], "product_type_ref")
+        
+        customer_type_id = get_repository(CustomerTypeRepository).get_by_name(db, "VIP").customer_type_id
+        customers = [customer.customer_id for customer in customer_repo.iter_by_type(db, customer_type_id)]
+        customer_rows = list(customer_repo.iter_by_type(db, customer_type_id, as_rows=True))
+        assert customer_id in customers
+        assert [row.customer_id for row in customer_rows] == customers
+        assert all(row.customer_type_id == customer_type_id for row in customer_rows)
+        assert not hasattr(customer_rows[0], "customer_type_ref")
+    finally:
+        _close(db)
+
+def test_iter_with_sales_joins_items_to_their_sale():
+    """iter_with_sales entrega las columnas pedidas de venta e item, filtradas por fecha"""
+    started = datetime.now() - timedelta(seconds=1)
+    product_ids = _create_products(2)
+    customer_id = client.post(
+        "/customers/", json={"name": "Iter Sales Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    sale = client.post("/sales/", json={
+        "customer_id": customer_id,
+        "payment_method": "Cash",
+        "items": [{"product_id": product_ids[0], "quantity": 2}, {"product_id": product_ids[1], "quantity": 4}]
+    }).json()
+    
+    sale_item_repo = get_repository(SaleItemRepository)
+    db = open_session()
+    try:
+        columns = [Sale.sale_id, Sale.customer_id, SaleItem.product_id, SaleItem.quantity]
+        batches = list(sale_item_repo.iter_with_sales(db, columns, start_date=started, batch_size=1))
+        rows = [tuple(row) for batch in batches for row in batch]
+        assert all(len(batch) <= 1 for batch in batches)
+        assert sorted(row for row in rows if row[0] == sale["sale_id"]) == [
+            (sale["sale_id"], customer_id, product_ids[0], 2),
+            (sale["sale_id"], customer_id, product_ids[1], 4)
+        ]
+        
+        before = list(sale_item_repo.iter_with_sales(db, columns, end_date=started - timedelta(days=1)))
+        assert all(row[0] != sale["sale_id"] for batch in before for row in batch)
+    finally:
+        _close(db)
@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.config.settings import settings
+from app.services.repricing_service import RepricingScenario, repricing_service
+from app.storage import is_memory_backend
+
+client = TestClient(app)
+
+def _wait(job_id: str) -> dict:
+    for _ in range(300):
+        job = client.get(f"/repricing/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("La simulación no terminó")
+
+def _create_sales() -> datetime:
+    started = datetime.now() - timedelta(seconds=1)
+    customer_id = client.post(
+        "/customers/", json={"name": "Repricing Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    product_id = client.post(
+        "/products/", json={"name": "Repricing Laptop", "product_type": "Electronics", "list_price": 1000}
+    ).json()["product_id"]
+    for quantity in (1, 2, 3):
+        response = client.post(
+            "/sales/", json={"customer_id": customer_id, "payment_method": "Cash", "items": [{"product_id": product_id, "quantity": quantity}]}
+        )
+        assert response.status_code == 201
+    return started
+
+def test_repricing_reports_deltas_by_day_and_product_type():
+    """Sin cambios el recálculo coincide con lo guardado; un descuento mayor lo reduce"""
+    started = _create_sales()
+    window = {"start_date": started.isoformat(), "end_date": (datetime.now() + timedelta(seconds=1)).isoformat()}
+    
+    response = client.post("/repricing/", json=window)
+    assert response.status_code == 202
+    baseline = _wait(response.json()["job_id"])
+    assert baseline["status"] == "done"
+    report = baseline["report"]
+    assert report["lines"] >= 3
+    assert Decimal(report["delta"]) == 0
+    
+    response = client.post("/repricing/", json={**window, "product_type_discounts": {"Electronics": 50}})
+    scenario = _wait(response.json()["job_id"])["report"]
+    assert Decimal(scenario["repriced_total"]) < Decimal(report["repriced_total"])
+    assert Decimal(scenario["stored_total"]) == Decimal(report["stored_total"])
+    assert sum(Decimal(day["delta"]) for day in scenario["by_day"]) == Decimal(scenario["delta"])
+    electronics = next(row for row in scenario["by_product_type"] if row["product_type"] == "Electronics")
+    assert Decimal(electronics["delta"]) < 0
+
+def test_repricing_invalid_request():
+    """Nombres desconocidos, porcentajes fuera de rango o fechas invertidas dan 400"""
+    assert client.post("/repricing/", json={"product_type_discounts": {"Unknown": 10}}).status_code == 400
+    assert client.post("/repricing/", json={"payment_method_discounts": {"Cash": 150}}).status_code == 400
+    response = client.post("/repricing/", json={"start_date": "2025-02-01T00:00:00", "end_date": "2025-01-01T00:00:00"})
+    assert response.status_code == 400
+    assert client.get("/repricing/missing").status_code == 404
+
+@pytest.mark.skipif(
+    is_memory_backend() or settings.database.is_in_memory,
+    reason="El pool de procesos requiere una base de datos compartida"
+)
+def test_repricing_process_pool_matches_in_process():
+    """Repartir los días entre procesos da el mismo reporte que procesarlos en uno"""
+    _create_sales()
+    end = datetime.now() + timedelta(seconds=1)
+    scenario = RepricingScenario(start=end - timedelta(days=2), end=end)
+    
+    in_process = repricing_service.run(scenario, workers=1)
+    pooled = repricing_service.run(scenario, workers=2)
+    assert pooled["workers"] == 2
+    for field in ("lines", "stored_total", "repriced_total", "by_day", "by_product_type"):
+        assert pooled[field] == in_process[field]
+
+def test_repricing_in_memory_sqlite_runs_in_process(monkeypatch):
+    """Con SQLite en memoria la simulación no reparte días entre procesos que no verían la base"""
+    monkeypatch.setattr(settings.database, "DB_ENGINE", "sqlite")
+    monkeypatch.setattr(settings.database, "SQLITE_PATH", ":memory:")
+    end = datetime.now() + timedelta(seconds=1)
+    
+    report = repricing_service.run(RepricingScenario(start=end - timedelta(days=2), end=end), workers=2)
+    assert report["workers"] == 1
+    assert report["partitions"] == 3
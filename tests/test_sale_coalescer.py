@@ -0,0 +1,113 @@
+import uuid
+import pytest
+from sqlalchemy.exc import IntegrityError
+from fastapi.testclient import TestClient
+from main import app
+from app.config.settings import settings
+from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.services.sale_coalescer import SaleWriteCoalescer, sale_coalescer
+from app.services.sale_service import SaleService
+from app.storage import get_repository, is_memory_backend, open_session
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.skipif(is_memory_backend(), reason="el group commit escribe en una base SQL")
+
+def _sale_data() -> dict:
+    customer_id = client.post(
+        "/customers/", json={"name": "Coalescer Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    product_id = client.post(
+        "/products/", json={"name": "Coalescer Product", "product_type": "Clothing", "list_price": 42.00}
+    ).json()["product_id"]
+    return {"customer_id": customer_id, "payment_method": "Cash", "items": [{"product_id": product_id, "quantity": 2}]}
+
+def _price_sales(count: int) -> list:
+    sale_data = _sale_data()
+    db = open_session()
+    try:
+        payment_method = get_repository(PaymentMethodRepository).get_by_name(db, sale_data["payment_method"])
+        sale_data["payment_method_id"] = payment_method.payment_method_id
+        return [SaleService().price_sale(db, sale_data) for _ in range(count)]
+    finally:
+        db.close()
+
+def _coalescer(window_ms: float, max_batch: int) -> tuple:
+    """Coalescedor que anota el tamaño de cada lote que escribe"""
+    coalescer = SaleWriteCoalescer(window_ms=window_ms, max_batch=max_batch)
+    batches = []
+    flush = coalescer._flush
+    
+    def recording_flush(batch):
+        batches.append(len(batch))
+        flush(batch)
+    
+    coalescer._flush = recording_flush
+    return coalescer, batches
+
+def test_sales_within_window_share_one_commit():
+    """Las ventas que llegan dentro de la ventana se escriben juntas y cada una recibe su sale_id"""
+    priced_sales = _price_sales(3)
+    coalescer, batches = _coalescer(window_ms=300, max_batch=50)
+    try:
+        futures = [coalescer.submit(priced_sale) for priced_sale in priced_sales]
+        assert [future.result(timeout=5) for future in futures] == [priced_sale["sale"]["sale_id"] for priced_sale in priced_sales]
+    finally:
+        coalescer.stop()
+    
+    assert batches == [3]
+    for priced_sale in priced_sales:
+        assert client.get(f"/sales/{priced_sale['sale']['sale_id']}").status_code == 200
+
+def test_batch_cut_at_max_batch():
+    """Un lote no pasa de max_batch aunque la ventana siga abierta"""
+    priced_sales = _price_sales(5)
+    coalescer, batches = _coalescer(window_ms=500, max_batch=2)
+    try:
+        futures = [coalescer.submit(priced_sale) for priced_sale in priced_sales]
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        coalescer.stop()
+    
+    assert batches == [2, 2, 1]
+
+def test_invalid_sale_fails_alone():
+    """Si una venta rompe el lote, solo su llamador recibe el error"""
+    valid, rejected, other = _price_sales(3)
+    rejected["sale"]["customer_id"] = 99999999
+    coalescer, batches = _coalescer(window_ms=300, max_batch=50)
+    try:
+        futures = [coalescer.submit(priced_sale) for priced_sale in (valid, rejected, other)]
+        assert futures[0].result(timeout=5) == valid["sale"]["sale_id"]
+        assert futures[2].result(timeout=5) == other["sale"]["sale_id"]
+        with pytest.raises(IntegrityError):
+            futures[1].result(timeout=5)
+    finally:
+        coalescer.stop()
+    
+    assert batches == [3]
+    assert client.get(f"/sales/{valid['sale']['sale_id']}").status_code == 200
+    assert client.get(f"/sales/{other['sale']['sale_id']}").status_code == 200
+    assert client.get(f"/sales/{rejected['sale']['sale_id']}").status_code == 404
+
+def test_group_commit_with_idempotency_key(monkeypatch):
+    """En modo group_commit un reintento con la misma llave devuelve la respuesta guardada"""
+    monkeypatch.setattr(settings, "SALE_WRITE_MODE", "group_commit")
+    sale_data = _sale_data()
+    headers = {"Idempotency-Key": f"coalescer-{uuid.uuid4()}"}
+    try:
+        first = client.post("/sales/", json=sale_data, headers=headers)
+        assert first.status_code == 201
+        assert "Idempotent-Replayed" not in first.headers
+        
+        retry = client.post("/sales/", json=sale_data, headers=headers)
+        assert retry.status_code == 201
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.json() == first.json()
+    finally:
+        sale_coalescer.stop()
+    
+    response = client.get(f"/sales/{first.json()['sale_id']}")
+    assert response.status_code == 200
+    assert response.json()["breakdown"] == first.json()["breakdown"]
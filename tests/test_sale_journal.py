@@ -0,0 +1,129 @@
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.config.settings import settings
+from app.repositories.payment_method_repository import PaymentMethodRepository
+from app.services.sale_journal import SaleJournal, SaleJournalWriter
+from app.services.sale_service import SaleService
+from app.storage import get_repository, is_memory_backend, open_session
+
+client = TestClient(app)
+
+requires_sql = pytest.mark.skipif(is_memory_backend(), reason="el escritor del log vacía hacia una base SQL")
+
+def _sale_data() -> dict:
+    customer_id = client.post(
+        "/customers/", json={"name": "Journal Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    product_id = client.post(
+        "/products/", json={"name": "Journal Product", "product_type": "Books", "list_price": 35.50}
+    ).json()["product_id"]
+    return {"customer_id": customer_id, "payment_method": "Cash", "items": [{"product_id": product_id, "quantity": 3}]}
+
+def _price_sales(count: int) -> list:
+    """Ventas calculadas por SaleService, listas para el log"""
+    sale_data = _sale_data()
+    db = open_session()
+    try:
+        payment_method = get_repository(PaymentMethodRepository).get_by_name(db, sale_data["payment_method"])
+        sale_data["payment_method_id"] = payment_method.payment_method_id
+        return [SaleService().price_sale(db, sale_data) for _ in range(count)]
+    finally:
+        if not is_memory_backend():
+            db.close()
+
+def _writer(journal: SaleJournal) -> SaleJournalWriter:
+    return SaleJournalWriter(journal, batch_size=100, flush_interval=0.1)
+
+def test_journal_keeps_sales_after_reopen(tmp_path):
+    """Lo agregado al log sigue ahí al reabrirlo (caída antes de vaciar) con Decimal y fechas restaurados"""
+    path = str(tmp_path / "journal.db")
+    priced_sales = _price_sales(2)
+    journal = SaleJournal(path)
+    seqs = [journal.append(priced_sale) for priced_sale in priced_sales]
+    
+    # Sin close(): un proceso nuevo abre el mismo archivo
+    reopened = SaleJournal(path)
+    assert reopened.pending_count() == 2
+    assert reopened.read_batch(10) == list(zip(seqs, priced_sales))
+    reopened.close()
+    journal.close()
+
+@requires_sql
+def test_writer_replays_pending_sales(tmp_path):
+    """flush() escribe el lote en la base de datos y lo quita del log"""
+    priced_sales = _price_sales(2)
+    journal = SaleJournal(str(tmp_path / "journal.db"))
+    for priced_sale in priced_sales:
+        journal.append(priced_sale)
+    
+    writer = _writer(journal)
+    assert writer.flush() == 2
+    assert writer.flush() == 0
+    assert journal.pending_count() == 0
+    
+    for priced_sale in priced_sales:
+        response = client.get(f"/sales/{priced_sale['sale']['sale_id']}")
+        assert response.status_code == 200
+        assert response.json()["breakdown"]["total"] == str(priced_sale["sale"]["total"])
+    journal.close()
+
+@requires_sql
+def test_writer_skips_sales_already_inserted(tmp_path):
+    """Una venta escrita pero no quitada del log (caída entre ambos pasos) no se duplica"""
+    priced_sale = _price_sales(1)[0]
+    journal = SaleJournal(str(tmp_path / "journal.db"))
+    writer = _writer(journal)
+    journal.append(priced_sale)
+    writer.flush()
+    
+    journal.append(priced_sale)
+    assert writer.flush() == 1
+    assert journal.pending_count() == 0
+    
+    sale_id = priced_sale["sale"]["sale_id"]
+    response = client.get("/sales/", params={"ids": str(sale_id)})
+    assert [sale["sale_id"] for sale in response.json()["items"]] == [sale_id]
+    with sqlite3.connect(journal.path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sale_journal_failed").fetchone()[0] == 0
+    journal.close()
+
+@requires_sql
+def test_writer_moves_rejected_sale_to_failed(tmp_path):
+    """Una venta que la base de datos rechaza se aparta y el resto del lote se escribe"""
+    valid, rejected = _price_sales(2)
+    rejected["sale"]["customer_id"] = 99999999
+    journal = SaleJournal(str(tmp_path / "journal.db"))
+    journal.append(valid)
+    rejected_seq = journal.append(rejected)
+    
+    assert _writer(journal).flush() == 2
+    assert journal.pending_count() == 0
+    assert client.get(f"/sales/{valid['sale']['sale_id']}").status_code == 200
+    assert client.get(f"/sales/{rejected['sale']['sale_id']}").status_code == 404
+    with sqlite3.connect(journal.path) as conn:
+        rows = conn.execute("SELECT seq, sale_id FROM sale_journal_failed").fetchall()
+    assert rows == [(rejected_seq, rejected["sale"]["sale_id"])]
+    journal.close()
+
+def test_create_sale_write_behind_accepted(tmp_path, monkeypatch):
+    """En modo write_behind POST /sales/ responde 202 con el breakdown y deja la venta en el log"""
+    journal = SaleJournal(str(tmp_path / "journal.db"))
+    monkeypatch.setattr(settings, "SALE_WRITE_MODE", "write_behind")
+    monkeypatch.setattr("app.routers.sales.sale_journal", journal)
+    
+    response = client.post("/sales/", json=_sale_data())
+    assert response.status_code == 202
+    
+    data = response.json()
+    assert data["tax_rate_percent"] == "16.00"
+    assert journal.pending_count() == 1
+    assert journal.read_batch(1)[0][1]["sale"]["sale_id"] == data["sale_id"]
+    
+    if not is_memory_backend():
+        _writer(journal).flush()
+        response = client.get(f"/sales/{data['sale_id']}")
+        assert response.status_code == 200
+        assert response.json()["breakdown"] == data["breakdown"]
+    journal.close()
@@ -1,3 +1,4 @@
+import uuid
 import pytest
 from fastapi.testclient import TestClient
 from main import app
@@ -53,6 +54,17 @@ def test_get_sales():
     # Verificar que al menos hay una venta (la que creamos en el test anterior)
     assert len(data) > 0
 
+def test_get_sales_by_ids():
+    """Test para consultar ventas por lote de IDs"""
+    sale_id = client.get("/sales/").json()[0]["sale_id"]
+
+    response = client.get("/sales/", params={"ids": f"{sale_id},99999999"})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [sale["sale_id"] for sale in data["items"]] == [sale_id]
+    assert data["missing"] == [99999999]
+
 def test_create_sale_invalid_customer():
     """Test para validar cliente inexistente"""
     sale_data = {
@@ -85,3 +97,98 @@ def test_create_sale_invalid_product():
     response = client.post("/sales/", json=sale_data)
     # La API devuelve 400 Bad Request en lugar de 404 Not Found
     assert response.status_code == 400
+
+def test_create_sales_assigns_distinct_ids():
+    """Test para validar que los IDs asignados por bloques no se repiten"""
+    customer_data = {
+        "name": "Test Customer Ids",
+        "customer_type": "Regular",
+        "credit_terms_days": 30
+    }
+    customer_id = client.post("/customers/", json=customer_data).json()["customer_id"]
+
+    product_data = {
+        "name": "Test Product Ids",
+        "product_type": "Books",
+        "list_price": 250.00
+    }
+    product_id = client.post("/products/", json=product_data).json()["product_id"]
+
+    sale_data = {
+        "customer_id": customer_id,
+        "payment_method": "Cash",
+        "items": [
+            {"product_id": product_id, "quantity": 1},
+            {"product_id": product_id, "quantity": 3}
+        ]
+    }
+
+    first = client.post("/sales/", json=sale_data)
+    second = client.post("/sales/", json=sale_data)
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert first.json()["sale_id"] != second.json()["sale_id"]
+    assert len(second.json()["breakdown"]["lines"]) == 2
+
+def test_create_sale_idempotency_key_replays_response():
+    """Test para validar que un reintento con la misma llave no duplica la venta"""
+    customer_data = {
+        "name": "Test Customer Idempotency",
+        "customer_type": "VIP",
+        "credit_terms_days": 90
+    }
+    customer_id = client.post("/customers/", json=customer_data).json()["customer_id"]
+
+    product_data = {
+        "name": "Test Product Idempotency",
+        "product_type": "Electronics",
+        "list_price": 100.00
+    }
+    product_id = client.post("/products/", json=product_data).json()["product_id"]
+
+    sale_data = {
+        "customer_id": customer_id,
+        "payment_method": "Cash",
+        "items": [{"product_id": product_id, "quantity": 1}]
+    }
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/sales/", json=sale_data, headers=headers)
+    retry = client.post("/sales/", json=sale_data, headers=headers)
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["sale_id"] == first.json()["sale_id"]
+
+    # La misma llave con otro cuerpo se rechaza
+    sale_data["items"][0]["quantity"] = 2
+    response = client.post("/sales/", json=sale_data, headers=headers)
+    assert response.status_code == 422
+
+def test_get_sale_by_id_cached_until_deleted():
+    """GET /sales/{id} devuelve lo mismo que la creación (desde caché o base de datos) hasta el soft delete"""
+    from app.services.sale_response_cache import sale_response_cache
+    
+    customer_id = client.post(
+        "/customers/", json={"name": "Cached Sale Customer", "customer_type": "Regular", "credit_terms_days": 30}
+    ).json()["customer_id"]
+    product_id = client.post(
+        "/products/", json={"name": "Cached Sale Product", "product_type": "Electronics", "list_price": 250}
+    ).json()["product_id"]
+    created = client.post(
+        "/sales/", json={"customer_id": customer_id, "payment_method": "Cash", "items": [{"product_id": product_id, "quantity": 2}]}
+    ).json()
+    sale_id = created["sale_id"]
+    
+    response = client.get(f"/sales/{sale_id}")
+    assert response.status_code == 200
+    assert response.json() == created
+    
+    # Sin caché se carga con una consulta y queda igual
+    sale_response_cache.invalidate()
+    assert client.get(f"/sales/{sale_id}").json() == created
+    assert sale_response_cache.get(sale_id) is not None
+    
+    assert client.delete(f"/sales/{sale_id}").status_code == 204
+    assert client.get(f"/sales/{sale_id}").status_code == 404
+    assert client.delete(f"/sales/{sale_id}").status_code == 404
@@ -0,0 +1,60 @@
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+from app.services.single_flight import SingleFlightGroup, SingleFlightMiddleware
+
+client = TestClient(app)
+
+def _scope(path: str, query: bytes = b"", accept: bytes = b"application/json"):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query,
+        "headers": [(b"accept", accept)]
+    }
+
+def test_identical_concurrent_reads_share_one_execution():
+    """Los GET idénticos simultáneos se ejecutan una vez; los distintos, por separado"""
+    calls = []
+    
+    async def backend(scope, receive, send):
+        calls.append((scope["path"], scope["query_string"]))
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": scope["path"].encode()})
+    
+    group = SingleFlightGroup(max_bytes=1024)
+    middleware = SingleFlightMiddleware(backend, group)
+    
+    async def request(scope):
+        messages = []
+        
+        async def send(message):
+            messages.append(message)
+        
+        await middleware(scope, None, send)
+        return messages
+    
+    async def scenario():
+        return await asyncio.gather(
+            *(request(_scope("/sales/")) for _ in range(5)),
+            request(_scope("/sales/", b"limit=1")),
+            request(_scope("/sales/", accept=b"application/msgpack"))
+        )
+    
+    responses = asyncio.run(scenario())
+    assert len(calls) == 3
+    assert all(messages[-1]["body"] == b"/sales/" for messages in responses)
+    
+    stats = group.stats()
+    assert stats["leaders"] == 3
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+def test_single_flight_metrics():
+    """Los contadores de agrupación se exponen en /metrics"""
+    assert client.get("/products/").status_code == 200
+    single_flight = client.get("/metrics").json()["single_flight"]
+    assert single_flight["leaders"] >= 1
+    assert {"coalesced", "coalesced_ratio", "bytes_saved"} <= set(single_flight)
@@ -0,0 +1,56 @@
+from datetime import datetime
+from decimal import Decimal
+from app.database.models import Customer, CustomerType, CreditTerms, PaymentMethod, Sale
+from app.storage.memory import MemoryStore
+from app.storage.memory_repositories import MemoryCustomerRepository, MemorySaleRepository
+
+def _store_with_sales() -> MemoryStore:
+    store = MemoryStore()
+    store.insert(CustomerType, {"name": "VIP"})
+    store.insert(CreditTerms, {"days": 30})
+    store.insert(PaymentMethod, {"name": "Cash"})
+    store.insert(Customer, {"name": "Cliente Memoria", "customer_type_id": 1, "credit_terms_id": 1})
+    for day in (3, 1, 2):
+        store.insert(Sale, {
+            "customer_id": 1,
+            "payment_method_id": 1,
+            "subtotal": Decimal("100"),
+            "tax": Decimal("16"),
+            "total": Decimal("116"),
+            "sale_datetime": datetime(2025, 1, day)
+        })
+    return store
+
+def test_memory_store_indexes():
+    """Test para las búsquedas por nombre, cliente y fecha del backend en memoria"""
+    store = _store_with_sales()
+
+    customer = MemoryCustomerRepository().get_by_name(store, "Cliente Memoria")
+    assert customer.customer_type_ref.name == "VIP"
+
+    page = MemorySaleRepository().get_page_by_customer(store, 1, limit=2)
+    assert [sale.sale_datetime.day for sale, _ in page] == [3, 2]
+    assert page[0][1] == "Cash"
+
+    last = page[-1][0]
+    next_page = MemorySaleRepository().get_page_by_customer(store, 1, limit=2, before=(last.sale_datetime, last.sale_id))
+    assert [sale.sale_datetime.day for sale, _ in next_page] == [1]
+
+    in_range = store.sales_by_date(datetime(2025, 1, 2), datetime(2025, 1, 3))
+    assert [sale.sale_datetime.day for sale in in_range] == [2, 3]
+
+def test_memory_store_snapshot_restore(tmp_path):
+    """Test para guardar y restaurar un snapshot del backend en memoria"""
+    store = _store_with_sales()
+    path = str(tmp_path / "snapshot.json")
+    store.snapshot(path)
+
+    restored = MemoryStore()
+    restored.restore(path)
+    summary = MemorySaleRepository().get_customer_summary(restored, 1)
+    assert summary["sales_count"] == 3
+    assert summary["lifetime_total"] == Decimal("348.00")
+    assert restored.get(Sale, 1).customer.name == "Cliente Memoria"
+    assert restored.insert(Sale, {
+        "customer_id": 1, "payment_method_id": 1, "subtotal": 0, "tax": 0, "total": 0
+    }).sale_id == 4